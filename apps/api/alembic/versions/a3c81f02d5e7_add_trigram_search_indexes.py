@@ -0,0 +1,41 @@
+"""Add pg_trgm search indexes on horses and stables
+
+Revision ID: a3c81f02d5e7
+Revises: f4943f9d6432
+Create Date: 2025-09-12 10:04:31.218544
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c81f02d5e7'
+down_revision = 'f4943f9d6432'
+branch_labels = None
+depends_on = None
+
+
+TRIGRAM_INDEXES = [
+    ('ix_horses_name_trgm', 'horses', 'name'),
+    ('ix_horses_breed_trgm', 'horses', 'breed'),
+    ('ix_stables_name_trgm', 'stables', 'name'),
+    ('ix_stables_city_trgm', 'stables', 'city'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            postgresql_using='gin',
+            postgresql_ops={column_name: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    for index_name, table_name, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
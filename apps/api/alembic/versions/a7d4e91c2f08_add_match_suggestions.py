@@ -0,0 +1,41 @@
+"""Add match_suggestions for the nightly batch matching job
+
+Revision ID: a7d4e91c2f08
+Revises: f29a8c51d6e3
+Create Date: 2025-09-29 08:41:13.204519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4e91c2f08'
+down_revision = 'f29a8c51d6e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'match_suggestions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('listing_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['rider_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_date', 'rider_id', 'rank', name='uq_match_suggestions_run_rider_rank')
+    )
+    op.create_index(op.f('ix_match_suggestions_id'), 'match_suggestions', ['id'], unique=False)
+    op.create_index('ix_match_suggestions_rider_run', 'match_suggestions', ['rider_id', 'run_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_match_suggestions_rider_run', table_name='match_suggestions')
+    op.drop_index(op.f('ix_match_suggestions_id'), table_name='match_suggestions')
+    op.drop_table('match_suggestions')
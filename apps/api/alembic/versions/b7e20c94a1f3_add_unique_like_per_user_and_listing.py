@@ -0,0 +1,35 @@
+"""Add unique constraint on likes (from_user_id, listing_id)
+
+Revision ID: b7e20c94a1f3
+Revises: a3c81f02d5e7
+Create Date: 2025-09-15 09:41:12.503817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e20c94a1f3'
+down_revision = 'a3c81f02d5e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Drop duplicate likes, keeping the oldest one per (user, listing)
+    op.execute(
+        """
+        DELETE FROM likes
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM likes GROUP BY from_user_id, listing_id
+        )
+        """
+    )
+    op.create_unique_constraint(
+        'uq_likes_from_user_listing', 'likes', ['from_user_id', 'listing_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_likes_from_user_listing', 'likes', type_='unique')
@@ -0,0 +1,52 @@
+"""Add owner_likes table and unique mutual match per rider and listing
+
+Revision ID: c5d913e8b042
+Revises: b7e20c94a1f3
+Create Date: 2025-09-16 14:22:05.871390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d913e8b042'
+down_revision = 'b7e20c94a1f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'owner_likes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('from_user_id', sa.Integer(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('listing_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['from_user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['rider_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['listing_id'], ['listings.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('listing_id', 'rider_id', name='uq_owner_likes_listing_rider'),
+    )
+    op.create_index('ix_owner_likes_id', 'owner_likes', ['id'])
+
+    # Keep the oldest match per (rider, listing) before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM mutual_matches
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM mutual_matches GROUP BY rider_id, listing_id
+        )
+        """
+    )
+    op.create_unique_constraint(
+        'uq_mutual_matches_rider_listing', 'mutual_matches', ['rider_id', 'listing_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_mutual_matches_rider_listing', 'mutual_matches', type_='unique')
+    op.drop_index('ix_owner_likes_id', table_name='owner_likes')
+    op.drop_table('owner_likes')
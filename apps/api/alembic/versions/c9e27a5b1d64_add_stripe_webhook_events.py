@@ -0,0 +1,30 @@
+"""Add stripe_webhook_events for webhook deduplication
+
+Revision ID: c9e27a5b1d64
+Revises: b3f6c20d8e41
+Create Date: 2025-10-02 14:05:31.448210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e27a5b1d64'
+down_revision = 'b3f6c20d8e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stripe_webhook_events',
+        sa.Column('id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stripe_webhook_events')
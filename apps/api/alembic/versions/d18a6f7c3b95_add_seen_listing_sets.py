@@ -0,0 +1,33 @@
+"""Add seen_listing_sets table
+
+Revision ID: d18a6f7c3b95
+Revises: c5d913e8b042
+Create Date: 2025-09-18 11:07:44.302116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd18a6f7c3b95'
+down_revision = 'c5d913e8b042'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seen_listing_sets',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('liked_ids', sa.LargeBinary(), nullable=False),
+        sa.Column('skipped_ids', sa.LargeBinary(), nullable=False),
+        sa.Column('skips_since', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('seen_listing_sets')
@@ -0,0 +1,28 @@
+"""Add per-skip days to seen_listing_sets
+
+Revision ID: e5b3c8a1f706
+Revises: d4a1e8f7b2c9
+Create Date: 2025-10-06 09:41:12.583027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b3c8a1f706'
+down_revision = 'd4a1e8f7b2c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows start empty; their skips are dated at skips_since until rewritten
+    op.add_column(
+        'seen_listing_sets',
+        sa.Column('skipped_days', sa.LargeBinary(), server_default=sa.text("''"), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('seen_listing_sets', 'skipped_days')
@@ -0,0 +1,73 @@
+"""Add listing prefilter feature columns
+
+Revision ID: e62b0d4f9a17
+Revises: d18a6f7c3b95
+Create Date: 2025-09-22 14:31:08.517390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.features import availability_mask, discipline_mask, region_code
+
+
+# revision identifiers, used by Alembic.
+revision = 'e62b0d4f9a17'
+down_revision = 'd18a6f7c3b95'
+branch_labels = None
+depends_on = None
+
+
+listings = sa.table(
+    'listings',
+    sa.column('id', sa.Integer),
+    sa.column('horse_id', sa.Integer),
+    sa.column('location_postcode', sa.String),
+    sa.column('region_code', sa.String),
+    sa.column('availability_mask', sa.Integer),
+    sa.column('discipline_mask', sa.Integer),
+)
+horses = sa.table(
+    'horses',
+    sa.column('id', sa.Integer),
+    sa.column('owner_id', sa.Integer),
+    sa.column('disciplines', sa.JSON),
+)
+owner_profiles = sa.table(
+    'owner_profiles',
+    sa.column('user_id', sa.Integer),
+    sa.column('available_days', sa.JSON),
+)
+
+
+def upgrade() -> None:
+    op.add_column('listings', sa.Column('region_code', sa.String(length=2), nullable=True))
+    op.add_column('listings', sa.Column('availability_mask', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('listings', sa.Column('discipline_mask', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the listing postcode, horse disciplines and owner weekdays
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(listings.c.id, listings.c.location_postcode, horses.c.disciplines, owner_profiles.c.available_days)
+        .select_from(
+            listings.join(horses, horses.c.id == listings.c.horse_id)
+            .outerjoin(owner_profiles, owner_profiles.c.user_id == horses.c.owner_id)
+        )
+    ).fetchall()
+    for listing_id, postcode, disciplines, available_days in rows:
+        bind.execute(
+            listings.update().where(listings.c.id == listing_id).values(
+                region_code=region_code(postcode),
+                availability_mask=availability_mask(available_days),
+                discipline_mask=discipline_mask(disciplines),
+            )
+        )
+
+    op.create_index('ix_listings_prefilter', 'listings', ['is_active', 'region_code', 'contribution_min'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_listings_prefilter', table_name='listings')
+    op.drop_column('listings', 'discipline_mask')
+    op.drop_column('listings', 'availability_mask')
+    op.drop_column('listings', 'region_code')
@@ -0,0 +1,26 @@
+"""Add listings.updated_at for the market snapshot
+
+Revision ID: f29a8c51d6e3
+Revises: e62b0d4f9a17
+Create Date: 2025-09-24 09:12:57.681204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f29a8c51d6e3'
+down_revision = 'e62b0d4f9a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('listings', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.create_index(op.f('ix_listings_updated_at'), 'listings', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_listings_updated_at'), table_name='listings')
+    op.drop_column('listings', 'updated_at')
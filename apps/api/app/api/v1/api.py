@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, horses, reviews, stables, profiles, listings, likes, matches, payments, rider_profiles, owner_profiles, matching
+from app.api.v1.endpoints import auth, users, horses, reviews, stables, profiles, listings, likes, matches, payments, rider_profiles, owner_profiles, matching, search, bootstrap
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth")
@@ -16,3 +16,5 @@ api_router.include_router(matching.router, prefix="/matching")
 api_router.include_router(payments.router, prefix="/payments")
 api_router.include_router(reviews.router, prefix="/reviews")
 api_router.include_router(stables.router, prefix="/stables")
+api_router.include_router(search.router, prefix="/search")
+api_router.include_router(bootstrap.router, prefix="/bootstrap")
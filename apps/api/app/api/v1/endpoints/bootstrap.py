@@ -0,0 +1,79 @@
+import asyncio
+from fastapi import APIRouter, Depends
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.core.auth import get_current_user
+from app.models.user import User
+from app.models.rider_profile import RiderProfile
+from app.models.owner_profile import OwnerProfile
+from app.models.horse import Horse
+from app.models.listing import Listing
+from app.models.like import Like
+from app.models.mutual_match import MutualMatch
+from app.schemas.bootstrap import BootstrapResponse, BootstrapSection
+from app.schemas.user import UserResponse
+from app.schemas.rider_profile import RiderProfileResponse
+from app.schemas.owner_profile import OwnerProfileResponse
+from app.schemas.listing import ListingSummary
+from app.schemas.like import LikeResponse
+from app.schemas.match import MutualMatchResponse
+from app.services.projections import listing_summary_options
+
+router = APIRouter(tags=["bootstrap"])
+
+def _dump(schema, obj):
+    return schema.model_validate(obj).model_dump(mode="json")
+
+def _rider_profile(db: Session, user_id: int):
+    profile = db.query(RiderProfile).filter(RiderProfile.user_id == user_id).first()
+    return _dump(RiderProfileResponse, profile) if profile else None
+
+def _owner_profile(db: Session, user_id: int):
+    profile = db.query(OwnerProfile).filter(OwnerProfile.user_id == user_id).first()
+    return _dump(OwnerProfileResponse, profile) if profile else None
+
+def _my_listings(db: Session, user_id: int):
+    listings = db.query(Listing).options(*listing_summary_options()).join(Horse).filter(
+        Horse.owner_id == user_id
+    ).all()
+    return [_dump(ListingSummary, listing) for listing in listings]
+
+def _my_likes(db: Session, user_id: int):
+    likes = db.query(Like).filter(Like.from_user_id == user_id).all()
+    return [_dump(LikeResponse, like) for like in likes]
+
+def _mutual_matches(db: Session, user_id: int):
+    # Matches as rider, plus matches on listings of the user's own horses
+    matches = db.query(MutualMatch).join(Listing).join(Horse).filter(
+        or_(MutualMatch.rider_id == user_id, Horse.owner_id == user_id)
+    ).all()
+    return [_dump(MutualMatchResponse, match) for match in matches]
+
+def _run_section(loader, user_id: int) -> BootstrapSection:
+    """Load one section on its own session; failures stay inside the section"""
+    db = SessionLocal()
+    try:
+        return BootstrapSection(data=loader(db, user_id))
+    except Exception as e:
+        print(f"ERROR: Bootstrap section {loader.__name__} failed: {e}")
+        return BootstrapSection(error=f"Failed to load {loader.__name__.lstrip('_')}")
+    finally:
+        db.close()
+
+@router.get("/", response_model=BootstrapResponse)
+async def bootstrap(
+    current_user: User = Depends(get_current_user)
+):
+    """Everything the app needs on launch, resolved with a single auth check"""
+    loaders = [_rider_profile, _owner_profile, _my_listings, _my_likes, _mutual_matches]
+
+    # Sync SQLAlchemy sections run concurrently in worker threads
+    sections = await asyncio.gather(*[
+        asyncio.to_thread(_run_section, loader, current_user.id) for loader in loaders
+    ])
+
+    return BootstrapResponse(
+        user=UserResponse.model_validate(current_user),
+        **{loader.__name__.lstrip("_"): section for loader, section in zip(loaders, sections)}
+    )
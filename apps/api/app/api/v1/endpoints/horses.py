@@ -3,27 +3,38 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.core.auth import get_current_user, require_role, UserRole
+from app.core.fields import FieldSelection, sparse_fields
+from app.core.invalidation import emit
 from app.models.user import User
 from app.models.horse import Horse
-from app.schemas.horse import HorseResponse, HorseCreate, HorseUpdate
+from app.models.stable import Stable
+from app.schemas.horse import HorseResponse, HorseSummary, HorseBatchResponse, HorseCreate, HorseUpdate
+from app.services.batch_service import fetch_by_ids
+from app.services.projections import horse_summary_options
+from app.services.retrieval import refresh_listing_features
+from app.services.search_service import SearchQueryBuilder
 
 router = APIRouter()
 
-@router.get("/", response_model=List[HorseResponse])
+@router.get("/", response_model=List[HorseSummary])
 async def get_horses(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    q: Optional[str] = Query(None, max_length=100),
     city: Optional[str] = None,
     max_price: Optional[int] = None,
     discipline: Optional[str] = None,
     experience_level: Optional[str] = None,
+    selection: FieldSelection = Depends(sparse_fields(HorseSummary)),
     db: Session = Depends(get_db)
 ):
     """Get list of available horses with filters"""
-    query = db.query(Horse).filter(Horse.is_available == True)
+    load_options = selection.load_options(Horse) or horse_summary_options()
+    query = db.query(Horse).options(*load_options).filter(Horse.is_available == True)
     
     if city:
-        query = query.filter(Horse.location_city.ilike(f"%{city}%"))
+        # Horses are located at their stable
+        query = query.outerjoin(Horse.stable)
     if max_price:
         query = query.filter(Horse.price_per_hour <= max_price * 100)
     if discipline:
@@ -31,22 +42,37 @@ async def get_horses(
     if experience_level:
         query = query.filter(Horse.experience_required == experience_level)
     
+    # Trigram-indexed text search, ranked by similarity
+    search = SearchQueryBuilder(query).contains(Stable.city, city).matches_any([Horse.name, Horse.breed], q)
+    query = search.build()
+    
     horses = query.offset(skip).limit(limit).all()
-    return horses
+    return selection.respond(horses)
+
+@router.get("/batch", response_model=HorseBatchResponse)
+async def get_horses_batch(
+    ids: List[int] = Query(..., description="Horse IDs, e.g. ?ids=1&ids=2 (max 100)"),
+    selection: FieldSelection = Depends(sparse_fields(HorseResponse)),
+    db: Session = Depends(get_db)
+):
+    """Get multiple horses in one request, in the requested order"""
+    horses, missing = fetch_by_ids(db, Horse, ids, selection.load_options(Horse))
+    return selection.respond_batch(horses, missing)
 
 @router.get("/{horse_id}", response_model=HorseResponse)
 async def get_horse(
     horse_id: int,
+    selection: FieldSelection = Depends(sparse_fields(HorseResponse)),
     db: Session = Depends(get_db)
 ):
     """Get specific horse by ID"""
-    horse = db.query(Horse).filter(Horse.id == horse_id).first()
+    horse = db.query(Horse).options(*selection.load_options(Horse)).filter(Horse.id == horse_id).first()
     if not horse:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Horse not found"
         )
-    return horse
+    return selection.respond(horse)
 
 @router.post("/", response_model=HorseResponse)
 async def create_horse(
@@ -85,6 +111,9 @@ async def update_horse(
     for field, value in horse_data.dict(exclude_unset=True).items():
         setattr(horse, field, value)
     
+    # Disciplines feed the listing prefilter
+    refresh_listing_features(db, horse_id=horse.id)
+    emit(db, "horse", horse.id)
     db.commit()
     db.refresh(horse)
     return horse
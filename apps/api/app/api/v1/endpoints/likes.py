@@ -1,13 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, literal, Integer
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
-from app.core.auth import get_current_user
-from app.models.user import User
+from app.core.database import get_db, dialect_insert
+from app.core.auth import get_current_user, require_role
+from app.models.user import User, UserRole
 from app.models.like import Like
 from app.models.listing import Listing
-from app.schemas.like import LikeResponse, LikeCreate
-from app.services.match_service import MatchService
+from app.models.owner_like import OwnerLike
+from app.models.horse import Horse
+from app.schemas.like import (
+    LikeResponse, LikeCreate, SwipeBatchCreate, SwipeBatchResponse,
+    OwnerLikeCreate, OwnerLikeResponse
+)
+from app.services.outbox import record_event
+from app.services.seen_store import SeenStore
 
 router = APIRouter(tags=["likes"])
 
@@ -44,15 +52,130 @@ async def create_like(
         listing_id=like_data.listing_id
     )
     db.add(like)
-    db.commit()
+    SeenStore(db).record(current_user.id, liked=[like_data.listing_id])
+    # Mutual-match detection picks this up from the outbox
+    record_event(db, "like.created", {"rider_id": current_user.id, "listing_id": like_data.listing_id})
+    try:
+        db.commit()
+    except IntegrityError:
+        # Concurrent duplicate swipe hit the unique constraint
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already liked this listing"
+        )
     db.refresh(like)
     
-    # Check for mutual match
-    match_service = MatchService(db)
-    mutual_match = match_service.create_mutual_match(current_user.id, like_data.listing_id)
-    
     return like
 
+@router.post("/batch", response_model=SwipeBatchResponse)
+async def create_likes_batch(
+    swipe_data: SwipeBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Record many like/skip decisions with a single write"""
+    like_ids = list(dict.fromkeys(d.listing_id for d in swipe_data.decisions if d.action == "like"))
+    skip_ids = list(dict.fromkeys(d.listing_id for d in swipe_data.decisions if d.action == "skip"))
+    
+    liked = []
+    if like_ids:
+        # One INSERT ... SELECT: only existing active listings, duplicates skipped
+        active_listings = select(literal(current_user.id, Integer), Listing.id).where(
+            Listing.id.in_(like_ids),
+            Listing.is_active == True
+        )
+        stmt = dialect_insert(db, Like).from_select(
+            ["from_user_id", "listing_id"], active_listings
+        ).on_conflict_do_nothing(
+            index_elements=["from_user_id", "listing_id"]
+        ).returning(Like.listing_id)
+        
+        liked = [listing_id for (listing_id,) in db.execute(stmt)]
+    
+    # Keep likes and skips out of the deck
+    SeenStore(db).record(current_user.id, liked=liked, skipped=skip_ids)
+    for listing_id in liked:
+        record_event(db, "like.created", {"rider_id": current_user.id, "listing_id": listing_id})
+    db.commit()
+    
+    liked_set = set(liked)
+    return SwipeBatchResponse(
+        liked=liked,
+        ignored=[listing_id for listing_id in like_ids if listing_id not in liked_set],
+        skipped=skip_ids
+    )
+
+@router.post("/riders", response_model=OwnerLikeResponse)
+async def create_owner_like(
+    like_data: OwnerLikeCreate,
+    current_user: User = Depends(require_role(UserRole.OWNER)),
+    db: Session = Depends(get_db)
+):
+    """Like a rider for one of your listings (owner side of a match)"""
+    listing = db.query(Listing).join(Horse).filter(
+        Listing.id == like_data.listing_id,
+        Horse.owner_id == current_user.id
+    ).first()
+    
+    if not listing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Listing not found or not owned by you"
+        )
+    
+    rider = db.query(User).filter(User.id == like_data.rider_id).first()
+    if not rider:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rider not found"
+        )
+    
+    owner_like = OwnerLike(
+        from_user_id=current_user.id,
+        rider_id=like_data.rider_id,
+        listing_id=like_data.listing_id
+    )
+    db.add(owner_like)
+    record_event(db, "owner_like.created", {
+        "owner_id": current_user.id,
+        "rider_id": like_data.rider_id,
+        "listing_id": like_data.listing_id
+    })
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already liked this rider for this listing"
+        )
+    db.refresh(owner_like)
+    
+    return owner_like
+
+@router.delete("/riders/{owner_like_id}")
+async def delete_owner_like(
+    owner_like_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Withdraw interest in a rider"""
+    owner_like = db.query(OwnerLike).filter(
+        OwnerLike.id == owner_like_id,
+        OwnerLike.from_user_id == current_user.id
+    ).first()
+    
+    if not owner_like:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Like not found"
+        )
+    
+    db.delete(owner_like)
+    db.commit()
+    return {"message": "Like removed successfully"}
+
 @router.get("/my", response_model=List[LikeResponse])
 async def get_my_likes(
     current_user: User = Depends(get_current_user),
@@ -81,5 +204,16 @@ async def delete_like(
         )
     
     db.delete(like)
+    SeenStore(db).forget_like(current_user.id, like.listing_id)
     db.commit()
     return {"message": "Like removed successfully"}
+
+@router.delete("/seen/skipped")
+async def reset_skipped_listings(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Bring skipped listings back into the deck"""
+    SeenStore(db).reset_skips(current_user.id)
+    db.commit()
+    return {"message": "Skipped listings reset successfully"}
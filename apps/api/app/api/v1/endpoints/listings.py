@@ -1,37 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.auth import get_current_user, require_role
+from app.core.fields import FieldSelection, sparse_fields
+from app.core.invalidation import emit
 from app.models.user import User, UserRole
 from app.models.listing import Listing
 from app.models.horse import Horse
-from app.schemas.listing import ListingResponse, ListingCreate, ListingUpdate
+from app.models.owner_profile import OwnerProfile
+from app.schemas.listing import ListingResponse, ListingSummary, ListingBatchResponse, ListingCreate, ListingUpdate
+from app.services.batch_service import fetch_by_ids
+from app.services.match_service import MatchService
+from app.services.outbox import record_event
+from app.schemas.matching import RiderCandidate
+from app.services.projections import listing_summary_options
+from app.services.retrieval import apply_listing_features
 
 router = APIRouter(tags=["listings"])
 
-@router.get("/", response_model=List[ListingResponse])
+@router.get("/", response_model=List[ListingSummary])
 async def get_listings(
     skip: int = 0,
     limit: int = 20,
+    selection: FieldSelection = Depends(sparse_fields(ListingSummary)),
     db: Session = Depends(get_db)
 ):
     """Get all active listings"""
-    listings = db.query(Listing).filter(
+    load_options = selection.load_options(Listing) or listing_summary_options()
+    listings = db.query(Listing).options(*load_options).filter(
         Listing.is_active == True
     ).offset(skip).limit(limit).all()
-    return listings
+    return selection.respond(listings)
 
-@router.get("/my", response_model=List[ListingResponse])
+@router.get("/my", response_model=List[ListingSummary])
 async def get_my_listings(
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(ListingSummary)),
     db: Session = Depends(get_db)
 ):
     """Get current user's listings"""
-    listings = db.query(Listing).join(Horse).filter(
+    load_options = selection.load_options(Listing) or listing_summary_options()
+    listings = db.query(Listing).options(*load_options).join(Horse).filter(
         Horse.owner_id == current_user.id
     ).all()
-    return listings
+    return selection.respond(listings)
+
+@router.get("/batch", response_model=ListingBatchResponse)
+async def get_listings_batch(
+    ids: List[int] = Query(..., description="Listing IDs, e.g. ?ids=1&ids=2 (max 100)"),
+    selection: FieldSelection = Depends(sparse_fields(ListingResponse)),
+    db: Session = Depends(get_db)
+):
+    """Get multiple listings in one request, in the requested order"""
+    listings, missing = fetch_by_ids(db, Listing, ids, selection.load_options(Listing))
+    return selection.respond_batch(listings, missing)
 
 @router.post("/", response_model=ListingResponse)
 async def create_listing(
@@ -53,24 +76,68 @@ async def create_listing(
         )
     
     listing = Listing(**listing_data.dict())
+    owner_profile = db.query(OwnerProfile).filter(OwnerProfile.user_id == current_user.id).first()
+    apply_listing_features(listing, horse, owner_profile)
     db.add(listing)
+    db.flush()
+    # Percolation picks this up from the outbox
+    record_event(db, "listing.saved", {"listing_id": listing.id})
     db.commit()
     db.refresh(listing)
+    
     return listing
 
 @router.get("/{listing_id}", response_model=ListingResponse)
 async def get_listing(
     listing_id: int,
+    selection: FieldSelection = Depends(sparse_fields(ListingResponse)),
     db: Session = Depends(get_db)
 ):
     """Get a specific listing"""
-    listing = db.query(Listing).filter(Listing.id == listing_id).first()
+    listing = db.query(Listing).options(*selection.load_options(Listing)).filter(Listing.id == listing_id).first()
     if not listing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Listing not found"
         )
-    return listing
+    return selection.respond(listing)
+
+@router.get("/{listing_id}/candidates", response_model=List[RiderCandidate])
+async def get_listing_candidates(
+    listing_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(require_role(UserRole.OWNER)),
+    db: Session = Depends(get_db)
+):
+    """Interested riders for one of your listings, best match first"""
+    listing = db.query(Listing).join(Horse).filter(
+        Listing.id == listing_id,
+        Horse.owner_id == current_user.id
+    ).first()
+    
+    if not listing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Listing not found or not owned by you"
+        )
+    
+    match_service = MatchService(db)
+    ranked = match_service.get_candidates_for_listing(listing, skip=skip, limit=limit)
+    
+    return [
+        RiderCandidate(
+            rider_id=rider.user_id,
+            first_name=rider.first_name,
+            last_name=rider.last_name,
+            postcode=rider.postcode,
+            experience_years=rider.experience_years,
+            discipline_preferences=rider.discipline_preferences,
+            photos=rider.photos,
+            match_score=score
+        )
+        for rider, score in ranked
+    ]
 
 @router.put("/{listing_id}", response_model=ListingResponse)
 async def update_listing(
@@ -94,8 +161,13 @@ async def update_listing(
     for field, value in listing_data.dict(exclude_unset=True).items():
         setattr(listing, field, value)
     
+    owner_profile = db.query(OwnerProfile).filter(OwnerProfile.user_id == listing.horse.owner_id).first()
+    apply_listing_features(listing, listing.horse, owner_profile)
+    record_event(db, "listing.saved", {"listing_id": listing.id})
+    emit(db, "listing", listing.id)
     db.commit()
     db.refresh(listing)
+    
     return listing
 
 @router.delete("/{listing_id}")
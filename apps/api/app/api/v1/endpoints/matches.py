@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.auth import get_current_user, require_role
+from app.core.fields import FieldSelection, sparse_fields
 from app.models.user import User, UserRole
 from app.models.mutual_match import MutualMatch
 from app.schemas.match import MutualMatchResponse, MatchResult
@@ -10,8 +11,9 @@ from app.services.match_service import MatchService
 
 router = APIRouter(tags=["matches"])
 
+# Sync handler: FastAPI runs it on the threadpool instead of the event loop
 @router.get("/discover", response_model=List[MatchResult])
-async def discover_matches(
+def discover_matches(
     limit: int = 20,
     current_user: User = Depends(require_role(UserRole.RIDER)),
     db: Session = Depends(get_db)
@@ -63,16 +65,18 @@ async def discover_matches(
 @router.get("/mutual", response_model=List[MutualMatchResponse])
 async def get_mutual_matches(
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(MutualMatchResponse)),
     db: Session = Depends(get_db)
 ):
     """Get current user's mutual matches"""
+    load_options = selection.load_options(MutualMatch)
     if current_user.role == UserRole.RIDER:
-        matches = db.query(MutualMatch).filter(
+        matches = db.query(MutualMatch).options(*load_options).filter(
             MutualMatch.rider_id == current_user.id
         ).all()
     else:
         # For owners, get matches where their listings are involved
-        matches = db.query(MutualMatch).join(
+        matches = db.query(MutualMatch).options(*load_options).join(
             MutualMatch.listing
         ).filter(
             MutualMatch.listing.has(horse_id__in=[
@@ -80,16 +84,21 @@ async def get_mutual_matches(
             ])
         ).all()
     
-    return matches
+    return selection.respond(matches)
 
 @router.get("/{match_id}", response_model=MutualMatchResponse)
 async def get_match(
     match_id: int,
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(MutualMatchResponse)),
     db: Session = Depends(get_db)
 ):
     """Get a specific mutual match"""
-    match = db.query(MutualMatch).filter(MutualMatch.id == match_id).first()
+    # rider_id / listing_id are always needed for the access check
+    load_options = selection.load_options(
+        MutualMatch, required=(MutualMatch.rider_id, MutualMatch.listing_id)
+    )
+    match = db.query(MutualMatch).options(*load_options).filter(MutualMatch.id == match_id).first()
     
     if not match:
         raise HTTPException(
@@ -105,4 +114,4 @@ async def get_match(
             detail="Access denied"
         )
     
-    return match
+    return selection.respond(match)
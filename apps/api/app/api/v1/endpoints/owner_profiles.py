@@ -3,9 +3,11 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.core.fields import FieldSelection, sparse_fields
 from app.models.user import User
 from app.models.owner_profile import OwnerProfile
 from app.schemas.owner_profile import OwnerProfileCreate, OwnerProfileUpdate, OwnerProfileResponse
+from app.services.retrieval import refresh_listing_features
 
 router = APIRouter()
 security = HTTPBearer()
@@ -25,6 +27,8 @@ async def create_owner_profile(
         for field, value in profile_data.dict(exclude_unset=True).items():
             setattr(existing_profile, field, value)
         
+        # Weekday availability feeds the listing prefilter
+        refresh_listing_features(db, owner_id=current_user.id)
         db.commit()
         db.refresh(existing_profile)
         return existing_profile
@@ -36,6 +40,8 @@ async def create_owner_profile(
         )
         
         db.add(profile)
+        db.flush()
+        refresh_listing_features(db, owner_id=current_user.id)
         db.commit()
         db.refresh(profile)
         return profile
@@ -43,10 +49,13 @@ async def create_owner_profile(
 @router.get("/", response_model=OwnerProfileResponse)
 async def get_owner_profile(
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(OwnerProfileResponse)),
     db: Session = Depends(get_db)
 ):
     """Get current user's owner profile"""
-    profile = db.query(OwnerProfile).filter(OwnerProfile.user_id == current_user.id).first()
+    profile = db.query(OwnerProfile).options(*selection.load_options(OwnerProfile)).filter(
+        OwnerProfile.user_id == current_user.id
+    ).first()
     
     if not profile:
         raise HTTPException(
@@ -54,7 +63,7 @@ async def get_owner_profile(
             detail="Owner profile not found"
         )
     
-    return profile
+    return selection.respond(profile)
 
 @router.patch("/", response_model=OwnerProfileResponse)
 async def update_owner_profile(
@@ -75,6 +84,8 @@ async def update_owner_profile(
     for field, value in profile_data.dict(exclude_unset=True).items():
         setattr(profile, field, value)
     
+    # Weekday availability feeds the listing prefilter
+    refresh_listing_features(db, owner_id=current_user.id)
     db.commit()
     db.refresh(profile)
     return profile
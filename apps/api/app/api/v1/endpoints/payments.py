@@ -31,7 +31,7 @@ async def create_payment_intent(
     """Create payment intent for chat unlock"""
     try:
         stripe_service = StripeService(db)
-        result = stripe_service.create_chat_unlock_payment_intent(
+        result = await stripe_service.create_chat_unlock_payment_intent(
             user_id=current_user.id,
             match_id=payment_data.match_id,
             amount_cents=payment_data.amount_cents
@@ -52,7 +52,7 @@ async def confirm_payment(
     """Confirm payment and unlock chat"""
     try:
         stripe_service = StripeService(db)
-        match = stripe_service.confirm_chat_unlock_payment(
+        match = await stripe_service.confirm_chat_unlock_payment(
             payment_data.payment_intent_id
         )
         return {
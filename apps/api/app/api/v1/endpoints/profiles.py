@@ -2,11 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.core.fields import FieldSelection, sparse_fields
 from app.models.user import User
 from app.models.rider_profile import RiderProfile
 from app.models.owner_profile import OwnerProfile
 from app.schemas.rider_profile import RiderProfileResponse, RiderProfileCreate, RiderProfileUpdate
 from app.schemas.owner_profile import OwnerProfileResponse, OwnerProfileCreate, OwnerProfileUpdate
+from app.core.invalidation import emit
+from app.services.percolator import percolator
+from app.services.retrieval import refresh_listing_features
 
 router = APIRouter(tags=["profiles"])
 
@@ -14,16 +18,19 @@ router = APIRouter(tags=["profiles"])
 @router.get("/rider", response_model=RiderProfileResponse)
 async def get_rider_profile(
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(RiderProfileResponse)),
     db: Session = Depends(get_db)
 ):
     """Get current user's rider profile"""
-    profile = db.query(RiderProfile).filter(RiderProfile.user_id == current_user.id).first()
+    profile = db.query(RiderProfile).options(*selection.load_options(RiderProfile)).filter(
+        RiderProfile.user_id == current_user.id
+    ).first()
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Rider profile not found"
         )
-    return profile
+    return selection.respond(profile)
 
 @router.post("/rider", response_model=RiderProfileResponse)
 async def create_rider_profile(
@@ -39,16 +46,20 @@ async def create_rider_profile(
         # Update existing profile
         for field, value in profile_data.dict(exclude_unset=True).items():
             setattr(existing_profile, field, value)
+        emit(db, "rider", current_user.id)
         db.commit()
         db.refresh(existing_profile)
+        percolator.upsert(existing_profile)
         return existing_profile
     else:
         # Create new profile
         profile_dict = profile_data.dict(exclude_unset=True)
         profile = RiderProfile(user_id=current_user.id, **profile_dict)
         db.add(profile)
+        emit(db, "rider", current_user.id)
         db.commit()
         db.refresh(profile)
+        percolator.upsert(profile)
         return profile
 
 @router.put("/rider", response_model=RiderProfileResponse)
@@ -70,24 +81,29 @@ async def update_rider_profile(
         for field, value in profile_data.dict(exclude_unset=True).items():
             setattr(profile, field, value)
     
+    emit(db, "rider", current_user.id)
     db.commit()
     db.refresh(profile)
+    percolator.upsert(profile)
     return profile
 
 # Owner Profile endpoints
 @router.get("/owner", response_model=OwnerProfileResponse)
 async def get_owner_profile(
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(OwnerProfileResponse)),
     db: Session = Depends(get_db)
 ):
     """Get current user's owner profile"""
-    profile = db.query(OwnerProfile).filter(OwnerProfile.user_id == current_user.id).first()
+    profile = db.query(OwnerProfile).options(*selection.load_options(OwnerProfile)).filter(
+        OwnerProfile.user_id == current_user.id
+    ).first()
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Owner profile not found"
         )
-    return profile
+    return selection.respond(profile)
 
 @router.put("/owner", response_model=OwnerProfileResponse)
 async def update_owner_profile(
@@ -108,6 +124,9 @@ async def update_owner_profile(
         for field, value in profile_data.dict(exclude_unset=True).items():
             setattr(profile, field, value)
     
+    # Weekday availability feeds the listing prefilter
+    db.flush()
+    refresh_listing_features(db, owner_id=current_user.id)
     db.commit()
     db.refresh(profile)
     return profile
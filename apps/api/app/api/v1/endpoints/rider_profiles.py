@@ -3,9 +3,12 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.core.fields import FieldSelection, sparse_fields
 from app.models.user import User
 from app.models.rider_profile import RiderProfile
 from app.schemas.rider_profile import RiderProfileCreate, RiderProfileUpdate, RiderProfileResponse
+from app.core.invalidation import emit
+from app.services.percolator import percolator
 
 router = APIRouter()
 security = HTTPBearer()
@@ -54,8 +57,10 @@ async def create_rider_profile(
         for field, value in profile_dict.items():
             setattr(existing_profile, field, value)
         
+        emit(db, "rider", current_user.id)
         db.commit()
         db.refresh(existing_profile)
+        percolator.upsert(existing_profile)
         return existing_profile
     else:
         # Create new profile
@@ -65,18 +70,25 @@ async def create_rider_profile(
         )
         
         db.add(profile)
+        emit(db, "rider", current_user.id)
         db.commit()
         db.refresh(profile)
+        percolator.upsert(profile)
         return profile
 
 @router.get("/", response_model=RiderProfileResponse)
 async def get_rider_profile(
     current_user: User = Depends(get_current_user),
+    selection: FieldSelection = Depends(sparse_fields(RiderProfileResponse)),
     db: Session = Depends(get_db)
 ):
     """Get current user's rider profile"""
     print(f"🔍 Getting rider profile for user_id: {current_user.id}")
-    profile = db.query(RiderProfile).filter(RiderProfile.user_id == current_user.id).first()
+    # first/last name are always loaded for the log line below
+    load_options = selection.load_options(
+        RiderProfile, required=(RiderProfile.first_name, RiderProfile.last_name)
+    )
+    profile = db.query(RiderProfile).options(*load_options).filter(RiderProfile.user_id == current_user.id).first()
     
     if not profile:
         print(f"❌ No rider profile found for user_id: {current_user.id}")
@@ -86,7 +98,7 @@ async def get_rider_profile(
         )
     
     print(f"✅ Found rider profile: {profile.first_name} {profile.last_name}")
-    return profile
+    return selection.respond(profile)
 
 @router.get("/debug/{user_id}")
 async def debug_get_rider_profile(
@@ -129,8 +141,10 @@ async def update_rider_profile(
     for field, value in profile_data.dict(exclude_unset=True).items():
         setattr(profile, field, value)
     
+    emit(db, "rider", current_user.id)
     db.commit()
     db.refresh(profile)
+    percolator.upsert(profile)
     return profile
 
 @router.delete("/")
@@ -148,5 +162,7 @@ async def delete_rider_profile(
         )
     
     db.delete(profile)
+    emit(db, "rider", current_user.id)
     db.commit()
+    percolator.remove(current_user.id)
     return {"message": "Rider profile deleted successfully"}
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from app.core.database import get_db
+from app.schemas.search import SearchSuggestResponse, SearchSuggestion
+from app.services.search_service import suggest, SUGGEST_COLUMNS
+
+router = APIRouter(tags=["search"])
+
+@router.get("/suggest", response_model=SearchSuggestResponse)
+async def suggest_search_terms(
+    q: str = Query(..., min_length=2, max_length=100),
+    kind: Optional[Literal["city", "horse", "breed", "stable"]] = None,
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(get_db)
+):
+    """Autocomplete cities, horse names, breeds and stable names by prefix"""
+    kinds = [kind] if kind else list(SUGGEST_COLUMNS)
+
+    suggestions = []
+    for suggestion_kind in kinds:
+        for value, score in suggest(db, suggestion_kind, q, limit=limit):
+            suggestions.append(SearchSuggestion(value=value, kind=suggestion_kind, score=score))
+
+    # Best matches first across all kinds
+    suggestions.sort(key=lambda s: s.score, reverse=True)
+    return SearchSuggestResponse(query=q, suggestions=suggestions[:limit])
@@ -6,6 +6,7 @@ from app.core.auth import get_current_user, require_role, UserRole
 from app.models.user import User
 from app.models.stable import Stable
 from app.schemas.stable import StableResponse, StableCreate, StableUpdate
+from app.services.search_service import SearchQueryBuilder
 
 router = APIRouter()
 
@@ -13,14 +14,16 @@ router = APIRouter()
 async def get_stables(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    q: Optional[str] = Query(None, max_length=100),
     city: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get list of stables"""
     query = db.query(Stable).filter(Stable.is_active == True)
     
-    if city:
-        query = query.filter(Stable.city.ilike(f"%{city}%"))
+    # Trigram-indexed text search, ranked by similarity
+    search = SearchQueryBuilder(query).contains(Stable.city, city).matches_any([Stable.name], q)
+    query = search.build()
     
     stables = query.offset(skip).limit(limit).all()
     return stables
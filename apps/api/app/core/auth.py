@@ -2,15 +2,78 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+import asyncio
 import httpx
+import time
 from typing import Optional
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.http import UpstreamUnavailable, kinde
+from app.core.metrics import metrics
 from app.models.user import User, UserRole
 
 security = HTTPBearer()
 
+# An unknown kid refetches the keys at most this often (rotation, not abuse)
+JWKS_MIN_REFRESH_SECONDS = 60
+
+_jwks: Optional[dict] = None
+_jwks_fetched_at = 0.0
+_jwks_lock = asyncio.Lock()
+
+async def get_jwks(force_refresh: bool = False) -> dict:
+    """Kinde's signing keys, cached; the last copy is served while Kinde is down"""
+    global _jwks, _jwks_fetched_at
+    max_age = JWKS_MIN_REFRESH_SECONDS if force_refresh else settings.KINDE_JWKS_CACHE_SECONDS
+    if _jwks and time.monotonic() - _jwks_fetched_at < max_age:
+        return _jwks
+    
+    async with _jwks_lock:
+        # Another request may have refreshed the keys while we waited
+        if _jwks and time.monotonic() - _jwks_fetched_at < max_age:
+            return _jwks
+        try:
+            response = await kinde.get("/.well-known/jwks.json")
+            response.raise_for_status()
+            jwks = response.json()
+            if not jwks.get("keys"):
+                raise ValueError("JWKS has no keys")
+        except (UpstreamUnavailable, httpx.HTTPStatusError, ValueError) as e:
+            if _jwks:
+                metrics.inc("kinde_jwks_stale_total")
+                print(f"DEBUG: Kinde JWKS unavailable, using cached keys: {e}")
+                return _jwks
+            print(f"ERROR: Kinde JWKS unavailable and nothing cached: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service unavailable"
+            )
+        
+        _jwks = jwks
+        _jwks_fetched_at = time.monotonic()
+        print(f"DEBUG: Fetched {len(jwks['keys'])} Kinde JWKS keys")
+        return _jwks
+
+async def fetch_userinfo_email(token: str) -> Optional[str]:
+    """Email from Kinde's UserInfo API; None when Kinde is slow or unavailable"""
+    try:
+        response = await kinde.get(
+            "/oauth2/user_profile",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        return response.json().get("email")
+    except (UpstreamUnavailable, httpx.HTTPStatusError, ValueError) as e:
+        print(f"DEBUG: UserInfo lookup failed: {e}")
+        return None
+
+def _find_key(jwks: dict, kid: str) -> Optional[dict]:
+    for jwk in jwks["keys"]:
+        if jwk["kid"] == kid:
+            return jwk
+    return None
+
 async def verify_kinde_token(token: str) -> dict:
     """Verify Kinde JWT token"""
     print(f"DEBUG: Verifying token with domain: {settings.KINDE_DOMAIN}")
@@ -18,25 +81,14 @@ async def verify_kinde_token(token: str) -> dict:
     print(f"DEBUG: Token preview: {token[:50]}...")
     
     try:
-        # Get Kinde public keys
-        jwks_url = f"https://{settings.KINDE_DOMAIN}/.well-known/jwks.json"
-        print(f"DEBUG: Fetching JWKS from: {jwks_url}")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(jwks_url)
-            print(f"DEBUG: JWKS response status: {response.status_code}")
-            jwks = response.json()
-            print(f"DEBUG: JWKS keys count: {len(jwks.get('keys', []))}")
-        
         # Decode and verify token
         header = jwt.get_unverified_header(token)
         print(f"DEBUG: Token header: {header}")
         
-        key = None
-        for jwk in jwks["keys"]:
-            if jwk["kid"] == header["kid"]:
-                key = jwk
-                break
+        key = _find_key(await get_jwks(), header["kid"])
+        if not key:
+            # Kinde may have rotated its keys since they were cached
+            key = _find_key(await get_jwks(force_refresh=True), header["kid"])
         
         if not key:
             print(f"DEBUG: No matching key found for kid: {header['kid']}")
@@ -78,6 +130,8 @@ async def verify_kinde_token(token: str) -> dict:
         
         print(f"DEBUG: Token payload: {payload}")
         return payload
+    except HTTPException:
+        raise
     except JWTError as e:
         print(f"DEBUG: JWT Error: {str(e)}")
         raise HTTPException(
@@ -116,32 +170,19 @@ async def get_current_user(
     
     user = db.query(User).filter(User.sub == user_sub).first()
     if user is None:
+        # Get user info from Kinde token, else from the UserInfo API
+        email = payload.get("email")
+        if not email:
+            email = await fetch_userinfo_email(token)
+        
         # Auto-create user from Kinde token on first login
         try:
-            # Get user info from Kinde token
-            email = payload.get("email")
-            
-            # If no email in token, try to get it from Kinde UserInfo API
-            if not email:
-                try:
-                    import httpx
-                    userinfo_response = httpx.get(
-                        f"https://{settings.KINDE_DOMAIN}/oauth2/user_profile",
-                        headers={"Authorization": f"Bearer {token}"}
-                    )
-                    if userinfo_response.status_code == 200:
-                        userinfo = userinfo_response.json()
-                        email = userinfo.get("email")
-                        print(f"DEBUG: Got email from UserInfo API: {email}")
-                except Exception as e:
-                    print(f"DEBUG: Failed to get email from UserInfo API: {e}")
-            
-            # Final fallback to temp email
+            # Placeholder when Kinde didn't give us an email
             if not email:
                 email = f"{user_sub}@temp.com"
                 print(f"DEBUG: Using fallback email: {email}")
             else:
-                print(f"DEBUG: Using email from token/API: {email}")
+                print(f"DEBUG: Using email from Kinde: {email}")
             
             # Create new user with default role
             user = User(
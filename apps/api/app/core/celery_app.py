@@ -0,0 +1,38 @@
+"""Celery app for scheduled and background jobs.
+
+    celery -A app.core.celery_app worker --loglevel=info
+    celery -A app.core.celery_app beat --loglevel=info
+"""
+from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
+from app.tasks import JOB_MODULES
+
+celery_app = Celery(
+    "horsesharing",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+    include=JOB_MODULES
+)
+
+celery_app.conf.update(
+    timezone="Europe/Amsterdam",
+    task_acks_late=True,
+    task_ignore_result=True,
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        "nightly-batch-matching": {
+            "task": "matching.run_batch",
+            "schedule": crontab(hour=settings.BATCH_MATCHING_HOUR, minute=0),
+        },
+        "daily-outbox-purge": {
+            "task": "outbox.purge",
+            "schedule": crontab(hour=4, minute=30),
+        },
+        "hourly-idempotency-purge": {
+            "task": "idempotency.purge",
+            "schedule": crontab(minute=15),
+        },
+    },
+)
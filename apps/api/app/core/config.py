@@ -24,11 +24,18 @@ class Settings(BaseSettings):
     KINDE_CLIENT_ID: str = ""
     KINDE_CLIENT_SECRET: str = ""
     KINDE_AUDIENCE: str = ""
+    KINDE_BASE_URL: str = ""  # overrides https://{KINDE_DOMAIN}, e.g. a local stub server
+    KINDE_TIMEOUT_SECONDS: float = 3.0
+    KINDE_JWKS_CACHE_SECONDS: int = 60 * 60  # stale keys are still served while Kinde is unavailable
     
     # Stripe
     STRIPE_PUBLISHABLE_KEY: str = ""
     STRIPE_SECRET_KEY: str = ""
     STRIPE_WEBHOOK_SECRET: str = ""
+    STRIPE_API_BASE: str = ""  # e.g. http://localhost:12111 for stripe-mock
+    STRIPE_TIMEOUT_SECONDS: float = 10.0
+    STRIPE_MAX_NETWORK_RETRIES: int = 2
+    STRIPE_MAX_CONCURRENCY: int = 8  # SDK calls in flight per worker
     
     # CORS
     ALLOWED_ORIGINS: List[str] = [
@@ -38,6 +45,44 @@ class Settings(BaseSettings):
         "https://www.horsesharing.nl"
     ]
     
+    # Matching
+    SEEN_SKIP_TTL_DAYS: int = 30  # skipped listings return to the deck after this
+    MATCH_POOL_SIZE: int = 500  # listings fetched by the SQL prefilter before full scoring
+    MARKET_SNAPSHOT_ENABLED: bool = True  # serve discover from the in-process market snapshot
+    MARKET_SNAPSHOT_POLL_SECONDS: int = 10
+    MARKET_SNAPSHOT_SHARED: bool = True  # one builder per node, workers map the snapshot file
+    MARKET_SNAPSHOT_PATH: str = ""  # defaults to /dev/shm/horsesharing-market.snapshot
+    SCORING_PROCESSES: int = 2  # scoring pool size per API worker, 0 = always score inline
+    SCORING_OFFLOAD_THRESHOLD: int = 256  # smaller candidate sets are scored inline
+    
+    # Batch matching
+    MATCH_SUGGESTIONS_K: int = 10  # suggestions stored per rider per nightly run
+    BATCH_MATCHING_RIDER_TILE: int = 256
+    BATCH_MATCHING_LISTING_TILE: int = 4096
+    BATCH_MATCHING_HOUR: int = 3  # local time the nightly run starts
+    
+    # Outbox
+    OUTBOX_RELAY_ENABLED: bool = True  # relay pending events from every API process
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_RETENTION_DAYS: int = 7  # delivered events are purged after this
+    
+    # Cache invalidation
+    INVALIDATION_BACKEND: str = "postgres"  # "loopback" for tests (in process only)
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    INVALIDATION_RECONNECT_SECONDS: int = 5
+    
+    # Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60  # stored responses are replayed for this long
+    IDEMPOTENCY_LOCK_SECONDS: int = 120  # claim of a request that never finished; raised to cover outbound timeouts
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # a concurrent duplicate waits this long, then gets 409
+    
+    # Outbound HTTP
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures before an upstream's circuit opens
+    CIRCUIT_RESET_SECONDS: float = 30.0  # calls are refused this long before a probe is let through
+    
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_FILE_TYPES: List[str] = ["image/jpeg", "image/png", "image/webp"]
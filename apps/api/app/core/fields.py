@@ -0,0 +1,91 @@
+"""Sparse fieldsets (`?fields=a,b,c`) for large responses.
+
+Endpoints declare a `FieldSelection` dependency for their response schema.
+The selection narrows the SQL projection with `load_only` and serializes
+only the requested fields; without `fields=` both are no-ops and the
+endpoint returns its full response model as before.
+"""
+from typing import Iterable, List, Optional, Type
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+# Identity fields that are always returned when present in the schema
+ALWAYS_INCLUDED = ("id", "user_id")
+
+
+class FieldSelection:
+    def __init__(self, schema: Type[BaseModel], fields: Optional[List[str]] = None):
+        self.schema = schema
+        self.fields = fields
+
+    @property
+    def is_sparse(self) -> bool:
+        return self.fields is not None
+
+    def load_options(self, model, required: Iterable = ()):
+        """Loader options restricting the query to the selected columns.
+
+        `required` lists extra column attributes the endpoint itself reads
+        (e.g. for authorization checks) on top of the requested fields.
+        """
+        if not self.is_sparse:
+            return ()
+
+        columns = inspect(model).column_attrs
+        selected = [getattr(model, field) for field in self.fields if field in columns]
+        selected.extend(required)
+        return (load_only(*selected),) if selected else ()
+
+    def project(self, obj) -> dict:
+        return {field: getattr(obj, field, None) for field in self.fields}
+
+    def respond(self, data):
+        """Return `data` unchanged, or a JSON response with only the selected fields"""
+        if not self.is_sparse:
+            return data
+
+        if isinstance(data, list):
+            content = [self.project(item) for item in data]
+        else:
+            content = self.project(data)
+        return JSONResponse(content=jsonable_encoder(content))
+
+    def respond_batch(self, items: list, missing: List[int]):
+        """Batch variant of `respond`: `{"items": [...], "missing": [...]}`"""
+        if not self.is_sparse:
+            return {"items": items, "missing": missing}
+
+        content = {"items": [self.project(item) for item in items], "missing": missing}
+        return JSONResponse(content=jsonable_encoder(content))
+
+
+def sparse_fields(schema: Type[BaseModel]):
+    """Dependency factory parsing and validating `?fields=` against a schema"""
+    schema_fields = list(schema.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Comma-separated subset of: {', '.join(schema_fields)}"
+        )
+    ) -> FieldSelection:
+        if not fields:
+            return FieldSelection(schema)
+
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested.difference(schema_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+
+        requested.update(field for field in ALWAYS_INCLUDED if field in schema_fields)
+        # Keep the schema's field order for a stable payload
+        return FieldSelection(schema, [field for field in schema_fields if field in requested])
+
+    return dependency
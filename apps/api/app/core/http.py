@@ -0,0 +1,163 @@
+"""Outbound HTTP: one pooled client, per-upstream timeouts and circuit breakers.
+
+Calls to third parties go through a named upstream rather than ad-hoc clients:
+
+    response = await kinde.get("/.well-known/jwks.json")
+
+Requests share one keep-alive `httpx.AsyncClient`, opened and closed with
+the app (`open_clients`/`close_clients`). Each upstream has its own timeout
+budget, so a slow provider can't hold requests for longer than that.
+
+Each upstream also has a `CircuitBreaker`. After `CIRCUIT_FAILURE_THRESHOLD`
+consecutive failures (timeouts, connection errors, 5xx), calls are refused
+straight away with `CircuitOpen` for `CIRCUIT_RESET_SECONDS`. After that a
+single probe is let through, and if it succeeds the circuit closes. Callers
+catch `UpstreamUnavailable` and fall back to cached data where they have it.
+
+Base URLs come from settings (`KINDE_BASE_URL`), so tests can point an
+upstream at a local stub server. Latency and errors per upstream are exported
+as `upstream_request_seconds`, `upstream_errors_total` and
+`upstream_circuit_open`.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream could not be reached or timed out"""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """The upstream is failing; the call was refused without trying it"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            reset = settings.CIRCUIT_RESET_SECONDS
+            probing = self._probe_started_at is not None and now - self._probe_started_at < reset
+            if now - self._opened_at < reset or probing:
+                metrics.inc("upstream_short_circuited_total", upstream=self.name)
+                return False
+            # Half open: one probe decides whether the circuit closes
+            self._probe_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"DEBUG: Circuit for {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started_at = None
+            metrics.set("upstream_circuit_open", 0, upstream=self.name)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_started_at is None and self._failures < settings.CIRCUIT_FAILURE_THRESHOLD:
+                return
+            if self._opened_at is None:
+                print(f"ERROR: Circuit for {self.name} opened after {self._failures} failures")
+            self._opened_at = time.monotonic()
+            self._probe_started_at = None
+            metrics.set("upstream_circuit_open", 1, upstream=self.name)
+
+
+# Shared clients
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+    )
+
+
+async def open_clients() -> None:
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(limits=_limits())
+
+
+async def close_clients() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        # Outside the app lifespan (scripts)
+        _async_client = httpx.AsyncClient(limits=_limits())
+    return _async_client
+
+
+# Upstreams
+
+class Upstream:
+    def __init__(self, name: str, base_url: Callable[[], str], timeout: Callable[[], float]):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name)
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        self._check_circuit()
+        started = time.perf_counter()
+        try:
+            response = await async_client().request(method, self.base_url() + path, timeout=self.timeout(), **kwargs)
+        except httpx.TransportError as e:
+            raise self._failed(e, started) from e
+        return self._completed(response, started)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    def _check_circuit(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name} is unavailable")
+
+    def _completed(self, response: httpx.Response, started: float) -> httpx.Response:
+        metrics.observe("upstream_request_seconds", time.perf_counter() - started, upstream=self.name)
+        if response.status_code >= 500:
+            metrics.inc("upstream_errors_total", upstream=self.name, kind="status")
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _failed(self, error: httpx.TransportError, started: float) -> UpstreamUnavailable:
+        metrics.observe("upstream_request_seconds", time.perf_counter() - started, upstream=self.name)
+        kind = "timeout" if isinstance(error, httpx.TimeoutException) else "transport"
+        metrics.inc("upstream_errors_total", upstream=self.name, kind=kind)
+        self.breaker.record_failure()
+        return UpstreamUnavailable(f"{self.name} request failed: {error!r}")
+
+
+def _kinde_base_url() -> str:
+    return settings.KINDE_BASE_URL or f"https://{settings.KINDE_DOMAIN}"
+
+
+kinde = Upstream("kinde", _kinde_base_url, lambda: settings.KINDE_TIMEOUT_SECONDS)
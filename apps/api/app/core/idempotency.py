@@ -0,0 +1,286 @@
+"""Idempotency-Key support for mutating requests.
+
+A client sends the same `Idempotency-Key` header on every retry of a POST,
+PUT, PATCH or DELETE. The first request claims the key by inserting an
+`idempotency_keys` row and runs as usual. Its status and body are then
+stored against the key for `IDEMPOTENCY_TTL_SECONDS`. A retry gets the
+stored response back (marked `Idempotent-Replayed: true`) without running
+the endpoint again.
+
+A duplicate that arrives while the first request is still running waits
+for it to finish, for up to `IDEMPOTENCY_WAIT_SECONDS`, and gets 409 if it
+doesn't. Waiters re-check with exponential backoff (up to once a second),
+so a burst of retries doesn't turn into a burst of queries. Only one copy
+ever executes. If a worker dies mid-request, its claim expires after
+`lock_seconds()`. That is at least `IDEMPOTENCY_LOCK_SECONDS`, and always
+longer than the slowest outbound call a handler can make, so a slow
+request is never taken over by its own duplicate.
+
+Keys are scoped to the caller by a hash of the verified token's `sub`
+claim, so one user can never be served another user's response, and a
+retry after a token refresh still finds the stored one. Requests without
+a valid token pass straight through to the endpoint (which rejects them)
+without claiming anything. Reusing a key for a different request (method,
+path, query or body) gets 422. Server errors are not stored, so retrying
+after a 5xx runs the request again.
+"""
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import verify_kinde_token
+from app.core.config import settings
+from app.core.database import SessionLocal, dialect_insert
+from app.core.metrics import metrics
+from app.models.idempotency_key import IdempotencyKey
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+WAIT_POLL_SECONDS = 0.05  # first re-check, doubling up to WAIT_POLL_MAX_SECONDS
+WAIT_POLL_MAX_SECONDS = 1.0
+# Headroom over the outbound budget for the handler's own DB work
+LOCK_MARGIN_SECONDS = 30
+# Upper bound of the Stripe SDK's sleep between network retries
+STRIPE_RETRY_DELAY_SECONDS = 2
+
+
+def lock_seconds() -> float:
+    """How long a claim holds before another request may take it over"""
+    stripe_budget = (
+        settings.STRIPE_TIMEOUT_SECONDS * (settings.STRIPE_MAX_NETWORK_RETRIES + 1)
+        + STRIPE_RETRY_DELAY_SECONDS * settings.STRIPE_MAX_NETWORK_RETRIES
+    )
+    # A request may authenticate against Kinde before calling Stripe
+    slowest_handler = settings.KINDE_TIMEOUT_SECONDS * 2 + stripe_budget
+    return max(settings.IDEMPOTENCY_LOCK_SECONDS, slowest_handler + LOCK_MARGIN_SECONDS)
+
+
+class StoredKey(NamedTuple):
+    request_hash: str
+    status_code: Optional[int]  # None while the first request is running
+    response_body: Optional[bytes]
+    content_type: Optional[str]
+
+
+def claim(owner_hash: str, key: str, request_hash: str) -> Optional[StoredKey]:
+    """Claim `key` for this request; returns the existing entry if already claimed"""
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        # An expired response or abandoned claim frees the key
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.owner_hash == owner_hash,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at < now
+        ))
+        stmt = dialect_insert(db, IdempotencyKey).values(
+            owner_hash=owner_hash,
+            key=key,
+            request_hash=request_hash,
+            expires_at=now + timedelta(seconds=lock_seconds())
+        ).on_conflict_do_nothing(index_elements=["owner_hash", "key"]).returning(IdempotencyKey.key)
+        if db.execute(stmt).scalar() is not None:
+            db.commit()
+            return None
+
+        existing = db.query(IdempotencyKey).filter(
+            IdempotencyKey.owner_hash == owner_hash,
+            IdempotencyKey.key == key
+        ).first()
+        db.commit()
+        if existing is None:
+            # Released between our insert and read: treat as in progress, the caller claims again
+            return StoredKey(request_hash, None, None, None)
+        return StoredKey(existing.request_hash, existing.status_code, existing.response_body, existing.content_type)
+    finally:
+        db.close()
+
+
+def complete(owner_hash: str, key: str, status_code: int, body: bytes, content_type: Optional[str]) -> None:
+    """Store the response of the request holding the claim"""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.owner_hash == owner_hash,
+            IdempotencyKey.key == key
+        ).update({
+            IdempotencyKey.status_code: status_code,
+            IdempotencyKey.response_body: body,
+            IdempotencyKey.content_type: content_type,
+            IdempotencyKey.expires_at: datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def release(owner_hash: str, key: str) -> None:
+    """Drop the claim so a retry runs the request again"""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.owner_hash == owner_hash,
+            IdempotencyKey.key == key
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def purge_expired(db: Session) -> int:
+    """Delete stored responses and claims past their expiry"""
+    result = db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.expires_at < datetime.now(timezone.utc)
+    ))
+    db.commit()
+    return result.rowcount
+
+
+class IdempotencyMiddleware:
+    """Replay stored responses for repeated Idempotency-Key requests"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            response = _error(status.HTTP_400_BAD_REQUEST, "Idempotency-Key is too long")
+            await response(scope, receive, send)
+            return
+
+        sub = await _verified_sub(headers.get("authorization"))
+        if sub is None:
+            # Unauthenticated: the endpoint's own auth answers, nothing is stored
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        owner_hash = hashlib.sha256(sub.encode()).hexdigest()
+        request_hash = hashlib.sha256(b"\n".join([
+            scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body
+        ])).hexdigest()
+
+        response = await self._claim_or_wait(owner_hash, key, request_hash)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        metrics.inc("idempotent_requests_total", outcome="executed")
+        await self._run_and_store(scope, _replay_body(body, receive), send, owner_hash, key)
+
+    async def _claim_or_wait(self, owner_hash: str, key: str, request_hash: str) -> Optional[Response]:
+        """None once this request holds the claim, otherwise the response to send"""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = WAIT_POLL_SECONDS
+        while True:
+            stored = await asyncio.to_thread(claim, owner_hash, key, request_hash)
+            if stored is None:
+                return None
+            if stored.request_hash != request_hash:
+                metrics.inc("idempotent_requests_total", outcome="mismatch")
+                return _error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    "Idempotency-Key was already used for a different request"
+                )
+            if stored.status_code is not None:
+                metrics.inc("idempotent_requests_total", outcome="replayed")
+                return Response(
+                    content=stored.response_body or b"",
+                    status_code=stored.status_code,
+                    media_type=stored.content_type,
+                    headers={"Idempotent-Replayed": "true"}
+                )
+            if time.monotonic() >= deadline:
+                metrics.inc("idempotent_requests_total", outcome="conflict")
+                return _error(status.HTTP_409_CONFLICT, "A request with this Idempotency-Key is still in progress")
+            await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, WAIT_POLL_MAX_SECONDS)
+
+    async def _run_and_store(self, scope: Scope, receive: Receive, send: Send, owner_hash: str, key: str) -> None:
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        content_type: Optional[str] = None
+        chunks = []
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_capture)
+        except Exception:
+            await asyncio.to_thread(release, owner_hash, key)
+            raise
+
+        try:
+            if status_code >= 500:
+                await asyncio.to_thread(release, owner_hash, key)
+            else:
+                await asyncio.to_thread(complete, owner_hash, key, status_code, b"".join(chunks), content_type)
+        except Exception as e:
+            # The response is already sent; the claim expires on its own
+            print(f"ERROR: Storing idempotent response for key {key} failed: {e}")
+
+
+async def _verified_sub(authorization: Optional[str]) -> Optional[str]:
+    """The `sub` claim of a valid bearer token, None otherwise"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = await verify_kinde_token(token)
+    except HTTPException:
+        return None
+    return payload.get("sub")
+
+
+def _error(status_code: int, detail: str) -> Response:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """Hand the already-read body to the app, then defer to the real channel"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
@@ -0,0 +1,157 @@
+"""Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+A writer calls `emit(db, "listing", listing.id)` before committing. The
+notification joins the writer's transaction, so other workers hear about
+the change only once it is visible to them, and never for a rollback.
+Every worker (the writer included) runs `listen_invalidations()`, which
+receives the notifications and calls the handlers registered for the
+entity type:
+
+    @on_invalidate("rider")
+    def evict_rider(entity_id, version): ...
+
+Payloads are compact `entity:id:version` strings. The version is the write
+time in milliseconds, and the gap to the receive time is exported as
+`invalidation_lag_seconds`. Notifications sent while a listener was
+disconnected are lost, so after a reconnect every handler is called once
+with `entity_id=None`, meaning "drop everything of this type".
+
+`INVALIDATION_BACKEND=loopback` (used automatically when the database isn't
+PostgreSQL) dispatches in process after the writer's commit, for tests.
+"""
+import asyncio
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import metrics
+
+Handler = Callable[[Optional[int], Optional[int]], None]
+
+handlers: Dict[str, List[Handler]] = {}
+
+
+def on_invalidate(entity: str):
+    """Register a handler for changes to an entity type"""
+    def register(fn: Handler) -> Handler:
+        handlers.setdefault(entity, []).append(fn)
+        return fn
+    return register
+
+
+def backend() -> str:
+    if engine.dialect.name != "postgresql":
+        return "loopback"
+    return settings.INVALIDATION_BACKEND
+
+
+def encode(entity: str, entity_id: int, version: int) -> str:
+    return f"{entity}:{entity_id}:{version}"
+
+
+def decode(payload: str) -> Tuple[str, int, int]:
+    entity, entity_id, version = payload.split(":")
+    return entity, int(entity_id), int(version)
+
+
+def emit(db: Session, entity: str, entity_id: int) -> None:
+    """Announce a change to `entity_id` when the session's transaction commits"""
+    payload = encode(entity, entity_id, int(time.time() * 1000))
+    if backend() == "loopback":
+        db.info.setdefault("pending_invalidations", []).append(payload)
+        return
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {
+        "channel": settings.INVALIDATION_CHANNEL,
+        "payload": payload
+    })
+
+
+def dispatch(payloads: List[str]) -> None:
+    """Run the handlers for received payloads"""
+    now = time.time()
+    for payload in payloads:
+        try:
+            entity, entity_id, version = decode(payload)
+        except ValueError:
+            print(f"ERROR: Malformed invalidation payload: {payload!r}")
+            continue
+        metrics.observe("invalidation_lag_seconds", max(0.0, now - version / 1000))
+        metrics.inc("invalidations_received_total", entity=entity)
+        for handler in handlers.get(entity, []):
+            try:
+                handler(entity_id, version)
+            except Exception as e:
+                print(f"ERROR: Invalidation handler for {entity} {entity_id} failed: {e}")
+
+
+def reset_all() -> None:
+    """Tell every handler to drop its whole cache (missed notifications)"""
+    for entity, entity_handlers in handlers.items():
+        for handler in entity_handlers:
+            try:
+                handler(None, None)
+            except Exception as e:
+                print(f"ERROR: Invalidation reset for {entity} failed: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_loopback(session: Session) -> None:
+    payloads = session.info.pop("pending_invalidations", None)
+    if payloads:
+        dispatch(payloads)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_loopback(session: Session) -> None:
+    session.info.pop("pending_invalidations", None)
+
+
+def _wait_for_notifies(connection, timeout: float) -> List[str]:
+    """Block until notifications arrive (or `timeout`), then drain them"""
+    if not connection.notifies:
+        select.select([connection], [], [], timeout)
+        connection.poll()
+    payloads = [notify.payload for notify in connection.notifies]
+    connection.notifies.clear()
+    return payloads
+
+
+def _listen_blocking(stop: threading.Event) -> None:
+    """LISTEN on a dedicated connection until `stop` is set (runs in a thread)"""
+    raw = engine.raw_connection()
+    try:
+        connection = raw.dbapi_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {settings.INVALIDATION_CHANNEL}")
+        # Anything sent before LISTEN was missed
+        reset_all()
+        while not stop.is_set():
+            payloads = _wait_for_notifies(connection, timeout=5.0)
+            if payloads:
+                dispatch(payloads)
+    finally:
+        # Never hand the LISTENing connection back to the pool
+        raw.invalidate()
+
+
+async def listen_invalidations() -> None:
+    """Receive invalidations for this worker; runs for the lifetime of the app"""
+    if backend() == "loopback":
+        return
+    stop = threading.Event()
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(_listen_blocking, stop)
+            except Exception as e:
+                print(f"ERROR: Invalidation listener failed, reconnecting: {e}")
+            await asyncio.sleep(settings.INVALIDATION_RECONNECT_SECONDS)
+    finally:
+        stop.set()
@@ -0,0 +1,83 @@
+"""Scheduled jobs: registration and retries.
+
+Periodic maintenance runs as Celery tasks, triggered by the beat schedule
+in app/core/celery_app.py:
+
+    @job("outbox.purge", max_retries=1, backoff_seconds=60)
+    def purge_outbox(): ...
+
+Arguments must be JSON-serializable (IDs, not ORM objects) and handlers
+open their own session. A failing handler is retried after
+`backoff_seconds * 2 ** attempt`, at most `max_retries` times.
+
+Side effects of requests don't go through here: they are recorded as
+outbox events and run by the relay, which retries them until they succeed
+(see app/services/outbox.py).
+"""
+import time
+from typing import Callable, Dict, List
+
+from app.core.celery_app import celery_app
+from app.core.metrics import metrics
+
+
+class Job:
+    """A registered handler; calling it runs the handler directly"""
+
+    def __init__(self, name: str, fn: Callable, max_retries: int, backoff_seconds: float):
+        self.name = name
+        self.fn = fn
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.celery_task = _celery_task(self)
+
+    def __call__(self, *args):
+        return self.fn(*args)
+
+    def run(self, args: List) -> None:
+        started = time.perf_counter()
+        self.fn(*args)
+        metrics.observe("jobs_run_seconds", time.perf_counter() - started, job=self.name)
+        metrics.inc("jobs_succeeded_total", job=self.name)
+
+    def retry_delay(self, attempt: int) -> float:
+        return self.backoff_seconds * 2 ** attempt
+
+    def retrying(self, attempt: int, error: Exception) -> None:
+        metrics.inc("jobs_retried_total", job=self.name)
+        print(f"DEBUG: Job {self.name} attempt {attempt + 1} failed, retrying in {self.retry_delay(attempt)}s: {error}")
+
+    def failed(self, error: Exception) -> None:
+        metrics.inc("jobs_failed_total", job=self.name)
+        # Arguments stay out of the logs
+        print(f"ERROR: Job {self.name} failed after {self.max_retries} retries: {error}")
+
+
+registry: Dict[str, Job] = {}
+
+
+def job(name: str, max_retries: int = 3, backoff_seconds: float = 2.0):
+    """Register a function as a scheduled job"""
+    def register(fn: Callable) -> Job:
+        if name in registry:
+            raise ValueError(f"Job {name} is already registered")
+        registry[name] = Job(name, fn, max_retries, backoff_seconds)
+        return registry[name]
+    return register
+
+
+def _celery_task(job: Job):
+    """Celery task running `job` with the job's retry policy"""
+    @celery_app.task(name=job.name, bind=True)
+    def run(task, *args):
+        args = list(args)
+        try:
+            job.run(args)
+        except Exception as e:
+            attempt = task.request.retries
+            if attempt >= job.max_retries:
+                job.failed(e)
+                return
+            job.retrying(attempt, e)
+            raise task.retry(exc=e, countdown=job.retry_delay(attempt), max_retries=job.max_retries)
+    return run
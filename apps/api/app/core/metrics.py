@@ -0,0 +1,68 @@
+"""In-process metrics: counters, gauges and observations.
+
+Values are kept per worker process and exposed as JSON on `GET /metrics`.
+Labels are folded into the key Prometheus-style, e.g.
+`scoring_rows_pruned_total{rule="tasks"}`.
+"""
+import threading
+from typing import Dict
+
+
+def _key(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{label}="{value}"' for label, value in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter"""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to its current value"""
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one sample (count, sum and max are kept)"""
+        key = _key(name, labels)
+        with self._lock:
+            stats = self._observations.setdefault(key, {"count": 0, "sum": 0.0, "max": value})
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def drain_counters(self) -> Dict[str, float]:
+        """Return and reset all counters (for shipping from a child process)"""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            return counters
+
+    def merge_counters(self, counters: Dict[str, float]) -> None:
+        """Add counters drained from another registry"""
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "observations": {key: dict(stats) for key, stats in self._observations.items()},
+            }
+
+
+# One registry per worker process
+metrics = MetricsRegistry()
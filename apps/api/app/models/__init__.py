@@ -2,16 +2,24 @@ from app.core.database import Base
 from app.models.user import User
 from app.models.rider_profile import RiderProfile
 from app.models.owner_profile import OwnerProfile
+from app.models.stable import Stable
 from app.models.horse import Horse
 from app.models.listing import Listing
 from app.models.match_preference import MatchPreference
 from app.models.like import Like
+from app.models.owner_like import OwnerLike
+from app.models.seen_listing_set import SeenListingSet
 from app.models.mutual_match import MutualMatch
 from app.models.message import Message
 from app.models.review import Review
 from app.models.moderation_report import ModerationReport
+from app.models.match_suggestion import MatchSuggestion
+from app.models.outbox_event import OutboxEvent
+from app.models.stripe_webhook_event import StripeWebhookEvent
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
-    "Base", "User", "RiderProfile", "OwnerProfile", "Horse", "Listing",
-    "MatchPreference", "Like", "MutualMatch", "Message", "Review", "ModerationReport"
+    "Base", "User", "RiderProfile", "OwnerProfile", "Stable", "Horse", "Listing",
+    "MatchPreference", "Like", "OwnerLike", "SeenListingSet", "MutualMatch", "Message", "Review", "ModerationReport",
+    "MatchSuggestion", "OutboxEvent", "StripeWebhookEvent", "IdempotencyKey"
 ]
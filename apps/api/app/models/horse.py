@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, JSON, Enum, Float
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, JSON, Enum, Float, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -19,6 +19,11 @@ class EnergyLevel(str, enum.Enum):
 
 class Horse(Base):
     __tablename__ = "horses"
+    __table_args__ = (
+        # Trigram GIN indexes for name/breed search (plain indexes on other dialects)
+        Index("ix_horses_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_horses_breed_trgm", "breed", postgresql_using="gin", postgresql_ops={"breed": "gin_trgm_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
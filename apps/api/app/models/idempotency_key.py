@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    """Claimed Idempotency-Key header and the response it produced"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    owner_hash = Column(String(64), primary_key=True)  # sha256 of the verified token's sub claim
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # method, path, query and body
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is running
+    response_body = Column(LargeBinary, nullable=True)
+    content_type = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    def __repr__(self):
+        return f"<IdempotencyKey {self.key} {self.status_code}>"
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, JSON, Date, Enum
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, JSON, Date, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
 
@@ -9,6 +10,10 @@ class ContributionType(str, enum.Enum):
 
 class Listing(Base):
     __tablename__ = "listings"
+    __table_args__ = (
+        # Stage-one candidate retrieval (see app/services/retrieval.py)
+        Index("ix_listings_prefilter", "is_active", "region_code", "contribution_min"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     horse_id = Column(Integer, ForeignKey("horses.id"), nullable=False)
@@ -26,9 +31,18 @@ class Listing(Base):
     video_url = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     
+    # Prefilter features, denormalized from the listing, horse and owner profile
+    region_code = Column(String(2), nullable=True)  # postcode region, e.g. "10"
+    availability_mask = Column(Integer, nullable=False, default=0)  # owner weekdays, 0 = any
+    discipline_mask = Column(Integer, nullable=False, default=0)  # horse disciplines, 0 = any
+    
+    # Bumped on any change to the listing's scoring features (market snapshot high-water mark)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+    
     # Relationships
     horse = relationship("Horse", back_populates="listings")
     likes = relationship("Like", back_populates="listing")
+    owner_likes = relationship("OwnerLike", back_populates="listing")
     matches = relationship("MutualMatch", back_populates="listing")
     
     def __repr__(self):
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MatchSuggestion(Base):
+    """One of a rider's top listings from a nightly batch matching run"""
+    __tablename__ = "match_suggestions"
+    __table_args__ = (
+        UniqueConstraint("run_date", "rider_id", "rank", name="uq_match_suggestions_run_rider_rank"),
+        Index("ix_match_suggestions_rider_run", "rider_id", "run_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_date = Column(Date, nullable=False)
+    rider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    listing_id = Column(Integer, ForeignKey("listings.id", ondelete="CASCADE"), nullable=False)
+    rank = Column(Integer, nullable=False)  # 1 = best
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<MatchSuggestion {self.run_date} {self.rider_id} #{self.rank} -> {self.listing_id}>"
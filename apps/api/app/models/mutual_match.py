@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, Float
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class MutualMatch(Base):
     __tablename__ = "mutual_matches"
+    __table_args__ = (
+        UniqueConstraint("rider_id", "listing_id", name="uq_mutual_matches_rider_listing"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     rider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class OutboxEvent(Base):
+    """Domain event written with the change it describes, relayed afterwards"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The relay only scans undelivered events
+        Index("ix_outbox_events_pending", "available_at", postgresql_where=text("delivered_at IS NULL")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime(timezone=True), server_default=func.now())  # pushed back after a failed delivery
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<OutboxEvent {self.id} {self.event_type}>"
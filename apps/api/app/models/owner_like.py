@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class OwnerLike(Base):
+    """An owner's interest in a rider for one of their listings"""
+    __tablename__ = "owner_likes"
+    __table_args__ = (
+        # Reciprocal probe: "did the owner of this listing like this rider?"
+        UniqueConstraint("listing_id", "rider_id", name="uq_owner_likes_listing_rider"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    from_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # owner
+    rider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    listing_id = Column(Integer, ForeignKey("listings.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    from_user = relationship("User", foreign_keys=[from_user_id])
+    rider = relationship("User", foreign_keys=[rider_id])
+    listing = relationship("Listing", back_populates="owner_likes")
+    
+    def __repr__(self):
+        return f"<OwnerLike {self.from_user_id} -> {self.rider_id} ({self.listing_id})>"
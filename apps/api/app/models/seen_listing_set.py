@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class SeenListingSet(Base):
+    """Compact per-user record of listings already decided on in the deck"""
+    __tablename__ = "seen_listing_sets"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    liked_ids = Column(LargeBinary, nullable=False, default=b"")  # sorted uint32 array
+    skipped_ids = Column(LargeBinary, nullable=False, default=b"")  # sorted uint32 array
+    skipped_days = Column(LargeBinary, nullable=False, default=b"")  # uint16 day of each skip, aligned with skipped_ids
+    skips_since = Column(DateTime(timezone=True), server_default=func.now())  # last reset; dates skips from before skipped_days
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<SeenListingSet {self.user_id}>"
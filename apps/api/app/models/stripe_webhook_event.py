@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class StripeWebhookEvent(Base):
+    """Stripe event IDs already processed, so redelivered webhooks are no-ops"""
+    __tablename__ = "stripe_webhook_events"
+
+    id = Column(String(255), primary_key=True)  # Stripe event ID (evt_...)
+    event_type = Column(String(100), nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<StripeWebhookEvent {self.id} {self.event_type}>"
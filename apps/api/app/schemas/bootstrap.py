@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from app.schemas.user import UserResponse
+
+class BootstrapSection(BaseModel):
+    """One independently loaded part of the bootstrap payload"""
+    data: Optional[Any] = None
+    error: Optional[str] = None
+
+class BootstrapResponse(BaseModel):
+    user: UserResponse
+    rider_profile: BootstrapSection
+    owner_profile: BootstrapSection
+    my_listings: BootstrapSection
+    my_likes: BootstrapSection
+    mutual_matches: BootstrapSection
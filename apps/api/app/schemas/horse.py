@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from app.models.horse import HorseType, HorseSex, EnergyLevel
 
 class HorseBase(BaseModel):
     name: str
@@ -63,3 +64,24 @@ class HorseResponse(HorseBase):
 
     class Config:
         from_attributes = True
+
+class HorseSummary(BaseModel):
+    """Lightweight horse representation for list views"""
+    id: int
+    owner_id: int
+    stable_id: Optional[int] = None
+    name: str
+    type: HorseType
+    age: int
+    sex: HorseSex
+    breed: str
+    energy_level: EnergyLevel
+    disciplines: Optional[List[str]] = None
+    photos: Optional[List[str]] = None
+
+    class Config:
+        from_attributes = True
+
+class HorseBatchResponse(BaseModel):
+    items: List[HorseResponse]
+    missing: List[int]
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Literal
 from datetime import datetime
 
 class LikeCreate(BaseModel):
@@ -12,3 +13,29 @@ class LikeResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class SwipeDecision(BaseModel):
+    listing_id: int
+    action: Literal["like", "skip"]
+
+class SwipeBatchCreate(BaseModel):
+    decisions: List[SwipeDecision] = Field(..., min_length=1, max_length=100)
+
+class SwipeBatchResponse(BaseModel):
+    liked: List[int]  # newly stored likes
+    ignored: List[int]  # already liked, unknown or inactive listings
+    skipped: List[int]
+
+class OwnerLikeCreate(BaseModel):
+    listing_id: int
+    rider_id: int
+
+class OwnerLikeResponse(BaseModel):
+    id: int
+    from_user_id: int
+    rider_id: int
+    listing_id: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
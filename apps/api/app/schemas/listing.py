@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, date
-from app.models.listing import Listing
+from app.models.listing import Listing, ContributionType
 
 class ListingBase(BaseModel):
     location_lat: float
@@ -39,3 +39,22 @@ class ListingResponse(ListingBase):
     
     class Config:
         from_attributes = True
+
+class ListingSummary(BaseModel):
+    """Lightweight listing representation for list views"""
+    id: int
+    horse_id: int
+    location_postcode: str
+    radius_km: int
+    contribution_min: int  # euro cents
+    contribution_type: ContributionType
+    start_date: date
+    photos: Optional[List[str]] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+class ListingBatchResponse(BaseModel):
+    items: List[ListingResponse]
+    missing: List[int]
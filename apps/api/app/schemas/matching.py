@@ -13,6 +13,16 @@ class MatchCandidate(BaseModel):
     distance_km: float
     highlights: List[str]
 
+class RiderCandidate(BaseModel):
+    rider_id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    postcode: Optional[str] = None
+    experience_years: Optional[int] = None
+    discipline_preferences: Optional[List[str]] = None
+    photos: Optional[List[str]] = None
+    match_score: float
+
 class MatchScore(BaseModel):
     total_score: float
     availability_score: float
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List
+
+class SearchSuggestion(BaseModel):
+    value: str
+    kind: str
+    score: float
+
+class SearchSuggestResponse(BaseModel):
+    query: str
+    suggestions: List[SearchSuggestion]
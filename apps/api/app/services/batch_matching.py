@@ -0,0 +1,479 @@
+"""Nightly all-pairs matching for the "your top new matches" digest.
+
+Running `ScoringPlan` over every rider x listing pair means R x L Python
+calls. Instead, riders and listings are loaded once into feature matrices
+and scored in tiles of `rider_tile` x `listing_tile` with NumPy. Memory is
+bounded by the tile size, not by R x L. Every rule in the plan has a
+vector form below. Tag lists (days, disciplines, tasks) become bitmasks
+over a vocabulary collected for the run, so overlaps are exact. A rule
+without a vector form fails the run instead of being skipped.
+
+Each rider keeps a running top K across listing tiles. Own and seen
+listings are excluded, as in discover. A finished rider tile is written
+to `match_suggestions` (COPY on PostgreSQL, executemany elsewhere) and
+committed before the next tile is scored. A rerun for the same date
+replaces that date's rows.
+
+`verify_riders` re-scores a sample of riders through the plan itself and
+reports any top K that differs, which catches drift between the two forms.
+"""
+import csv
+import io
+import random
+import time
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.match_suggestion import MatchSuggestion
+from app.models.rider_profile import RiderProfile
+from app.services.features import normalized_tags
+from app.services.read_models import ListingCandidate, RiderRecord, rider_records_query, select_listing_candidates
+from app.services.scoring import (
+    DEFAULT_MAX_DISTANCE_KM, DEFAULT_PLAN, ENERGY_COMPATIBILITY, MOCK_DISTANCE_KM, ScoringPlan, rider_age
+)
+from app.services.seen_store import SeenStore
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+_ENERGY_LEVELS = ("low", "medium", "high")
+_EXPERIENCE_BUCKETS = ("beginner", "intermediate", "advanced")
+# Row: experience bucket + 1 (0 = unknown); column: energy level + 1 (0 = missing, last = unrecognised)
+_ENERGY_TABLE = np.array(
+    [[0.5] * (len(_ENERGY_LEVELS) + 2)] + [
+        [0.5] + [ENERGY_COMPATIBILITY[bucket].get(level, 0.0) for level in _ENERGY_LEVELS] + [0.0]
+        for bucket in _EXPERIENCE_BUCKETS
+    ]
+)
+
+_SUGGESTION_COLUMNS = ("run_date", "rider_id", "listing_id", "rank", "score")
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits over the last axis of a uint64 array"""
+    return _POPCOUNT[np.ascontiguousarray(words).view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+
+def _overlap(rider_masks: np.ndarray, listing_masks: np.ndarray) -> np.ndarray:
+    """Shared tags per (rider, listing) pair"""
+    return _popcount(rider_masks[:, None, :] & listing_masks[None, :, :])
+
+
+class TagVocabulary:
+    """Bit index per tag seen in this run; tag sets become rows of uint64 words"""
+
+    def __init__(self, *tag_set_groups: Iterable[frozenset]):
+        tags = set()
+        for tag_sets in tag_set_groups:
+            for tag_set in tag_sets:
+                tags |= tag_set
+        self.index = {tag: bit for bit, tag in enumerate(sorted(tags))}
+        self.words = max(1, -(-len(self.index) // 64))
+
+    def encode(self, tag_sets: Sequence[frozenset]) -> np.ndarray:
+        masks = np.zeros((len(tag_sets), self.words), dtype=np.uint64)
+        for row, tag_set in enumerate(tag_sets):
+            mask = 0
+            for tag in tag_set:
+                mask |= 1 << self.index[tag]
+            for word in range(self.words):
+                masks[row, word] = (mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF
+        return masks
+
+
+class _Matrix:
+    """Column arrays with one row per entity; slicing yields a tile"""
+
+    def __len__(self) -> int:
+        return len(getattr(self, fields(self)[0].name))
+
+    def tile(self, start: int, stop: int):
+        return type(self)(**{column.name: getattr(self, column.name)[start:stop] for column in fields(self)})
+
+
+@dataclass
+class RiderMatrix(_Matrix):
+    user_ids: np.ndarray
+    has_postcode: np.ndarray
+    max_travel: np.ndarray  # 0 = not set
+    budget: np.ndarray  # euro cents, 0 = not set
+    experience: np.ndarray  # -1 = unknown
+    experience_bucket: np.ndarray  # index into _ENERGY_TABLE rows
+    insured: np.ndarray
+    age: np.ndarray  # -1 = unknown
+    days: np.ndarray
+    day_counts: np.ndarray
+    disciplines: np.ndarray
+    tasks: np.ndarray  # willing
+    task_counts: np.ndarray
+    patient: np.ndarray
+    playful: np.ndarray
+    bitless_ok: np.ndarray
+
+
+@dataclass
+class ListingMatrix(_Matrix):
+    listing_ids: np.ndarray  # ascending
+    owner_ids: np.ndarray
+    contribution: np.ndarray  # 0 = not set
+    has_postcode: np.ndarray
+    radius: np.ndarray  # 0 = not set
+    days: np.ndarray
+    day_counts: np.ndarray
+    disciplines: np.ndarray
+    tasks: np.ndarray  # required
+    task_counts: np.ndarray
+    calm: np.ndarray
+    playful: np.ndarray
+    energy: np.ndarray  # index into _ENERGY_TABLE columns
+    min_age: np.ndarray  # 0 = not set
+    max_age: np.ndarray  # 0 = not set
+    min_experience: np.ndarray  # 0 = not set
+    insurance_required: np.ndarray
+    bitless: np.ndarray
+
+
+def _experience_bucket(years: Optional[int]) -> int:
+    if years is None:
+        return 0
+    if years < 2:
+        return 1
+    if years < 5:
+        return 2
+    return 3
+
+
+def _energy_column(level: Optional[str]) -> int:
+    if not level:
+        return 0
+    if level in _ENERGY_LEVELS:
+        return _ENERGY_LEVELS.index(level) + 1
+    return len(_ENERGY_LEVELS) + 1
+
+
+def build_matrices(riders: Sequence[RiderRecord], candidates: Sequence[ListingCandidate]):
+    """Feature matrices for both sides, with vocabularies shared between them"""
+    rider_days = [normalized_tags(rider.available_days) for rider in riders]
+    rider_disciplines = [normalized_tags(rider.discipline_preferences) for rider in riders]
+    rider_tasks = [normalized_tags(rider.willing_tasks) for rider in riders]
+    rider_personality = [normalized_tags(rider.personality_style) for rider in riders]
+    owner_days = [normalized_tags(candidate.owner_available_days) for candidate in candidates]
+    horse_disciplines = [normalized_tags(candidate.horse_disciplines) for candidate in candidates]
+    owner_tasks = [normalized_tags(candidate.owner_required_tasks) for candidate in candidates]
+    horse_temperament = [normalized_tags(candidate.horse_temperament) for candidate in candidates]
+
+    days = TagVocabulary(rider_days, owner_days)
+    disciplines = TagVocabulary(rider_disciplines, horse_disciplines)
+    tasks = TagVocabulary(rider_tasks, owner_tasks)
+    today = date.today()
+
+    rider_matrix = RiderMatrix(
+        user_ids=np.array([rider.user_id for rider in riders], dtype=np.int64),
+        has_postcode=np.array([bool(rider.postcode) for rider in riders], dtype=bool),
+        max_travel=np.array([rider.max_travel_distance_km or 0 for rider in riders], dtype=np.float64),
+        budget=np.array([rider.budget_max_euro or 0 for rider in riders], dtype=np.int64),
+        experience=np.array([-1 if rider.experience_years is None else rider.experience_years for rider in riders], dtype=np.int64),
+        experience_bucket=np.array([_experience_bucket(rider.experience_years) for rider in riders], dtype=np.int64),
+        insured=np.array([bool(rider.insurance_coverage) for rider in riders], dtype=bool),
+        age=np.array([
+            -1 if (age := rider_age(rider.date_of_birth, today)) is None else age for rider in riders
+        ], dtype=np.int64),
+        days=days.encode(rider_days),
+        day_counts=np.array([len(tags) for tags in rider_days], dtype=np.int32),
+        disciplines=disciplines.encode(rider_disciplines),
+        tasks=tasks.encode(rider_tasks),
+        task_counts=np.array([len(tags) for tags in rider_tasks], dtype=np.int32),
+        patient=np.array(["patient" in tags for tags in rider_personality], dtype=bool),
+        playful=np.array(["playful" in tags for tags in rider_personality], dtype=bool),
+        bitless_ok=np.array([bool((rider.material_preferences or {}).get("bitless_ok")) for rider in riders], dtype=bool),
+    )
+    listing_matrix = ListingMatrix(
+        listing_ids=np.array([candidate.listing_id for candidate in candidates], dtype=np.int64),
+        owner_ids=np.array([candidate.owner_id for candidate in candidates], dtype=np.int64),
+        contribution=np.array([candidate.contribution_min or 0 for candidate in candidates], dtype=np.int64),
+        has_postcode=np.array([bool(candidate.owner_postcode) for candidate in candidates], dtype=bool),
+        radius=np.array([candidate.owner_visible_radius_km or 0 for candidate in candidates], dtype=np.float64),
+        days=days.encode(owner_days),
+        day_counts=np.array([len(tags) for tags in owner_days], dtype=np.int32),
+        disciplines=disciplines.encode(horse_disciplines),
+        tasks=tasks.encode(owner_tasks),
+        task_counts=np.array([len(tags) for tags in owner_tasks], dtype=np.int32),
+        calm=np.array(["calm" in tags for tags in horse_temperament], dtype=bool),
+        playful=np.array(["playful" in tags for tags in horse_temperament], dtype=bool),
+        energy=np.array([_energy_column(candidate.horse_energy_level) for candidate in candidates], dtype=np.int64),
+        min_age=np.array([candidate.owner_min_age or 0 for candidate in candidates], dtype=np.int64),
+        max_age=np.array([candidate.owner_max_age or 0 for candidate in candidates], dtype=np.int64),
+        min_experience=np.array([candidate.owner_min_experience_years or 0 for candidate in candidates], dtype=np.int64),
+        insurance_required=np.array([bool(candidate.owner_rider_insurance_required) for candidate in candidates], dtype=bool),
+        bitless=np.array([candidate.owner_bit_policy == "bitless_ok" for candidate in candidates], dtype=bool),
+    )
+    return rider_matrix, listing_matrix
+
+
+class TilePairs:
+    """One riders x listings tile with the intermediates several rules share"""
+
+    def __init__(self, riders: RiderMatrix, listings: ListingMatrix):
+        self.riders = riders
+        self.listings = listings
+        self.shape = (len(riders), len(listings))
+        self.both_postcodes = riders.has_postcode[:, None] & listings.has_postcode[None, :]
+        # Vector form of calculate_distance_km; keep the two in step
+        self.distance = np.full(self.shape, MOCK_DISTANCE_KM)
+
+
+# Hard filters - True where the pair may match
+
+def _within_distance(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    too_far = (r.max_travel[:, None] > 0) & (pairs.distance > r.max_travel[:, None])
+    too_far |= (l.radius[None, :] > 0) & (pairs.distance > l.radius[None, :])
+    return ~(pairs.both_postcodes & too_far)
+
+
+def _within_budget(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    both = (r.budget[:, None] > 0) & (l.contribution[None, :] > 0)
+    return ~(both & (r.budget[:, None] < l.contribution[None, :]))
+
+
+def _enough_experience(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    both = (l.min_experience[None, :] > 0) & (r.experience[:, None] > 0)
+    return ~(both & (r.experience[:, None] < l.min_experience[None, :]))
+
+
+def _insured_if_required(pairs: TilePairs) -> np.ndarray:
+    return ~pairs.listings.insurance_required[None, :] | pairs.riders.insured[:, None]
+
+
+def _age_allowed(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    known = (r.age >= 0)[:, None]
+    too_young = (l.min_age[None, :] > 0) & (r.age[:, None] < l.min_age[None, :])
+    too_old = (l.max_age[None, :] > 0) & (r.age[:, None] > l.max_age[None, :])
+    return ~(known & (too_young | too_old))
+
+
+# Soft rules - fraction of the rule's weight earned
+
+def _availability_overlap(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    shared = _overlap(r.days, l.days)
+    union = r.day_counts[:, None] + l.day_counts[None, :] - shared
+    both = (r.day_counts[:, None] > 0) & (l.day_counts[None, :] > 0)
+    return np.where(both, shared / np.maximum(union, 1), 0.0)
+
+
+def _discipline_overlap(pairs: TilePairs) -> np.ndarray:
+    return np.minimum(_overlap(pairs.riders.disciplines, pairs.listings.disciplines) / 4, 1.0)
+
+
+def _character_fit(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    return 0.5 * (r.patient[:, None] & l.calm[None, :]) + 0.5 * (r.playful[:, None] & l.playful[None, :])
+
+
+def _task_coverage(pairs: TilePairs) -> np.ndarray:
+    r, l = pairs.riders, pairs.listings
+    shared = _overlap(r.tasks, l.tasks)
+    both = (r.task_counts[:, None] > 0) & (l.task_counts[None, :] > 0)
+    return np.where(both, shared / np.maximum(l.task_counts[None, :], 1), 0.0)
+
+
+def _distance_closeness(pairs: TilePairs) -> np.ndarray:
+    max_distance = np.where(pairs.riders.max_travel > 0, pairs.riders.max_travel, DEFAULT_MAX_DISTANCE_KM)
+    closeness = np.maximum(0.0, 1 - pairs.distance / max_distance[:, None])
+    return np.where(pairs.both_postcodes, closeness, 0.0)
+
+
+def _material_fit(pairs: TilePairs) -> np.ndarray:
+    return (pairs.riders.bitless_ok[:, None] & pairs.listings.bitless[None, :]).astype(np.float64)
+
+
+def _energy_fit(pairs: TilePairs) -> np.ndarray:
+    return _ENERGY_TABLE[pairs.riders.experience_bucket[:, None], pairs.listings.energy[None, :]]
+
+
+# Vector form per rule name in DEFAULT_RULES
+VECTOR_RULES: Dict[str, Callable[[TilePairs], np.ndarray]] = {
+    "budget": _within_budget,
+    "insurance": _insured_if_required,
+    "experience": _enough_experience,
+    "age": _age_allowed,
+    "location": _within_distance,
+    "availability": _availability_overlap,
+    "discipline": _discipline_overlap,
+    "character": _character_fit,
+    "tasks": _task_coverage,
+    "distance": _distance_closeness,
+    "material": _material_fit,
+    "energy": _energy_fit,
+}
+
+
+def check_plan(plan: ScoringPlan) -> None:
+    missing = [rule.name for rule in plan.rules if rule.name not in VECTOR_RULES]
+    if missing:
+        raise ValueError(f"No vector form for scoring rules: {', '.join(missing)}")
+
+
+def score_tile(plan: ScoringPlan, pairs: TilePairs) -> np.ndarray:
+    """Plan scores for a tile; -inf where a hard filter fails or the threshold isn't met"""
+    passed = np.ones(pairs.shape, dtype=bool)
+    for rule in plan.hard_rules:
+        passed &= VECTOR_RULES[rule.name](pairs)
+
+    # Heaviest first, like ScoringPlan, so the float sums match
+    scores = np.zeros(pairs.shape)
+    for rule in plan.soft_rules:
+        scores += VECTOR_RULES[rule.name](pairs) * rule.weight
+
+    passed &= scores >= plan.threshold
+    return np.where(passed, scores, -np.inf)
+
+
+def _merge_top_k(best_scores: np.ndarray, best_index: np.ndarray, scores: np.ndarray, offset: int, k: int):
+    """Fold a tile's scores into each rider's running top k"""
+    tile_index = np.broadcast_to(np.arange(offset, offset + scores.shape[1]), scores.shape)
+    scores = np.concatenate([best_scores, scores], axis=1)
+    index = np.concatenate([best_index, tile_index], axis=1)
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(index, keep, axis=1)
+
+
+class BatchStats(NamedTuple):
+    run_date: date
+    riders: int
+    listings: int
+    pairs: int
+    suggestions: int
+    seconds: float
+    mismatches: int  # sampled riders whose plan top K differs
+
+
+def write_suggestions(db: Session, rows: List[tuple]) -> None:
+    """Bulk insert (run_date, rider_id, listing_id, rank, score) rows (caller commits)"""
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {MatchSuggestion.__tablename__} ({', '.join(_SUGGESTION_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        db.execute(insert(MatchSuggestion), [dict(zip(_SUGGESTION_COLUMNS, row)) for row in rows])
+
+
+def _verify_rider(plan: ScoringPlan, rider: RiderRecord, candidates: Sequence[ListingCandidate], seen, k: int, scores: List[float]) -> bool:
+    """Compare one rider's batch scores with the plan's own top k"""
+    eligible = (
+        (rider, candidate) for candidate in candidates
+        if candidate.owner_id != rider.user_id and candidate.listing_id not in seen
+    )
+    expected = [result.score for _, _, result in plan.top_k(eligible, k)]
+    return len(expected) == len(scores) and np.allclose(expected, scores)
+
+
+def run_batch_matching(
+    db: Session,
+    k: Optional[int] = None,
+    run_date: Optional[date] = None,
+    rider_tile: Optional[int] = None,
+    listing_tile: Optional[int] = None,
+    verify_riders: int = 0,
+    plan: ScoringPlan = DEFAULT_PLAN
+) -> BatchStats:
+    """Score all riders against all active listings and store each rider's top k"""
+    k = k or settings.MATCH_SUGGESTIONS_K
+    run_date = run_date or date.today()
+    rider_tile = rider_tile or settings.BATCH_MATCHING_RIDER_TILE
+    listing_tile = listing_tile or settings.BATCH_MATCHING_LISTING_TILE
+    check_plan(plan)
+    started = time.perf_counter()
+
+    riders = [RiderRecord._make(row) for row in db.execute(rider_records_query().order_by(RiderProfile.user_id))]
+    candidates = sorted(select_listing_candidates(db), key=lambda candidate: candidate.listing_id)
+    rider_matrix, listing_matrix = build_matrices(riders, candidates)
+    print(f"DEBUG: Batch matching {len(riders)} riders x {len(candidates)} listings for {run_date}")
+
+    db.execute(delete(MatchSuggestion).where(MatchSuggestion.run_date == run_date))
+    db.commit()
+
+    verify = set(random.sample(range(len(riders)), min(verify_riders, len(riders))))
+    seen_store = SeenStore(db)
+    pairs = suggestions = mismatches = 0
+
+    for rider_start in range(0, len(riders), rider_tile):
+        riders_tile = rider_matrix.tile(rider_start, rider_start + rider_tile)
+        tile_size = len(riders_tile)
+        seen = seen_store.load_many(riders_tile.user_ids.tolist())
+
+        # (rider row, listing index) of every seen listing still in the market
+        seen_rows, seen_index = [], []
+        for row, user_id in enumerate(riders_tile.user_ids.tolist()):
+            seen_ids = np.frombuffer(seen[user_id].ids, dtype=np.uint32).astype(np.int64)
+            positions = np.searchsorted(listing_matrix.listing_ids, seen_ids)
+            positions = positions[positions < len(listing_matrix)]
+            positions = positions[np.isin(listing_matrix.listing_ids[positions], seen_ids)]
+            seen_rows.append(np.full(len(positions), row))
+            seen_index.append(positions)
+        seen_rows = np.concatenate(seen_rows)
+        seen_index = np.concatenate(seen_index)
+
+        best_scores = np.full((tile_size, k), -np.inf)
+        best_index = np.full((tile_size, k), -1, dtype=np.int64)
+        for listing_start in range(0, len(listing_matrix), listing_tile):
+            listings_tile = listing_matrix.tile(listing_start, listing_start + listing_tile)
+            scores = score_tile(plan, TilePairs(riders_tile, listings_tile))
+            scores[riders_tile.user_ids[:, None] == listings_tile.owner_ids[None, :]] = -np.inf
+            in_tile = (seen_index >= listing_start) & (seen_index < listing_start + len(listings_tile))
+            scores[seen_rows[in_tile], seen_index[in_tile] - listing_start] = -np.inf
+            best_scores, best_index = _merge_top_k(best_scores, best_index, scores, listing_start, k)
+            pairs += scores.size
+
+        rows = []
+        for row in range(tile_size):
+            rider_id = int(riders_tile.user_ids[row])
+            found = np.isfinite(best_scores[row])
+            listing_ids = listing_matrix.listing_ids[best_index[row][found]]
+            rider_scores = best_scores[row][found]
+            # Best first; ties go to the newer listing, as in discover
+            order = np.lexsort((-listing_ids, -rider_scores))
+            for rank, position in enumerate(order, start=1):
+                rows.append((run_date, rider_id, int(listing_ids[position]), rank, float(rider_scores[position])))
+            if rider_start + row in verify and not _verify_rider(
+                plan, riders[rider_start + row], candidates, seen[rider_id], k, rider_scores[order].tolist()
+            ):
+                mismatches += 1
+                print(f"ERROR: Batch matching top {k} differs from the scoring plan for rider {rider_id}")
+
+        write_suggestions(db, rows)
+        db.commit()
+        suggestions += len(rows)
+
+        done = rider_start + tile_size
+        rate = pairs / (time.perf_counter() - started)
+        metrics.set("batch_matching_progress", done / len(riders))
+        metrics.set("batch_matching_pairs_per_second", rate)
+        print(f"DEBUG: Batch matching {done}/{len(riders)} riders, {rate:,.0f} pairs/s")
+
+    seconds = time.perf_counter() - started
+    metrics.inc("batch_matching_pairs_total", pairs)
+    metrics.inc("batch_matching_suggestions_total", suggestions)
+    metrics.observe("batch_matching_run_seconds", seconds)
+    print(f"DEBUG: Batch matching wrote {suggestions} suggestions in {seconds:.1f}s")
+    return BatchStats(run_date, len(riders), len(candidates), pairs, suggestions, seconds, mismatches)
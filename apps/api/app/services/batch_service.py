@@ -0,0 +1,29 @@
+from typing import Iterable, List, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+# Upper bound on IDs per batch request
+MAX_BATCH_SIZE = 100
+
+
+def fetch_by_ids(db: Session, model, ids: List[int], options: Iterable = ()) -> Tuple[List, List[int]]:
+    """Fetch rows by primary key with a single IN query.
+
+    Returns the found rows in the requested order (duplicates collapsed) and
+    the IDs that don't exist, instead of failing on the first missing one.
+    """
+    requested = list(dict.fromkeys(ids))
+    if len(requested) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_SIZE} ids per request"
+        )
+    if not requested:
+        return [], []
+
+    rows = db.query(model).options(*options).filter(model.id.in_(requested)).all()
+    rows_by_id = {row.id: row for row in rows}
+
+    found = [rows_by_id[row_id] for row_id in requested if row_id in rows_by_id]
+    missing = [row_id for row_id in requested if row_id not in rows_by_id]
+    return found, missing
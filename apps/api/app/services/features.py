@@ -0,0 +1,47 @@
+"""Compact matching features derived from profile and listing fields."""
+from typing import Iterable, Optional
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def availability_mask(days: Optional[Iterable[str]]) -> int:
+    """7-bit weekday mask (bit 0 = monday); 0 means no availability given"""
+    mask = 0
+    for day in days or []:
+        if isinstance(day, str) and day.lower() in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day.lower())
+    return mask
+
+
+def region_code(postcode: Optional[str]) -> Optional[str]:
+    """Two-digit Dutch postcode region (e.g. "1012 AB" -> "10")"""
+    if not postcode:
+        return None
+    digits = "".join(ch for ch in postcode if ch.isdigit())
+    return digits[:2] if len(digits) >= 2 else None
+
+
+def normalized_tags(values: Optional[Iterable[str]]) -> frozenset:
+    """Lower-cased tag set for discipline/task/temperament lists"""
+    return frozenset(v.strip().lower() for v in values or [] if isinstance(v, str) and v.strip())
+
+
+# Bit per discipline; Dutch and English spellings share a bit
+DISCIPLINE_BITS = {
+    "dressage": 0, "dressuur": 0,
+    "jumping": 1, "springen": 1,
+    "eventing": 2,
+    "western": 3,
+    "outdoor": 4, "buitenritten": 4,
+    "natural_horsemanship": 5,
+}
+# Any discipline outside the list above
+OTHER_DISCIPLINE_BIT = 30
+
+
+def discipline_mask(values: Optional[Iterable[str]]) -> int:
+    """Discipline bitmask; 0 means no disciplines given"""
+    mask = 0
+    for tag in normalized_tags(values):
+        mask |= 1 << DISCIPLINE_BITS.get(tag, OTHER_DISCIPLINE_BIT)
+    return mask
@@ -0,0 +1,457 @@
+"""Columnar snapshot of the active listing market, shared across workers.
+
+Every active listing's prefilter and hard-rule features are held in NumPy
+columns, next to a blob of encoded `ListingCandidate` records for the soft
+rules. Discover filters the columns vectorized, decodes only the pool that
+survives and goes to the database just to hydrate the final top K.
+
+One worker per node (whichever holds the flock on `<path>.lock`) is the
+builder: it polls the `listings.updated_at` high-water mark, writes each
+new snapshot to a versioned file under /dev/shm and atomically renames it
+into place. Every worker, the builder included, maps the file read-only
+and uses zero-copy NumPy views on it, remapping when the header version
+changes. Sixteen workers cost one snapshot's worth of RAM, and they all
+serve the same version. If the builder dies another worker takes the lock
+and carries on from the published high-water mark.
+
+With `MARKET_SNAPSHOT_SHARED=False` each worker builds its own copy in
+process memory instead.
+
+Listing and horse invalidations wake the poller early, so an edit shows up
+in discover without waiting for the next `MARKET_SNAPSHOT_POLL_SECONDS`.
+
+File layout (little-endian): a 64-byte header, then each column in
+`COLUMNS` order padded to 8 bytes, then `rows + 1` int64 record offsets,
+then the record blob (one compact JSON array per listing).
+"""
+import asyncio
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.invalidation import on_invalidate
+from app.core.metrics import metrics
+from app.models.listing import Listing
+from app.services.read_models import ListingCandidate, RiderRecord, candidate_from_row, listing_candidates_query
+from app.services.scoring import rider_age
+
+# Rows updated this long before the high-water mark are re-read on every
+# poll, so transactions that commit late (older updated_at) aren't missed
+HIGH_WATER_OVERLAP = timedelta(seconds=30)
+
+# Extra columns selected after LISTING_CANDIDATE_COLUMNS
+FEATURE_COLUMNS = (Listing.region_code, Listing.availability_mask, Listing.discipline_mask, Listing.updated_at)
+
+# Column name -> dtype, in file order
+COLUMNS = (
+    ("listing_ids", np.int64),
+    ("owner_ids", np.int64),
+    ("contribution_min", np.int64),
+    ("region", np.int16),
+    ("availability", np.int32),
+    ("disciplines", np.int32),
+    ("min_experience", np.int16),
+    ("insurance_required", np.bool_),
+    ("min_age", np.int16),
+    ("max_age", np.int16),
+)
+
+MAGIC = b"HSMK"
+FORMAT_VERSION = 1
+# magic, format, snapshot version, rows, high-water mark (epoch seconds), blob length
+HEADER = struct.Struct("<4sIQQdQ")
+HEADER_SIZE = 64
+
+
+def _region_number(code: Optional[str]) -> int:
+    return int(code) if code and code.isdigit() else -1
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def snapshot_path() -> str:
+    """Configured snapshot file, defaulting to tmpfs where available"""
+    if settings.MARKET_SNAPSHOT_PATH:
+        return settings.MARKET_SNAPSHOT_PATH
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "horsesharing-market.snapshot")
+
+
+class RecordStore:
+    """Encoded candidates addressed by row; decodes only what's asked for"""
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob, offsets: np.ndarray):
+        self.blob = memoryview(blob)
+        self.offsets = offsets
+
+    @classmethod
+    def from_raw(cls, raws: Sequence) -> "RecordStore":
+        offsets = np.zeros(len(raws) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(raw) for raw in raws], dtype=np.int64)
+        return cls(b"".join(raws), offsets)
+
+    @staticmethod
+    def encode(candidate: ListingCandidate) -> bytes:
+        return json.dumps(list(candidate), separators=(",", ":")).encode()
+
+    def raw(self, index: int) -> memoryview:
+        return self.blob[self.offsets[index]:self.offsets[index + 1]]
+
+    def __getitem__(self, index: int) -> ListingCandidate:
+        return ListingCandidate._make(json.loads(bytes(self.raw(index))))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+class MarketSnapshot:
+    """Immutable column set; build or map a new one instead of mutating"""
+
+    __slots__ = ("columns", "records", "high_water", "version", "_mapping", "_id_order")
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        records: RecordStore,
+        high_water: Optional[datetime],
+        version: int = 0,
+        mapping: Optional[mmap.mmap] = None
+    ):
+        self.columns = columns
+        self.records = records
+        self.high_water = high_water
+        self.version = version
+        self._mapping = mapping  # keeps the shared file mapped while views exist
+        self._id_order = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def listing_ids(self) -> np.ndarray:
+        return self.columns["listing_ids"]
+
+    @property
+    def is_shared(self) -> bool:
+        """Mapped from the shared file (other processes can read the same version)"""
+        return self._mapping is not None
+
+    def indices_for(self, listing_ids) -> np.ndarray:
+        """Row indices of the given listing IDs; IDs not in this snapshot are dropped"""
+        if self._id_order is None:
+            self._id_order = np.argsort(self.listing_ids, kind="stable")
+        sorted_ids = self.listing_ids[self._id_order]
+        if not len(sorted_ids):
+            return np.empty(0, dtype=np.int64)
+        listing_ids = np.asarray(listing_ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(sorted_ids, listing_ids), len(sorted_ids) - 1)
+        found = sorted_ids[positions] == listing_ids
+        return self._id_order[positions[found]]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values()) + self.records.offsets.nbytes + len(self.records.blob)
+
+    def candidate_pool(self, rider: RiderRecord, seen=None, pool_size: Optional[int] = None) -> List[ListingCandidate]:
+        """Decoded records for `pool_indices`"""
+        return [self.records[index] for index in self.pool_indices(rider, seen, pool_size)]
+
+    def pool_indices(self, rider: RiderRecord, seen=None, pool_size: Optional[int] = None) -> np.ndarray:
+        """Vectorized equivalent of retrieval.candidate_pool plus the hard rules"""
+        pool_size = pool_size or settings.MATCH_POOL_SIZE
+        c = self.columns
+        mask = c["owner_ids"] != rider.user_id
+
+        # Hard rules that only need numbers, same as the SQL stage (the scoring plan still re-checks them)
+        if rider.budget_max_euro:
+            mask &= c["contribution_min"] <= rider.budget_max_euro
+        if not rider.insurance_coverage:
+            mask &= ~c["insurance_required"]
+        if rider.experience_years:
+            mask &= c["min_experience"] <= rider.experience_years
+        age = rider_age(rider.date_of_birth)
+        if age is not None:
+            mask &= (c["min_age"] == 0) | (c["min_age"] <= age)
+            mask &= (c["max_age"] == 0) | (c["max_age"] >= age)
+
+        if seen is not None and len(seen):
+            mask &= ~np.isin(self.listing_ids, np.fromiter(seen, dtype=np.int64, count=len(seen)))
+
+        # Newest first, capped at the pool size like the SQL stage
+        indices = np.flatnonzero(mask)
+        if len(indices) > pool_size:
+            newest = np.argpartition(self.listing_ids[indices], -pool_size)[-pool_size:]
+            indices = indices[newest]
+        return indices[np.argsort(-self.listing_ids[indices], kind="stable")]
+
+
+def _feature_columns(candidates: Sequence[ListingCandidate], features: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    """Column arrays for freshly loaded rows; `features` is (region, days, disciplines)"""
+    values = {
+        "listing_ids": [c.listing_id for c in candidates],
+        "owner_ids": [c.owner_id for c in candidates],
+        "contribution_min": [c.contribution_min or 0 for c in candidates],
+        "region": [f[0] for f in features],
+        "availability": [f[1] for f in features],
+        "disciplines": [f[2] for f in features],
+        "min_experience": [c.owner_min_experience_years or 0 for c in candidates],
+        "insurance_required": [bool(c.owner_rider_insurance_required) for c in candidates],
+        "min_age": [c.owner_min_age or 0 for c in candidates],
+        "max_age": [c.owner_max_age or 0 for c in candidates],
+    }
+    return {name: np.array(values[name], dtype=dtype) for name, dtype in COLUMNS}
+
+
+def build_snapshot(rows, previous: Optional[MarketSnapshot] = None, kept: Optional[np.ndarray] = None) -> MarketSnapshot:
+    """New snapshot from DB rows, plus the `kept` rows of `previous` (copied, not decoded)"""
+    width = len(ListingCandidate._fields)
+    high_water = previous.high_water if previous is not None else None
+    candidates = []
+    features = []
+    for row in rows:
+        candidates.append(candidate_from_row(row))
+        region, days, disciplines, updated_at = row[width:]
+        features.append((_region_number(region), days or 0, disciplines or 0))
+        if updated_at is not None and (high_water is None or updated_at > high_water):
+            high_water = updated_at
+
+    columns = _feature_columns(candidates, features)
+    raws = [RecordStore.encode(candidate) for candidate in candidates]
+    if previous is not None and kept is not None and len(kept):
+        columns = {
+            name: np.concatenate([previous.columns[name][kept], columns[name]])
+            for name, _ in COLUMNS
+        }
+        raws = [previous.records.raw(index) for index in kept] + raws
+
+    version = previous.version + 1 if previous is not None else 1
+    return MarketSnapshot(columns, RecordStore.from_raw(raws), high_water, version)
+
+
+def write_snapshot(path: str, snapshot: MarketSnapshot) -> None:
+    """Write `snapshot` to `path` atomically (readers see the old or the new file)"""
+    high_water = snapshot.high_water.timestamp() if snapshot.high_water else 0.0
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, snapshot.version, len(snapshot), high_water, len(snapshot.records.blob))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for name, dtype in COLUMNS:
+            data = np.ascontiguousarray(snapshot.columns[name], dtype=dtype).tobytes()
+            f.write(data)
+            f.write(b"\0" * (_padded(len(data)) - len(data)))
+        f.write(np.ascontiguousarray(snapshot.records.offsets, dtype=np.int64).tobytes())
+        f.write(snapshot.records.blob)
+    os.replace(tmp_path, path)
+
+
+def read_version(path: str) -> Optional[int]:
+    """Version in the file header, or None if there is no valid snapshot"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, file_format, version, _, _, _ = HEADER.unpack(header)
+    if magic != MAGIC or file_format != FORMAT_VERSION:
+        return None
+    return version
+
+
+def map_snapshot(path: str) -> Optional[MarketSnapshot]:
+    """Map a snapshot file read-only; columns are zero-copy views on the mapping"""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    magic, file_format, version, rows, high_water, blob_length = HEADER.unpack_from(mapping, 0)
+    if magic != MAGIC or file_format != FORMAT_VERSION:
+        return None
+
+    offset = HEADER_SIZE
+    columns = {}
+    for name, dtype in COLUMNS:
+        columns[name] = np.frombuffer(mapping, dtype=dtype, count=rows, offset=offset)
+        offset += _padded(columns[name].nbytes)
+    offsets = np.frombuffer(mapping, dtype=np.int64, count=rows + 1, offset=offset)
+    offset += offsets.nbytes
+    blob = memoryview(mapping)[offset:offset + blob_length]
+
+    return MarketSnapshot(
+        columns,
+        RecordStore(blob, offsets),
+        datetime.fromtimestamp(high_water, tz=timezone.utc) if high_water else None,
+        version,
+        mapping,
+    )
+
+
+class MarketCache:
+    """Holds the current snapshot; builds it from the database or maps the shared file"""
+
+    def __init__(self):
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._builder_lock = None
+
+    @property
+    def current(self) -> Optional[MarketSnapshot]:
+        """The latest complete snapshot, or None before the first load"""
+        return self._snapshot
+
+    def refresh(self, db: Session) -> MarketSnapshot:
+        """Apply changes since the high-water mark (full load the first time)"""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            previous = self._snapshot
+            if previous is None or previous.high_water is None:
+                # First load, or an empty market with nothing to poll from yet
+                rows = db.execute(listing_candidates_query().add_columns(*FEATURE_COLUMNS)).all()
+                snapshot = build_snapshot(rows, previous)
+            else:
+                snapshot = self._apply_changes(db, previous)
+
+            # Atomic swap: readers hold on to whichever snapshot they already took
+            self._swap(snapshot)
+            metrics.observe("market_snapshot_refresh_seconds", time.perf_counter() - started)
+            return snapshot
+
+    def _apply_changes(self, db: Session, previous: MarketSnapshot) -> MarketSnapshot:
+        since = previous.high_water - HIGH_WATER_OVERLAP
+        changed = db.execute(
+            listing_candidates_query().add_columns(*FEATURE_COLUMNS).where(Listing.updated_at > since)
+        ).all()
+
+        # Deactivated or deleted listings don't show up as changed rows
+        active_ids = np.fromiter(
+            db.scalars(select(Listing.id).where(Listing.is_active == True)),
+            dtype=np.int64
+        )
+        if not changed and len(active_ids) == len(previous) and np.isin(previous.listing_ids, active_ids).all():
+            return previous
+
+        changed_ids = np.fromiter((row[0] for row in changed), dtype=np.int64, count=len(changed))
+        keep = np.isin(previous.listing_ids, active_ids) & ~np.isin(previous.listing_ids, changed_ids)
+        return build_snapshot(changed, previous, np.flatnonzero(keep))
+
+    def publish(self, path: str, snapshot: MarketSnapshot) -> None:
+        """Write a built snapshot for the other workers and serve from the shared copy"""
+        write_snapshot(path, snapshot)
+        mapped = map_snapshot(path)
+        if mapped is not None:
+            self._swap(mapped)
+
+    def remap(self, path: str) -> bool:
+        """Map the shared file if its version differs from the one being served"""
+        current = self._snapshot
+        version = read_version(path)
+        if version is None or (current is not None and current.version == version):
+            return False
+        mapped = map_snapshot(path)
+        if mapped is None:
+            return False
+        self._swap(mapped)
+        return True
+
+    def try_become_builder(self, path: str) -> bool:
+        """Take (or keep) the node-wide builder lock without blocking"""
+        if self._builder_lock is not None:
+            return True
+        lock = open(f"{path}.lock", "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        # Held for the life of the process; the OS releases it if we die
+        self._builder_lock = lock
+        return True
+
+    def _swap(self, snapshot: MarketSnapshot) -> None:
+        self._snapshot = snapshot
+        metrics.set("market_snapshot_listings", len(snapshot))
+        metrics.set("market_snapshot_bytes", snapshot.nbytes)
+        metrics.set("market_snapshot_version", snapshot.version)
+
+
+# One cache per worker process (backed by the shared file in shared mode)
+market = MarketCache()
+
+
+def sync_market() -> None:
+    """One poll: build and publish as the builder, otherwise follow the shared file"""
+    if settings.MARKET_SNAPSHOT_SHARED:
+        path = snapshot_path()
+        if not market.try_become_builder(path):
+            market.remap(path)
+            return
+        # A new builder continues from the published file, not from scratch
+        if market.current is None:
+            market.remap(path)
+
+    db = SessionLocal()
+    try:
+        previous = market.current
+        snapshot = market.refresh(db)
+        if settings.MARKET_SNAPSHOT_SHARED and (snapshot is not previous or read_version(path) != snapshot.version):
+            market.publish(path, snapshot)
+    except Exception as e:
+        print(f"ERROR: Market snapshot refresh failed: {e}")
+    finally:
+        db.close()
+
+
+# Set by poll_market; lets invalidations cut the poll interval short
+_poll_loop: Optional[asyncio.AbstractEventLoop] = None
+_poll_wakeup: Optional[asyncio.Event] = None
+
+
+def request_sync() -> None:
+    """Sync now instead of at the next poll (callable from any thread)"""
+    if _poll_loop is not None:
+        _poll_loop.call_soon_threadsafe(_poll_wakeup.set)
+
+
+@on_invalidate("listing")
+@on_invalidate("horse")
+def _listing_changed(entity_id: Optional[int], version: Optional[int]) -> None:
+    # The write bumped listings.updated_at, so the next sync picks it up
+    request_sync()
+
+
+async def poll_market() -> None:
+    """Keep the snapshot current; runs for the lifetime of the app"""
+    global _poll_loop, _poll_wakeup
+    _poll_loop = asyncio.get_running_loop()
+    _poll_wakeup = asyncio.Event()
+    while True:
+        try:
+            await asyncio.to_thread(sync_market)
+        except Exception as e:
+            print(f"ERROR: Market snapshot sync failed: {e}")
+        try:
+            await asyncio.wait_for(_poll_wakeup.wait(), timeout=settings.MARKET_SNAPSHOT_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _poll_wakeup.clear()
@@ -1,15 +1,29 @@
 from typing import List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from datetime import datetime, date
-import math
+from sqlalchemy import and_, select
+from datetime import date
 
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.metrics import metrics
 from app.models.user import User
 from app.models.rider_profile import RiderProfile
+from app.models.owner_profile import OwnerProfile
 from app.models.listing import Listing
 from app.models.horse import Horse
 from app.models.like import Like
+from app.models.owner_like import OwnerLike
 from app.models.mutual_match import MutualMatch
+from app.services.market import market
+from app.services.outbox import record_event
+from app.services.projections import listing_scoring_options, owner_scoring_options
+from app.services.read_models import (
+    RiderRecord, candidate_from_orm, rider_record, rider_records_query, select_listing_candidates
+)
+from app.services.retrieval import candidate_pool
+from app.services.scoring import DEFAULT_PLAN, FULL_PLAN, ScoreResult, score_match
+from app.services.scoring_executor import scoring_executor
+from app.services.seen_store import SeenStore
 
 
 class MatchService:
@@ -32,270 +46,240 @@ class MatchService:
         if not rider_profile:
             return []
 
-        # Base query for active listings
-        query = self.db.query(Listing).join(Horse).join(User).filter(
-            Listing.is_active == True,
-            User.id != rider_user.id  # Exclude own listings
-        )
-
-        # Apply hard filters
-        query = self._apply_hard_filters(query, rider_profile)
-
-        # Exclude already liked listings if requested
-        if exclude_liked:
-            liked_listing_ids = self.db.query(Like.listing_id).filter(
-                Like.from_user_id == rider_user.id
-            ).subquery()
-            query = query.filter(~Listing.id.in_(liked_listing_ids))
-
-        listings = query.all()
-
-        # Score and sort listings
-        scored_listings = []
-        for listing in listings:
-            score = self._calculate_match_score(rider_profile, listing)
-            scored_listings.append({
+        ranked = self.rank_listings(rider_profile, limit, exclude_seen=exclude_liked)
+        return [
+            {
                 'listing': listing,
-                'score': score,
+                'score': result.score,
                 'horse': listing.horse,
                 'owner': listing.horse.owner
-            })
-
-        # Sort by score descending
-        scored_listings.sort(key=lambda x: x['score'], reverse=True)
-
-        return scored_listings[:limit]
+            }
+            for listing, _, result in ranked
+        ]
+
+    def rank_listings(
+        self,
+        rider_profile: RiderProfile,
+        limit: int,
+        exclude_seen: bool = True,
+        exhaustive: bool = False,
+        pool_size: Optional[int] = None
+    ) -> List[Tuple[Listing, OwnerProfile, ScoreResult]]:
+        """Best `limit` listings for a rider, highest score first.
+
+        Stage one builds a bounded pool from the in-process market snapshot
+        (or, before it has loaded, with the SQL prefilter); stage two fully
+        scores only that pool.
+        `exhaustive=True` skips stage one and scores every active listing
+        (the reference path for recall measurements).
+        """
+        seen = SeenStore(self.db).load(rider_profile.user_id) if exclude_seen else None
+        rider = rider_record(rider_profile)
+        snapshot = market.current if settings.MARKET_SNAPSHOT_ENABLED else None
+
+        # Score slim Core records, not ORM entities; keep the best `limit`
+        # (pruned against the k-th best score, offloaded to the scoring pool when large)
+        if exhaustive:
+            candidates = select_listing_candidates(self.db, exclude_owner_id=rider_profile.user_id)
+            if seen is not None:
+                candidates = [candidate for candidate in candidates if candidate.listing_id not in seen]
+            top_k = scoring_executor.top_k(DEFAULT_PLAN, rider, candidates, limit)
+        elif snapshot is not None:
+            # Market snapshot: no query until hydrating the winners
+            indices = snapshot.pool_indices(rider, seen=seen, pool_size=pool_size)
+            top_k = scoring_executor.top_k_snapshot(DEFAULT_PLAN, rider, snapshot, indices, limit)
+        else:
+            pool = candidate_pool(self.db, rider_profile, seen=seen, pool_size=pool_size)
+            candidates = select_listing_candidates(self.db, pool)
+            top_k = scoring_executor.top_k(DEFAULT_PLAN, rider, candidates, limit)
 
-    def _apply_hard_filters(self, query, rider_profile: RiderProfile):
-        """Apply hard filters that must match"""
-        
-        # Distance filter
-        if rider_profile.max_distance_km:
-            # Note: In real implementation, you'd use PostGIS for proper distance calculation
-            # For now, we'll skip geographic filtering
-            pass
+        if not top_k:
+            return []
 
-        # Budget filter
-        if rider_profile.budget_min and rider_profile.budget_max:
-            query = query.filter(
-                and_(
-                    Listing.contribution_cents >= rider_profile.budget_min,
-                    Listing.contribution_cents <= rider_profile.budget_max
-                )
+        # Load ORM entities only for the winners
+        winner_ids = [candidate.listing_id for _, candidate, _ in top_k]
+        listings_by_id = {
+            listing.id: listing
+            for listing in self.db.query(Listing).join(Horse).join(User).options(
+                *listing_scoring_options(joined=True)
+            ).filter(
+                Listing.id.in_(winner_ids),
+                Listing.is_active == True  # The snapshot can lag a deactivation by one poll
             )
+        }
+        owner_ids = {candidate.owner_id for _, candidate, _ in top_k}
+        owner_profiles = {
+            profile.user_id: profile
+            for profile in self.db.query(OwnerProfile).options(*owner_scoring_options()).filter(
+                OwnerProfile.user_id.in_(owner_ids)
+            )
+        }
 
-        # Age restrictions for minors
-        if rider_profile.user.is_minor:
-            # Only match with listings that allow minors
-            # This would need additional fields in the listing model
-            pass
-
-        return query
-
-    def _calculate_match_score(self, rider_profile: RiderProfile, listing: Listing) -> float:
-        """Calculate compatibility score between rider and listing"""
-        score = 0.0
-        max_score = 0.0
-
-        # Experience level compatibility (20% weight)
-        exp_score = self._score_experience_match(rider_profile.level, listing.horse)
-        score += exp_score * 0.2
-        max_score += 0.2
-
-        # Horse energy level vs rider experience (15% weight)
-        energy_score = self._score_energy_compatibility(rider_profile.level, listing.horse.energy_level)
-        score += energy_score * 0.15
-        max_score += 0.15
-
-        # Task compatibility (15% weight)
-        task_score = self._score_task_compatibility(rider_profile.tasks_ready, listing.tasks_expected)
-        score += task_score * 0.15
-        max_score += 0.15
-
-        # Style/discipline compatibility (10% weight)
-        style_score = self._score_style_compatibility(rider_profile.style_tags, listing.horse.disciplines)
-        score += style_score * 0.10
-        max_score += 0.10
-
-        # Equipment compatibility (10% weight)
-        equipment_score = self._score_equipment_compatibility(rider_profile, listing.horse)
-        score += equipment_score * 0.10
-        max_score += 0.10
-
-        # Availability overlap (20% weight)
-        availability_score = self._score_availability_overlap(rider_profile.availability, listing.availability)
-        score += availability_score * 0.20
-        max_score += 0.20
-
-        # Recency bonus (10% weight)
-        recency_score = self._score_listing_recency(listing.created_at)
-        score += recency_score * 0.10
-        max_score += 0.10
-
-        # Normalize to 0-100 scale
-        if max_score > 0:
-            return (score / max_score) * 100
-        return 0.0
+        return [
+            (listings_by_id[candidate.listing_id], owner_profiles[candidate.owner_id], result)
+            for _, candidate, result in top_k
+            if candidate.listing_id in listings_by_id and candidate.owner_id in owner_profiles
+        ]
 
-    def _score_experience_match(self, rider_level: str, horse: Horse) -> float:
-        """Score experience level compatibility"""
-        level_hierarchy = {
-            'beginner': 1,
-            'intermediate': 2,
-            'advanced': 3
-        }
-        
-        rider_level_num = level_hierarchy.get(rider_level, 1)
-        
-        # Horses suitable for different levels
-        if horse.energy_level == 'calm':
-            suitable_levels = [1, 2, 3]  # All levels
-        elif horse.energy_level == 'moderate':
-            suitable_levels = [2, 3]  # Intermediate and advanced
-        else:  # energetic
-            suitable_levels = [3]  # Advanced only
-        
-        if rider_level_num in suitable_levels:
+    def measure_pool_recall(self, rider_profile: RiderProfile, k: int = 20, pool_size: Optional[int] = None) -> float:
+        """Share of the exhaustive top `k` that the pooled pipeline also returns"""
+        exhaustive = {listing.id for listing, _, _ in self.rank_listings(rider_profile, k, exhaustive=True)}
+        if not exhaustive:
             return 1.0
-        elif abs(min(suitable_levels) - rider_level_num) == 1:
-            return 0.5  # Close match
-        else:
-            return 0.0
 
-    def _score_energy_compatibility(self, rider_level: str, horse_energy: str) -> float:
-        """Score energy level compatibility"""
-        compatibility_matrix = {
-            'beginner': {'calm': 1.0, 'moderate': 0.3, 'energetic': 0.0},
-            'intermediate': {'calm': 0.8, 'moderate': 1.0, 'energetic': 0.5},
-            'advanced': {'calm': 0.6, 'moderate': 0.9, 'energetic': 1.0}
-        }
-        
-        return compatibility_matrix.get(rider_level, {}).get(horse_energy, 0.0)
+        pooled = {listing.id for listing, _, _ in self.rank_listings(rider_profile, k, pool_size=pool_size)}
+        recall = len(exhaustive & pooled) / len(exhaustive)
+        metrics.observe("match_pool_recall", recall)
+        return recall
+
+    def get_candidates_for_listing(
+        self,
+        listing: Listing,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Tuple[RiderProfile, float]]:
+        """Rank riders who liked a listing against the owner's requirements.
+
+        The owner's hard constraints are applied in SQL; the remaining riders
+        are read as slim records and scored with the shared scoring plan in top-K mode, keeping only
+        the best `skip + limit` (bounded heap), then paginated.
+        """
+        horse = listing.horse
+        owner_profile = self.db.query(OwnerProfile).filter(
+            OwnerProfile.user_id == horse.owner_id
+        ).first()
+        if not owner_profile:
+            return []
 
-    def _score_task_compatibility(self, rider_tasks: Optional[List[str]], listing_tasks: Optional[List[str]]) -> float:
-        """Score task compatibility"""
-        if not rider_tasks or not listing_tasks:
-            return 0.5  # Neutral if no data
-        
-        rider_set = set(rider_tasks)
-        listing_set = set(listing_tasks)
-        
-        if not listing_set:
-            return 1.0  # No specific tasks required
-        
-        overlap = len(rider_set.intersection(listing_set))
-        total_required = len(listing_set)
-        
-        return overlap / total_required if total_required > 0 else 0.0
+        # Interested riders: everyone who liked this listing
+        stmt = rider_records_query().join(
+            Like,
+            and_(Like.from_user_id == RiderProfile.user_id, Like.listing_id == listing.id)
+        ).filter(RiderProfile.user_id != horse.owner_id)
 
-    def _score_style_compatibility(self, rider_styles: Optional[List[str]], horse_disciplines: Optional[List[str]]) -> float:
-        """Score style/discipline compatibility"""
-        if not rider_styles or not horse_disciplines:
-            return 0.5  # Neutral if no data
-        
-        rider_set = set(rider_styles)
-        horse_set = set(horse_disciplines)
-        
-        overlap = len(rider_set.intersection(horse_set))
-        total_styles = len(rider_set.union(horse_set))
-        
-        return overlap / total_styles if total_styles > 0 else 0.0
+        stmt = self._apply_owner_constraints(stmt, owner_profile).order_by(RiderProfile.user_id)
 
-    def _score_equipment_compatibility(self, rider_profile: RiderProfile, horse: Horse) -> float:
-        """Score equipment compatibility"""
-        score = 1.0
-        
-        # Bitless preference
-        if rider_profile.prefers_bitless and not horse.can_be_bitless:
-            score -= 0.5
-        
-        # Trailer availability
-        if horse.needs_transport and not rider_profile.can_trailer:
-            score -= 0.5
-        
-        return max(0.0, score)
+        candidate = candidate_from_orm(listing, horse, owner_profile)
+        rows = self.db.execute(stmt.execution_options(yield_per=200))
+        pairs = ((RiderRecord._make(row), candidate) for row in rows)
+        page = FULL_PLAN.top_k(pairs, skip + limit)[skip:skip + limit]
+        if not page:
+            return []
 
-    def _score_availability_overlap(self, rider_availability: Optional[dict], listing_availability: Optional[dict]) -> float:
-        """Score availability overlap"""
-        if not rider_availability or not listing_availability:
-            return 0.5  # Neutral if no data
-        
-        # Simplified availability scoring
-        # In real implementation, this would be more sophisticated
-        overlap_count = 0
-        total_slots = 0
-        
-        for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']:
-            rider_slots = rider_availability.get(day, [])
-            listing_slots = listing_availability.get(day, [])
-            
-            if rider_slots and listing_slots:
-                # Check for any time overlap (simplified)
-                if any(slot in listing_slots for slot in rider_slots):
-                    overlap_count += 1
-            
-            if listing_slots:
-                total_slots += 1
-        
-        return overlap_count / total_slots if total_slots > 0 else 0.0
+        # Load full profiles only for the page being returned
+        profiles = {
+            profile.user_id: profile
+            for profile in self.db.query(RiderProfile).filter(
+                RiderProfile.user_id.in_([rider.user_id for rider, _, _ in page])
+            )
+        }
+        return [
+            (profiles[rider.user_id], result.score)
+            for rider, _, result in page
+            if rider.user_id in profiles
+        ]
+
+    def _apply_owner_constraints(self, query, owner_profile: OwnerProfile):
+        """Owner requirements that can be checked in SQL (ORM query or Core select)"""
+        if owner_profile.min_experience_years:
+            query = query.filter(RiderProfile.experience_years >= owner_profile.min_experience_years)
+
+        if owner_profile.rider_insurance_required:
+            query = query.filter(RiderProfile.insurance_coverage == True)
+
+        # date_of_birth is stored as an ISO date string, so string order is date order
+        today = date.today()
+        if owner_profile.min_age:
+            latest_birth = self._years_before(today, owner_profile.min_age)
+            query = query.filter(RiderProfile.date_of_birth <= latest_birth.isoformat())
+        if owner_profile.max_age:
+            earliest_birth = self._years_before(today, owner_profile.max_age + 1)
+            query = query.filter(RiderProfile.date_of_birth > earliest_birth.isoformat())
+
+        # Radius is enforced by the scorer's location filter (no geo index yet)
+        return query
 
-    def _score_listing_recency(self, created_at: datetime) -> float:
-        """Score based on how recent the listing is"""
-        days_old = (datetime.utcnow() - created_at).days
+    @staticmethod
+    def _years_before(day: date, years: int) -> date:
+        try:
+            return day.replace(year=day.year - years)
+        except ValueError:
+            # 29 February in a non-leap target year
+            return day.replace(year=day.year - years, day=28)
+
+    def record_like(self, rider_user_id: int, listing_id: int) -> bool:
+        """Insert a rider's like with its outbox event (caller commits); False if already liked"""
+        stmt = dialect_insert(self.db, Like).values(
+            from_user_id=rider_user_id,
+            listing_id=listing_id
+        ).on_conflict_do_nothing(index_elements=["from_user_id", "listing_id"]).returning(Like.id)
+        if self.db.execute(stmt).scalar() is None:
+            return False
         
-        if days_old <= 7:
-            return 1.0
-        elif days_old <= 30:
-            return 0.7
-        elif days_old <= 90:
-            return 0.4
-        else:
-            return 0.1
+        SeenStore(self.db).record(rider_user_id, liked=[listing_id])
+        # Mutual-match detection picks this up from the outbox
+        record_event(self.db, "like.created", {"rider_id": rider_user_id, "listing_id": listing_id})
+        return True
+
+    def is_reciprocal(self, rider_user_id: int, listing_id: int) -> bool:
+        """Check whether rider and listing owner liked each other.
+
+        A single probe on the two unique indexes (owner_likes on
+        (listing_id, rider_id), likes on (from_user_id, listing_id)), so it
+        answers for whichever side swiped last.
+        """
+        probe = select(OwnerLike.id).join(
+            Like,
+            and_(Like.listing_id == OwnerLike.listing_id, Like.from_user_id == OwnerLike.rider_id)
+        ).where(
+            OwnerLike.listing_id == listing_id,
+            OwnerLike.rider_id == rider_user_id
+        ).limit(1)
+        return self.db.execute(probe).first() is not None
 
     def create_mutual_match(self, rider_user_id: int, listing_id: int) -> Optional[MutualMatch]:
-        """Create a mutual match when both parties like each other"""
+        """Create a mutual match when both parties like each other (idempotent)"""
+        if not self.is_reciprocal(rider_user_id, listing_id):
+            return None
         
-        # Check if owner has liked the rider back
         listing = self.db.query(Listing).filter(Listing.id == listing_id).first()
         if not listing:
             return None
         
-        owner_like = self.db.query(Like).filter(
-            Like.from_user_id == listing.horse.owner_id,
-            Like.listing_id == listing_id  # This would need adjustment for rider profiles
+        # Calculate match score
+        rider_profile = self.db.query(RiderProfile).filter(
+            RiderProfile.user_id == rider_user_id
         ).first()
         
-        rider_like = self.db.query(Like).filter(
-            Like.from_user_id == rider_user_id,
-            Like.listing_id == listing_id
+        owner_profile = self.db.query(OwnerProfile).filter(
+            OwnerProfile.user_id == listing.horse.owner_id
         ).first()
         
-        if owner_like and rider_like:
-            # Check if match already exists
-            existing_match = self.db.query(MutualMatch).filter(
-                MutualMatch.rider_id == rider_user_id,
-                MutualMatch.listing_id == listing_id
-            ).first()
-            
-            if not existing_match:
-                # Calculate match score
-                rider_profile = self.db.query(RiderProfile).filter(
-                    RiderProfile.user_id == rider_user_id
-                ).first()
-                
-                score = self._calculate_match_score(rider_profile, listing) if rider_profile else 50.0
-                
-                mutual_match = MutualMatch(
-                    rider_id=rider_user_id,
-                    listing_id=listing_id,
-                    score=score,
-                    paid_chat=False
-                )
-                
-                self.db.add(mutual_match)
-                self.db.commit()
-                self.db.refresh(mutual_match)
-                
-                return mutual_match
+        if rider_profile and owner_profile:
+            score = score_match(rider_profile, listing, listing.horse, owner_profile)
+        else:
+            score = 50.0
         
-        return None
+        # Upsert: concurrent swipes from both sides create exactly one match
+        stmt = dialect_insert(self.db, MutualMatch).values(
+            rider_id=rider_user_id,
+            listing_id=listing_id,
+            score=score,
+            paid_chat=False
+        ).on_conflict_do_nothing(index_elements=["rider_id", "listing_id"]).returning(MutualMatch.id)
+        match_id = self.db.execute(stmt).scalar()
+        if match_id is not None:
+            # Only the insert that created the match announces it
+            record_event(self.db, "match.created", {
+                "match_id": match_id,
+                "rider_id": rider_user_id,
+                "listing_id": listing_id,
+                "owner_id": listing.horse.owner_id,
+                "score": score
+            })
+        self.db.commit()
+        
+        return self.db.query(MutualMatch).filter(
+            MutualMatch.rider_id == rider_user_id,
+            MutualMatch.listing_id == listing_id
+        ).first()
@@ -0,0 +1,131 @@
+"""Transactional outbox: domain events written with the change, relayed later.
+
+`record_event` adds an `outbox_events` row to the caller's session, so the
+event commits or rolls back together with the like, match or payment it
+describes. The relay (`poll_outbox`, started with the app) reads pending
+events in batches with `FOR UPDATE SKIP LOCKED`, hands each one to its
+subscribers and marks it delivered. Several relays can run side by side
+without delivering the same batch twice.
+
+Delivery is at-least-once, up to the subscriber's own work. Subscribers
+do that work synchronously inside the relay, and an event is only marked
+delivered once all of its subscribers have returned. Handing off to an
+in-memory job queue would mark the event delivered even if the job were
+later lost in a restart or ran out of retries. A subscriber that raises
+leaves the event pending. Its `attempts` and `last_error` are updated, it
+is retried with backoff, and every subscriber of that event runs again.
+Subscribers must therefore be idempotent.
+
+    @subscribe("like.created")
+    def on_like_created(payload): ...
+"""
+import asyncio
+import importlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import metrics
+from app.models.outbox_event import OutboxEvent
+from app.tasks import JOB_MODULES
+
+# Longest wait between delivery attempts of one event
+MAX_RETRY_DELAY_SECONDS = 300
+
+subscribers: Dict[str, List[Callable[[dict], None]]] = {}
+
+
+def subscribe(event_type: str):
+    """Register a handler for an event type"""
+    def register(fn: Callable[[dict], None]) -> Callable[[dict], None]:
+        subscribers.setdefault(event_type, []).append(fn)
+        return fn
+    return register
+
+
+def load_subscribers() -> None:
+    """Import the modules that declare subscribers"""
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+
+
+def record_event(db: Session, event_type: str, payload: dict) -> None:
+    """Add an event to the caller's transaction (caller commits)"""
+    db.add(OutboxEvent(event_type=event_type, payload=payload, attempts=0))
+
+
+def publish(event: OutboxEvent) -> None:
+    for handler in subscribers.get(event.event_type, []):
+        handler(event.payload)
+
+
+def relay_batch(db: Session, batch_size: int) -> int:
+    """Deliver up to `batch_size` pending events; returns how many were claimed"""
+    now = datetime.now(timezone.utc)
+    events = db.query(OutboxEvent).filter(
+        OutboxEvent.delivered_at == None,
+        OutboxEvent.available_at <= now
+    ).order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    for event in events:
+        try:
+            publish(event)
+        except Exception as e:
+            event.attempts += 1
+            event.last_error = str(e)[:1000]
+            event.available_at = now + timedelta(seconds=min(2 ** event.attempts, MAX_RETRY_DELAY_SECONDS))
+            metrics.inc("outbox_failed_total", type=event.event_type)
+            print(f"ERROR: Delivering outbox event {event.id} ({event.event_type}) failed: {e}")
+            continue
+
+        event.delivered_at = now
+        metrics.inc("outbox_delivered_total", type=event.event_type)
+        created_at = event.created_at
+        if created_at is not None:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            metrics.observe("outbox_delivery_lag_seconds", (now - created_at).total_seconds())
+
+    db.commit()
+    return len(events)
+
+
+def relay_outbox() -> int:
+    """One relay pass in its own session"""
+    db = SessionLocal()
+    try:
+        return relay_batch(db, settings.OUTBOX_BATCH_SIZE)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def purge_delivered(db: Session, older_than_days: int) -> int:
+    """Delete delivered events older than the retention window"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    result = db.execute(delete(OutboxEvent).where(
+        OutboxEvent.delivered_at != None,
+        OutboxEvent.delivered_at < cutoff
+    ))
+    db.commit()
+    return result.rowcount
+
+
+async def poll_outbox() -> None:
+    """Relay pending events; runs for the lifetime of the app"""
+    load_subscribers()
+    while True:
+        try:
+            relayed = await asyncio.to_thread(relay_outbox)
+        except Exception as e:
+            print(f"ERROR: Outbox relay failed: {e}")
+            relayed = 0
+        # A full batch means more are waiting
+        if relayed < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
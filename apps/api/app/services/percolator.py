@@ -0,0 +1,258 @@
+"""Reverse matching: which riders does a new or changed listing qualify for?
+
+Every rider's hard-filter criteria (budget ceiling, region, disciplines,
+weekday availability) are kept in an in-process inverted index. Percolating
+a listing intersects the posting sets for its features and fully scores only
+the riders that survive, instead of running discover for every rider.
+
+Profile changes on any worker reach every worker's index through the
+"rider" invalidation (app/core/invalidation.py).
+"""
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy.orm import Session, load_only
+
+from app.core.database import SessionLocal
+from app.core.invalidation import on_invalidate
+from app.models.listing import Listing
+from app.models.owner_profile import OwnerProfile
+from app.models.rider_profile import RiderProfile
+from app.services.features import WEEKDAYS, availability_mask, region_code, normalized_tags
+from app.services.read_models import candidate_from_orm, select_rider_records
+from app.services.scoring import DEFAULT_PLAN
+
+
+class RiderCriteria(NamedTuple):
+    rider_id: int
+    budget_max: Optional[int]  # euro cents, None = no ceiling
+    region: Optional[str]  # None = any region
+    disciplines: frozenset  # empty = any discipline
+    availability: int  # weekday mask, 0 = any day
+
+
+class ListingFeatures(NamedTuple):
+    contribution_min: Optional[int]
+    region: Optional[str]
+    disciplines: frozenset
+    availability: int
+
+
+def rider_criteria(profile: RiderProfile) -> RiderCriteria:
+    return RiderCriteria(
+        rider_id=profile.user_id,
+        budget_max=profile.budget_max_euro,
+        region=region_code(profile.postcode),
+        disciplines=normalized_tags(profile.discipline_preferences),
+        availability=availability_mask(profile.available_days),
+    )
+
+
+def listing_features(listing: Listing, owner: Optional[OwnerProfile]) -> ListingFeatures:
+    return ListingFeatures(
+        contribution_min=listing.contribution_min,
+        region=region_code(listing.location_postcode),
+        disciplines=normalized_tags(listing.horse.disciplines),
+        availability=availability_mask(owner.available_days if owner else None),
+    )
+
+
+class ListingPercolator:
+    """Inverted index of rider criteria; safe for concurrent readers and writers"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._loaded = False
+        self._criteria: Dict[int, RiderCriteria] = {}
+        self._budgets: List[Tuple[int, int]] = []  # sorted (budget_max, rider_id)
+        self._no_budget: Set[int] = set()
+        self._by_region: Dict[str, Set[int]] = {}
+        self._any_region: Set[int] = set()
+        self._by_discipline: Dict[str, Set[int]] = {}
+        self._any_discipline: Set[int] = set()
+        self._by_day: List[Set[int]] = [set() for _ in WEEKDAYS]
+        self._any_day: Set[int] = set()
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Build the index from all rider profiles on first use"""
+        with self._lock:
+            if self._loaded:
+                return
+            profiles = db.query(RiderProfile).options(load_only(
+                RiderProfile.user_id, RiderProfile.budget_max_euro, RiderProfile.postcode,
+                RiderProfile.discipline_preferences, RiderProfile.available_days
+            )).all()
+            for profile in profiles:
+                self._add(rider_criteria(profile))
+            self._loaded = True
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def reload_rider(self, db: Session, rider_id: int) -> None:
+        """Re-read one rider's criteria from the database (no-op until loaded)"""
+        if not self._loaded:
+            return
+        profile = db.query(RiderProfile).options(load_only(
+            RiderProfile.user_id, RiderProfile.budget_max_euro, RiderProfile.postcode,
+            RiderProfile.discipline_preferences, RiderProfile.available_days
+        )).filter(RiderProfile.user_id == rider_id).first()
+        if profile is None:
+            self.remove(rider_id)
+        else:
+            self.upsert(profile)
+
+    def reset(self) -> None:
+        """Drop the index; it is rebuilt on next use"""
+        with self._lock:
+            self._clear()
+
+    def upsert(self, profile: RiderProfile) -> None:
+        """Re-index a rider after a profile change (no-op until loaded)"""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._remove(profile.user_id)
+            self._add(rider_criteria(profile))
+
+    def remove(self, rider_id: int) -> None:
+        with self._lock:
+            self._remove(rider_id)
+
+    def match(self, features: ListingFeatures) -> Set[int]:
+        """Riders whose hard-filter criteria this listing satisfies"""
+        with self._lock:
+            # Budget: riders with no ceiling or a ceiling >= the contribution
+            if features.contribution_min is None:
+                riders = set(self._criteria)
+            else:
+                start = bisect_left(self._budgets, (features.contribution_min, -1))
+                riders = {rider_id for _, rider_id in self._budgets[start:]} | self._no_budget
+
+            # Region: same postcode region, or riders without a region
+            region_riders = set(self._any_region)
+            if features.region:
+                region_riders |= self._by_region.get(features.region, set())
+            else:
+                region_riders = set(self._criteria)
+            riders &= region_riders
+
+            # Disciplines: any overlap, or riders without preferences
+            if features.disciplines:
+                discipline_riders = set(self._any_discipline)
+                for discipline in features.disciplines:
+                    discipline_riders |= self._by_discipline.get(discipline, set())
+                riders &= discipline_riders
+
+            # Availability: at least one shared weekday, or riders without a schedule
+            if features.availability:
+                day_riders = set(self._any_day)
+                for day_index in range(len(WEEKDAYS)):
+                    if features.availability & (1 << day_index):
+                        day_riders |= self._by_day[day_index]
+                riders &= day_riders
+
+            return riders
+
+    def _add(self, criteria: RiderCriteria) -> None:
+        rider_id = criteria.rider_id
+        self._criteria[rider_id] = criteria
+
+        if criteria.budget_max is None:
+            self._no_budget.add(rider_id)
+        else:
+            insort(self._budgets, (criteria.budget_max, rider_id))
+
+        if criteria.region:
+            self._by_region.setdefault(criteria.region, set()).add(rider_id)
+        else:
+            self._any_region.add(rider_id)
+
+        if criteria.disciplines:
+            for discipline in criteria.disciplines:
+                self._by_discipline.setdefault(discipline, set()).add(rider_id)
+        else:
+            self._any_discipline.add(rider_id)
+
+        if criteria.availability:
+            for day_index in range(len(WEEKDAYS)):
+                if criteria.availability & (1 << day_index):
+                    self._by_day[day_index].add(rider_id)
+        else:
+            self._any_day.add(rider_id)
+
+    def _remove(self, rider_id: int) -> None:
+        criteria = self._criteria.pop(rider_id, None)
+        if criteria is None:
+            return
+
+        if criteria.budget_max is None:
+            self._no_budget.discard(rider_id)
+        else:
+            index = bisect_left(self._budgets, (criteria.budget_max, rider_id))
+            if index < len(self._budgets) and self._budgets[index] == (criteria.budget_max, rider_id):
+                del self._budgets[index]
+
+        self._any_region.discard(rider_id)
+        if criteria.region:
+            self._by_region.get(criteria.region, set()).discard(rider_id)
+
+        self._any_discipline.discard(rider_id)
+        for discipline in criteria.disciplines:
+            self._by_discipline.get(discipline, set()).discard(rider_id)
+
+        self._any_day.discard(rider_id)
+        for day_riders in self._by_day:
+            day_riders.discard(rider_id)
+
+
+# One index per worker process
+percolator = ListingPercolator()
+
+
+@on_invalidate("rider")
+def _rider_changed(rider_id: Optional[int], version: Optional[int]) -> None:
+    """A rider profile changed, possibly on another worker"""
+    if rider_id is None:
+        percolator.reset()
+        return
+    if not percolator.loaded:
+        return
+    db = SessionLocal()
+    try:
+        percolator.reload_rider(db, rider_id)
+    finally:
+        db.close()
+
+
+def percolate_listing(db: Session, listing_id: int) -> List[Tuple[int, float]]:
+    """Riders a listing qualifies for, scored and best first"""
+    listing = db.query(Listing).filter(Listing.id == listing_id, Listing.is_active == True).first()
+    if not listing:
+        return []
+
+    owner_id = listing.horse.owner_id
+    owner = db.query(OwnerProfile).filter(OwnerProfile.user_id == owner_id).first()
+    if not owner:
+        return []
+
+    percolator.ensure_loaded(db)
+    rider_ids = percolator.match(listing_features(listing, owner))
+    rider_ids.discard(owner_id)
+    if not rider_ids:
+        return []
+
+    riders = select_rider_records(db, rider_ids)
+    candidate = candidate_from_orm(listing, listing.horse, owner)
+    results = []
+    for rider in riders:
+        result = DEFAULT_PLAN.evaluate(rider, candidate)
+        if result.passed:
+            results.append((rider.user_id, result.score))
+
+    results.sort(key=lambda result: result[1], reverse=True)
+    return results
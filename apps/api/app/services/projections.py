@@ -0,0 +1,80 @@
+"""Column loading profiles for list views and scoring queries.
+
+`Horse` and `OwnerProfile` carry many JSON columns that list endpoints and
+the matching scorers never touch. These helpers return loader options that
+restrict each query to the columns its consumer actually reads, so the
+remaining columns are neither fetched nor JSON-decoded.
+"""
+from sqlalchemy.orm import load_only, joinedload, contains_eager
+
+from app.models.horse import Horse
+from app.models.listing import Listing
+from app.models.owner_profile import OwnerProfile
+from app.models.user import User
+
+
+# Columns backing HorseSummary
+HORSE_SUMMARY_COLUMNS = (
+    Horse.id, Horse.owner_id, Horse.stable_id, Horse.name, Horse.type,
+    Horse.age, Horse.sex, Horse.breed, Horse.energy_level, Horse.disciplines,
+    Horse.photos,
+)
+
+# Columns backing ListingSummary
+LISTING_SUMMARY_COLUMNS = (
+    Listing.id, Listing.horse_id, Listing.location_postcode, Listing.radius_km,
+    Listing.contribution_min, Listing.contribution_type, Listing.start_date,
+    Listing.photos, Listing.is_active,
+)
+
+# Columns read by the matching scorers and candidate cards
+HORSE_SCORING_COLUMNS = (
+    Horse.id, Horse.owner_id, Horse.name, Horse.energy_level,
+    Horse.disciplines, Horse.temperament, Horse.photos,
+)
+
+LISTING_SCORING_COLUMNS = (
+    Listing.id, Listing.horse_id, Listing.location_postcode,
+    Listing.contribution_min, Listing.required_tasks, Listing.is_active,
+)
+
+OWNER_SCORING_COLUMNS = (
+    OwnerProfile.user_id, OwnerProfile.first_name, OwnerProfile.last_name,
+    OwnerProfile.postcode, OwnerProfile.visible_radius_km, OwnerProfile.available_days,
+    OwnerProfile.min_age, OwnerProfile.max_age, OwnerProfile.min_experience_years,
+    OwnerProfile.required_tasks, OwnerProfile.rider_insurance_required,
+    OwnerProfile.bit_policy,
+)
+
+
+def horse_summary_options():
+    """Loader options for horse list views"""
+    return (load_only(*HORSE_SUMMARY_COLUMNS),)
+
+
+def listing_summary_options():
+    """Loader options for listing list views"""
+    return (load_only(*LISTING_SUMMARY_COLUMNS),)
+
+
+def listing_scoring_options(joined: bool = False):
+    """Loader options for scoring listings together with their horse.
+
+    Pass `joined=True` when the query already joins Horse (and User), so the
+    existing joins populate the relationships instead of extra queries.
+    """
+    if joined:
+        return (
+            load_only(*LISTING_SCORING_COLUMNS),
+            contains_eager(Listing.horse).load_only(*HORSE_SCORING_COLUMNS),
+            contains_eager(Listing.horse).contains_eager(Horse.owner).load_only(User.id, User.email, User.phone),
+        )
+    return (
+        load_only(*LISTING_SCORING_COLUMNS),
+        joinedload(Listing.horse).load_only(*HORSE_SCORING_COLUMNS),
+    )
+
+
+def owner_scoring_options():
+    """Loader options for owner profiles used in scoring"""
+    return (load_only(*OWNER_SCORING_COLUMNS),)
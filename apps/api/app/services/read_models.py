@@ -0,0 +1,147 @@
+"""Immutable scoring records built straight from Core `select()` rows.
+
+The scoring rules only read a dozen columns per side. Loading full ORM
+`Listing`/`Horse`/`OwnerProfile`/`RiderProfile` instances for every
+candidate pays for identity-map bookkeeping, lazy-load state and every
+column; these NamedTuples carry just the fields the rules read. ORM
+entities are loaded afterwards only for the few winners a response shows.
+
+`scripts/bench_scoring_read_models.py` compares both paths.
+"""
+from typing import Iterable, List, NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.horse import Horse
+from app.models.listing import Listing
+from app.models.owner_profile import OwnerProfile
+from app.models.rider_profile import RiderProfile
+
+
+class RiderRecord(NamedTuple):
+    """Rider profile fields the scoring rules read"""
+    user_id: int
+    postcode: Optional[str]
+    max_travel_distance_km: Optional[int]
+    budget_max_euro: Optional[int]
+    experience_years: Optional[int]
+    insurance_coverage: Optional[bool]
+    date_of_birth: Optional[str]
+    available_days: Optional[list]
+    discipline_preferences: Optional[list]
+    personality_style: Optional[list]
+    willing_tasks: Optional[list]
+    material_preferences: Optional[dict]
+
+
+class ListingCandidate(NamedTuple):
+    """Flattened listing + horse + owner fields the rules read"""
+    listing_id: int
+    owner_id: int
+    contribution_min: Optional[int]
+    horse_disciplines: Optional[list]
+    horse_temperament: Optional[list]
+    horse_energy_level: Optional[str]
+    owner_postcode: Optional[str]
+    owner_visible_radius_km: Optional[int]
+    owner_available_days: Optional[list]
+    owner_required_tasks: Optional[list]
+    owner_min_age: Optional[int]
+    owner_max_age: Optional[int]
+    owner_min_experience_years: Optional[int]
+    owner_rider_insurance_required: Optional[bool]
+    owner_bit_policy: Optional[str]
+
+
+RIDER_RECORD_COLUMNS = tuple(getattr(RiderProfile, name) for name in RiderRecord._fields)
+
+# Same order as ListingCandidate._fields
+LISTING_CANDIDATE_COLUMNS = (
+    Listing.id, Horse.owner_id, Listing.contribution_min,
+    Horse.disciplines, Horse.temperament, Horse.energy_level,
+    OwnerProfile.postcode, OwnerProfile.visible_radius_km, OwnerProfile.available_days,
+    OwnerProfile.required_tasks, OwnerProfile.min_age, OwnerProfile.max_age,
+    OwnerProfile.min_experience_years, OwnerProfile.rider_insurance_required,
+    OwnerProfile.bit_policy,
+)
+
+_ENERGY_LEVEL_INDEX = ListingCandidate._fields.index("horse_energy_level")
+
+
+def _enum_value(value):
+    return getattr(value, "value", value)
+
+
+def rider_record(profile) -> RiderRecord:
+    """Record from an ORM profile (or any object with the same attributes)"""
+    return RiderRecord._make(getattr(profile, name) for name in RiderRecord._fields)
+
+
+def candidate_from_orm(listing: Listing, horse: Horse, owner: OwnerProfile) -> ListingCandidate:
+    return ListingCandidate(
+        listing_id=listing.id,
+        owner_id=horse.owner_id,
+        contribution_min=listing.contribution_min,
+        horse_disciplines=horse.disciplines,
+        horse_temperament=horse.temperament,
+        horse_energy_level=_enum_value(horse.energy_level),
+        owner_postcode=owner.postcode,
+        owner_visible_radius_km=owner.visible_radius_km,
+        owner_available_days=owner.available_days,
+        owner_required_tasks=owner.required_tasks,
+        owner_min_age=owner.min_age,
+        owner_max_age=owner.max_age,
+        owner_min_experience_years=owner.min_experience_years,
+        owner_rider_insurance_required=owner.rider_insurance_required,
+        owner_bit_policy=owner.bit_policy,
+    )
+
+
+def candidate_from_row(row) -> ListingCandidate:
+    """Record from a row starting with LISTING_CANDIDATE_COLUMNS (extra columns are ignored)"""
+    values = list(row[:len(ListingCandidate._fields)])
+    values[_ENERGY_LEVEL_INDEX] = _enum_value(values[_ENERGY_LEVEL_INDEX])
+    return ListingCandidate._make(values)
+
+
+def listing_candidates_query(
+    listing_ids: Optional[Iterable[int]] = None,
+    exclude_owner_id: Optional[int] = None
+):
+    """Core select of active listings with their horse and owner profile.
+
+    Listings whose owner has no profile can't be scored and are left out.
+    """
+    stmt = select(*LISTING_CANDIDATE_COLUMNS).select_from(Listing).join(
+        Horse, Horse.id == Listing.horse_id
+    ).join(
+        OwnerProfile, OwnerProfile.user_id == Horse.owner_id
+    ).where(Listing.is_active == True)
+
+    if listing_ids is not None:
+        stmt = stmt.where(Listing.id.in_(list(listing_ids)))
+    if exclude_owner_id is not None:
+        stmt = stmt.where(Horse.owner_id != exclude_owner_id)
+    return stmt
+
+
+def select_listing_candidates(db: Session, listing_ids: Optional[Iterable[int]] = None, exclude_owner_id: Optional[int] = None) -> List[ListingCandidate]:
+    if listing_ids is not None:
+        listing_ids = list(listing_ids)
+        if not listing_ids:
+            return []
+    stmt = listing_candidates_query(listing_ids, exclude_owner_id)
+    return [candidate_from_row(row) for row in db.execute(stmt)]
+
+
+def rider_records_query():
+    """Core select of rider records; callers add joins and filters"""
+    return select(*RIDER_RECORD_COLUMNS).select_from(RiderProfile)
+
+
+def select_rider_records(db: Session, user_ids: Iterable[int]) -> List[RiderRecord]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    stmt = rider_records_query().where(RiderProfile.user_id.in_(user_ids))
+    return [RiderRecord._make(row) for row in db.execute(stmt)]
@@ -0,0 +1,86 @@
+"""Stage one of discover: a bounded candidate pool from SQL.
+
+`candidate_pool` narrows the active listings with the scorer's budget
+filter (index-backed on `listings`) and returns at most `MATCH_POOL_SIZE`
+unseen listing IDs, newest first. `MatchService` then fully scores and
+reranks only that pool, so the cost of discover doesn't grow with the
+national listing count. Weekdays and disciplines are soft rules in the
+scorer, so they only rank the pool and never shrink it.
+
+The prefilter columns are denormalized, so every write that changes a
+listing's postcode, its horse's disciplines or its owner's weekdays must
+call `apply_listing_features` / `refresh_listing_features`.
+"""
+from typing import List, Optional
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.horse import Horse
+from app.models.listing import Listing
+from app.models.owner_profile import OwnerProfile
+from app.models.rider_profile import RiderProfile
+from app.services.features import availability_mask, discipline_mask, region_code
+
+
+def apply_listing_features(listing: Listing, horse: Horse, owner: Optional[OwnerProfile]) -> None:
+    """Recompute a listing's prefilter columns (caller commits)"""
+    listing.region_code = region_code(listing.location_postcode)
+    listing.availability_mask = availability_mask(owner.available_days if owner else None)
+    listing.discipline_mask = discipline_mask(horse.disciplines)
+    # Horse/owner changes alter scoring features without touching the listing row
+    listing.updated_at = func.now()
+
+
+def refresh_listing_features(db: Session, owner_id: Optional[int] = None, horse_id: Optional[int] = None) -> None:
+    """Recompute prefilter columns for an owner's or a horse's listings (caller commits)"""
+    query = db.query(Listing).join(Horse)
+    if owner_id is not None:
+        query = query.filter(Horse.owner_id == owner_id)
+    if horse_id is not None:
+        query = query.filter(Horse.id == horse_id)
+
+    owners = {}
+    for listing in query.all():
+        horse = listing.horse
+        if horse.owner_id not in owners:
+            owners[horse.owner_id] = db.query(OwnerProfile).filter(
+                OwnerProfile.user_id == horse.owner_id
+            ).first()
+        apply_listing_features(listing, horse, owners[horse.owner_id])
+
+
+def apply_prefilter(query, rider_profile: RiderProfile):
+    """The scorer's hard filters that SQL can apply; only drops listings the scorer would reject"""
+    if rider_profile.budget_max_euro:
+        query = query.filter(Listing.contribution_min <= rider_profile.budget_max_euro)
+    return query
+
+
+def candidate_pool(
+    db: Session,
+    rider_profile: RiderProfile,
+    seen=None,
+    pool_size: Optional[int] = None
+) -> List[int]:
+    """Up to `pool_size` unseen, prefiltered active listing IDs, newest first"""
+    pool_size = pool_size or settings.MATCH_POOL_SIZE
+
+    query = db.query(Listing.id).join(Horse).filter(
+        Listing.is_active == True,
+        Horse.owner_id != rider_profile.user_id  # Exclude own listings
+    )
+    query = apply_prefilter(query, rider_profile).order_by(Listing.id.desc())
+
+    # Stream IDs and stop once the pool is full, so seen listings don't shrink it
+    pool = []
+    for (listing_id,) in query.yield_per(pool_size):
+        if seen is not None and listing_id in seen:
+            continue
+        pool.append(listing_id)
+        if len(pool) >= pool_size:
+            break
+
+    metrics.observe("match_pool_size", len(pool))
+    return pool
@@ -0,0 +1,323 @@
+"""Rider <-> listing scoring engine.
+
+Hard filters and weighted soft rules are declared as data (`DEFAULT_RULES`)
+and compiled once into a `ScoringPlan`. Every scorer in the app - discover,
+/matching/candidates, reverse discovery, the percolator and mutual-match
+creation - goes through the same plan, so scores can't drift apart.
+
+Rules read a `RiderRecord` and a `ListingCandidate` (app/services/read_models.py)
+rather than ORM entities.
+
+Soft rules return a fraction in [0, 1] that is multiplied by the rule's
+weight; weights add up to 100, so scores are on a 0-100 scale. Pairs
+abandoned by the upper-bound check are counted per rule in
+`scoring_rows_pruned_total` (see `GET /metrics`).
+"""
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.metrics import metrics
+from app.models.horse import Horse
+from app.models.listing import Listing
+from app.models.owner_profile import OwnerProfile
+from app.services.features import normalized_tags
+from app.services.read_models import ListingCandidate, RiderRecord, candidate_from_orm, rider_record
+
+# Candidates scoring below this are not shown to riders
+MIN_MATCH_SCORE = 30.0
+
+# Travel distance assumed when a rider didn't set a maximum
+DEFAULT_MAX_DISTANCE_KM = 30
+
+# Placeholder distance between any two postcodes until geocoding lands
+MOCK_DISTANCE_KM = 5.0
+
+
+def calculate_distance_km(postcode1: str, postcode2: str) -> float:
+    """Calculate distance between two postcodes in km"""
+    # TODO: Implement actual postcode to coordinates conversion
+    # For now, return a mock distance
+    return MOCK_DISTANCE_KM
+
+
+def rider_age(date_of_birth: Optional[str], today: Optional[date] = None) -> Optional[int]:
+    """Age in whole years from an ISO date string, None if unknown"""
+    if not date_of_birth:
+        return None
+    try:
+        born = date.fromisoformat(date_of_birth[:10])
+    except ValueError:
+        return None
+    today = today or date.today()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+# Hard filters - True means the pair may match
+
+def within_distance(rider: RiderRecord, candidate: ListingCandidate) -> bool:
+    if not (rider.postcode and candidate.owner_postcode):
+        return True
+    distance = calculate_distance_km(rider.postcode, candidate.owner_postcode)
+    if rider.max_travel_distance_km and distance > rider.max_travel_distance_km:
+        return False
+    if candidate.owner_visible_radius_km and distance > candidate.owner_visible_radius_km:
+        return False
+    return True
+
+
+def within_budget(rider: RiderRecord, candidate: ListingCandidate) -> bool:
+    if rider.budget_max_euro and candidate.contribution_min:
+        return rider.budget_max_euro >= candidate.contribution_min
+    return True
+
+
+def enough_experience(rider: RiderRecord, candidate: ListingCandidate) -> bool:
+    if candidate.owner_min_experience_years and rider.experience_years:
+        return rider.experience_years >= candidate.owner_min_experience_years
+    return True
+
+
+def insured_if_required(rider: RiderRecord, candidate: ListingCandidate) -> bool:
+    return not candidate.owner_rider_insurance_required or bool(rider.insurance_coverage)
+
+
+def age_allowed(rider: RiderRecord, candidate: ListingCandidate) -> bool:
+    if not (candidate.owner_min_age or candidate.owner_max_age):
+        return True
+    age = rider_age(rider.date_of_birth)
+    if age is None:
+        return True
+    if candidate.owner_min_age and age < candidate.owner_min_age:
+        return False
+    if candidate.owner_max_age and age > candidate.owner_max_age:
+        return False
+    return True
+
+
+# Soft rules - fraction of the rule's weight earned
+
+def availability_overlap(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    rider_days = normalized_tags(rider.available_days)
+    owner_days = normalized_tags(candidate.owner_available_days)
+    if not (rider_days and owner_days):
+        return 0.0
+    return len(rider_days & owner_days) / len(rider_days | owner_days)
+
+
+def discipline_overlap(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    overlap = normalized_tags(rider.discipline_preferences) & normalized_tags(candidate.horse_disciplines)
+    # Four shared disciplines earn the full weight
+    return min(len(overlap) / 4, 1.0)
+
+
+def character_fit(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    personality = normalized_tags(rider.personality_style)
+    temperament = normalized_tags(candidate.horse_temperament)
+    if not (personality and temperament):
+        return 0.0
+    fit = 0.0
+    if "patient" in personality and "calm" in temperament:
+        fit += 0.5
+    if "playful" in personality and "playful" in temperament:
+        fit += 0.5
+    return fit
+
+
+def task_coverage(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    required = normalized_tags(candidate.owner_required_tasks)
+    willing = normalized_tags(rider.willing_tasks)
+    if not (required and willing):
+        return 0.0
+    return len(required & willing) / len(required)
+
+
+def distance_closeness(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    if not (rider.postcode and candidate.owner_postcode):
+        return 0.0
+    distance = calculate_distance_km(rider.postcode, candidate.owner_postcode)
+    max_distance = rider.max_travel_distance_km or DEFAULT_MAX_DISTANCE_KM
+    return max(0.0, 1 - distance / max_distance)
+
+
+def material_fit(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    preferences = rider.material_preferences or {}
+    if preferences.get("bitless_ok") and candidate.owner_bit_policy == "bitless_ok":
+        return 1.0
+    return 0.0
+
+
+# How well a horse's energy suits a rider, by experience bucket
+ENERGY_COMPATIBILITY = {
+    "beginner": {"low": 1.0, "medium": 0.3, "high": 0.0},
+    "intermediate": {"low": 0.8, "medium": 1.0, "high": 0.5},
+    "advanced": {"low": 0.6, "medium": 0.9, "high": 1.0},
+}
+
+
+def energy_fit(rider: RiderRecord, candidate: ListingCandidate) -> float:
+    if rider.experience_years is None or not candidate.horse_energy_level:
+        return 0.5  # Neutral if no data
+    if rider.experience_years < 2:
+        bucket = "beginner"
+    elif rider.experience_years < 5:
+        bucket = "intermediate"
+    else:
+        bucket = "advanced"
+    return ENERGY_COMPATIBILITY[bucket].get(candidate.horse_energy_level, 0.0)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    fn: Callable
+    weight: float = 0.0  # points for soft rules; 0 for hard filters
+    hard: bool = False
+
+
+# Weights of the old /matching scorer, except that character gives 5 of
+# its 20 points to energy (the old MatchService energy rule, keyed on
+# experience_years since profiles have no level field)
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    Rule("budget", within_budget, hard=True),
+    Rule("insurance", insured_if_required, hard=True),
+    Rule("experience", enough_experience, hard=True),
+    Rule("age", age_allowed, hard=True),
+    Rule("location", within_distance, hard=True),
+    Rule("availability", availability_overlap, weight=25),
+    Rule("discipline", discipline_overlap, weight=20),
+    Rule("character", character_fit, weight=15),
+    Rule("tasks", task_coverage, weight=15),
+    Rule("distance", distance_closeness, weight=10),
+    Rule("material", material_fit, weight=10),
+    Rule("energy", energy_fit, weight=5),
+)
+
+
+class ScoreResult(NamedTuple):
+    score: float
+    passed: bool  # all hard filters passed and threshold reachable
+    fired: Tuple[str, ...]  # soft rules that contributed points
+    failed: Optional[str] = None  # hard filter that rejected the pair
+    pruned_at: Optional[str] = None  # soft rule at which evaluation was abandoned
+
+
+@dataclass
+class ScoringPlan:
+    """Rules compiled for evaluation against a fixed threshold.
+
+    Soft rules run heaviest first, so the running upper bound
+    (score so far + weight of the rules not yet run) drops fastest and
+    hopeless pairs are abandoned before the cheaper-weighted rules run.
+    """
+    rules: Sequence[Rule]
+    threshold: float = MIN_MATCH_SCORE
+    hard_rules: List[Rule] = field(init=False)
+    soft_rules: List[Rule] = field(init=False)
+    remaining_max: List[float] = field(init=False)
+
+    def __post_init__(self):
+        self.hard_rules = [rule for rule in self.rules if rule.hard]
+        self.soft_rules = sorted(
+            (rule for rule in self.rules if not rule.hard),
+            key=lambda rule: rule.weight,
+            reverse=True
+        )
+        # remaining_max[i] = points still achievable from soft rule i onwards
+        self.remaining_max = [
+            sum(rule.weight for rule in self.soft_rules[i:])
+            for i in range(len(self.soft_rules) + 1)
+        ]
+
+    def evaluate(self, rider: RiderRecord, candidate: ListingCandidate) -> ScoreResult:
+        result = self._evaluate(rider, candidate, self.threshold)
+        self._record(1, Counter([result.pruned_at]) if result.pruned_at else Counter())
+        return result
+
+    def evaluate_many(self, rider: RiderRecord, candidates: Iterable[ListingCandidate]) -> List[Tuple[ListingCandidate, ScoreResult]]:
+        """Score many candidates for one rider; returns only those that pass"""
+        results = []
+        evaluated = 0
+        pruned = Counter()
+        for candidate in candidates:
+            evaluated += 1
+            result = self._evaluate(rider, candidate, self.threshold)
+            if result.passed:
+                results.append((candidate, result))
+            elif result.pruned_at:
+                pruned[result.pruned_at] += 1
+        self._record(evaluated, pruned)
+        return results
+
+    def top_k(self, pairs: Iterable[Tuple[RiderRecord, ListingCandidate]], k: int) -> List[Tuple[RiderRecord, ListingCandidate, ScoreResult]]:
+        """Best `k` passing (rider, candidate) pairs, highest score first.
+
+        Once `k` pairs are held, the k-th best score becomes the pruning
+        floor, so later pairs are abandoned as soon as they can't beat it.
+        Ties keep the pair seen first.
+        """
+        if k <= 0:
+            return []
+
+        heap = []  # min-heap of (score, -sequence, rider, candidate, result)
+        evaluated = 0
+        pruned = Counter()
+        for sequence, (rider, candidate) in enumerate(pairs):
+            evaluated += 1
+            floor = self.threshold
+            if len(heap) == k:
+                floor = max(floor, heap[0][0])
+            result = self._evaluate(rider, candidate, floor)
+            if result.pruned_at:
+                pruned[result.pruned_at] += 1
+                continue
+            if not result.passed:
+                continue
+            entry = (result.score, -sequence, rider, candidate, result)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+        self._record(evaluated, pruned)
+        heap.sort(key=lambda entry: entry[:2], reverse=True)
+        return [(rider, candidate, result) for _, _, rider, candidate, result in heap]
+
+    def _evaluate(self, rider: RiderRecord, candidate: ListingCandidate, floor: float) -> ScoreResult:
+        for rule in self.hard_rules:
+            if not rule.fn(rider, candidate):
+                return ScoreResult(0.0, False, (), rule.name)
+
+        score = 0.0
+        fired = []
+        for index, rule in enumerate(self.soft_rules):
+            # Stop once even full marks on the remaining rules can't reach the floor
+            if score + self.remaining_max[index] < floor:
+                return ScoreResult(score, False, tuple(fired), pruned_at=rule.name)
+            points = rule.fn(rider, candidate) * rule.weight
+            if points > 0:
+                score += points
+                fired.append(rule.name)
+
+        return ScoreResult(score, score >= floor, tuple(fired))
+
+    @staticmethod
+    def _record(evaluated: int, pruned: Counter) -> None:
+        metrics.inc("scoring_rows_evaluated_total", evaluated)
+        for rule_name, count in pruned.items():
+            metrics.inc("scoring_rows_pruned_total", count, rule=rule_name)
+
+
+# Discover plan: prunes pairs that can't reach MIN_MATCH_SCORE
+DEFAULT_PLAN = ScoringPlan(DEFAULT_RULES)
+
+# No threshold: always computes the full score
+FULL_PLAN = ScoringPlan(DEFAULT_RULES, threshold=0.0)
+
+
+def score_match(rider, listing: Listing, horse: Horse, owner: OwnerProfile) -> float:
+    """Full 0-100 score for one ORM pair (0 if a hard filter fails)"""
+    result = FULL_PLAN.evaluate(rider_record(rider), candidate_from_orm(listing, horse, owner))
+    return result.score if result.failed is None else 0.0
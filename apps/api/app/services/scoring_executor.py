@@ -0,0 +1,133 @@
+"""Process-pool offload for CPU-heavy candidate scoring.
+
+Scoring is pure Python, so even off the event loop a large deck holds the
+GIL and stalls every other request on the worker. Candidate sets of at
+least `SCORING_OFFLOAD_THRESHOLD` are split into chunks, scored in a
+`ProcessPoolExecutor` and the partial top Ks merged; smaller sets are
+scored inline, where the IPC round trip would cost more than it saves.
+
+Pool processes are started once and stay warm. When discover runs from the
+shared market snapshot, each process maps the same snapshot file, so only
+listing IDs cross the process boundary; otherwise the candidate records
+themselves are sent. Scoring counters from the children are shipped back
+and merged into this process's metrics.
+"""
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.market import MarketSnapshot, market, snapshot_path
+from app.services.read_models import ListingCandidate, RiderRecord
+from app.services.scoring import ScoreResult, ScoringPlan
+
+Ranked = List[Tuple[RiderRecord, ListingCandidate, ScoreResult]]
+
+
+def _init_worker() -> None:
+    """Warm the child: map the shared snapshot before the first task"""
+    if settings.MARKET_SNAPSHOT_SHARED:
+        market.remap(snapshot_path())
+
+
+def _score_candidates(plan: ScoringPlan, rider: RiderRecord, candidates: Sequence[ListingCandidate], k: int):
+    ranked = plan.top_k(((rider, candidate) for candidate in candidates), k)
+    return [(candidate, result) for _, candidate, result in ranked], metrics.drain_counters()
+
+
+def _score_listing_ids(plan: ScoringPlan, rider: RiderRecord, listing_ids: np.ndarray, k: int):
+    # Follow the builder; IDs that left the market since the pool was cut are dropped
+    market.remap(snapshot_path())
+    snapshot = market.current
+    if snapshot is None:
+        return [], {}
+    candidates = [snapshot.records[index] for index in snapshot.indices_for(listing_ids)]
+    return _score_candidates(plan, rider, candidates, k)
+
+
+class ScoringExecutor:
+    """Lazily started process pool with an inline fallback"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def top_k(self, plan: ScoringPlan, rider: RiderRecord, candidates: Sequence[ListingCandidate], k: int) -> Ranked:
+        """Best `k` of `candidates`, offloaded when the set is large"""
+        if not self._should_offload(len(candidates)):
+            return plan.top_k(((rider, candidate) for candidate in candidates), k)
+        chunks = [candidates[start:end] for start, end in self._chunk_bounds(len(candidates))]
+        ranked = self._fan_out(_score_candidates, plan, rider, chunks, k)
+        if ranked is None:
+            return plan.top_k(((rider, candidate) for candidate in candidates), k)
+        return ranked
+
+    def top_k_snapshot(self, plan: ScoringPlan, rider: RiderRecord, snapshot: MarketSnapshot, indices: np.ndarray, k: int) -> Ranked:
+        """Best `k` of a snapshot pool; ships listing IDs when children share the snapshot"""
+        if not (snapshot.is_shared and self._should_offload(len(indices))):
+            return self.top_k(plan, rider, [snapshot.records[index] for index in indices], k)
+        listing_ids = snapshot.listing_ids[indices]
+        chunks = [listing_ids[start:end] for start, end in self._chunk_bounds(len(listing_ids))]
+        ranked = self._fan_out(_score_listing_ids, plan, rider, chunks, k)
+        if ranked is None:
+            return plan.top_k(((rider, snapshot.records[index]) for index in indices), k)
+        return ranked
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _should_offload(self, size: int) -> bool:
+        return settings.SCORING_PROCESSES > 0 and size >= settings.SCORING_OFFLOAD_THRESHOLD
+
+    def _chunk_bounds(self, size: int):
+        chunks = min(settings.SCORING_PROCESSES, size)
+        step = -(-size // chunks)
+        return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+    def _fan_out(self, task, plan: ScoringPlan, rider: RiderRecord, chunks: list, k: int) -> Optional[Ranked]:
+        """Score chunks in the pool and merge partial top Ks (None if the pool broke)"""
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(task, plan, rider, chunk, k) for chunk in chunks]
+            partials = []
+            for future in futures:
+                ranked, counters = future.result()
+                partials.extend(ranked)
+                metrics.merge_counters(counters)
+        except BrokenProcessPool as e:
+            print(f"ERROR: Scoring pool broke, scoring inline: {e}")
+            self._reset_pool()
+            return None
+
+        metrics.inc("scoring_offloaded_total")
+        # Same order as ScoringPlan.top_k over a newest-first pool: score, then newer listing
+        best = heapq.nlargest(k, partials, key=lambda ranked: (ranked[1].score, ranked[0].listing_id))
+        return [(rider, candidate, result) for candidate, result in best]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.SCORING_PROCESSES,
+                    # Spawned, not forked: children don't inherit the parent's DB connections or threads
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            self._pool = None
+
+
+# One pool per uvicorn worker
+scoring_executor = ScoringExecutor()
@@ -0,0 +1,100 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, Query
+
+from app.models.horse import Horse
+from app.models.stable import Stable
+
+
+# Columns that can be searched / autocompleted, keyed by suggestion kind.
+# Every column listed here is backed by a pg_trgm GIN index.
+SUGGEST_COLUMNS = {
+    "city": Stable.city,
+    "horse": Horse.name,
+    "breed": Horse.breed,
+    "stable": Stable.name,
+}
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def is_postgres(db: Session) -> bool:
+    """Check whether the session is bound to PostgreSQL (pg_trgm available)"""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+class SearchQueryBuilder:
+    """Adds trigram-backed text filters and similarity ranking to a query.
+
+    On PostgreSQL the ILIKE / `%` filters are served by the pg_trgm GIN
+    indexes and results are ranked by `similarity()`. Other dialects
+    (SQLite in tests) fall back to a plain LIKE, ranked by value length.
+    """
+
+    def __init__(self, query: Query):
+        self.query = query
+        self.postgres = is_postgres(query.session)
+        self._rank_terms: List[Tuple[object, str]] = []
+
+    def contains(self, column, term: Optional[str]) -> "SearchQueryBuilder":
+        """Filter rows whose column contains the term (case-insensitive)"""
+        term = (term or "").strip()
+        if not term:
+            return self
+
+        self.query = self.query.filter(column.ilike(f"%{escape_like(term)}%", escape="\\"))
+        self._rank_terms.append((column, term))
+        return self
+
+    def matches_any(self, columns: List, term: Optional[str]) -> "SearchQueryBuilder":
+        """Filter rows where any column contains or closely resembles the term"""
+        term = (term or "").strip()
+        if not term:
+            return self
+
+        pattern = f"%{escape_like(term)}%"
+        conditions = [column.ilike(pattern, escape="\\") for column in columns]
+        if self.postgres:
+            # `%` is the pg_trgm similarity operator - tolerates typos
+            conditions += [column.op("%")(term) for column in columns]
+
+        self.query = self.query.filter(or_(*conditions))
+        self._rank_terms.extend((column, term) for column in columns)
+        return self
+
+    def build(self) -> Query:
+        """Return the query ordered by best similarity to the search terms"""
+        if not self._rank_terms:
+            return self.query
+
+        if self.postgres:
+            scores = [func.similarity(column, term) for column, term in self._rank_terms]
+            rank = scores[0] if len(scores) == 1 else func.greatest(*scores)
+            return self.query.order_by(rank.desc())
+
+        # Fallback: shortest value first approximates "closest match"
+        column = self._rank_terms[0][0]
+        return self.query.order_by(func.length(column), column)
+
+
+def suggest(db: Session, kind: str, prefix: str, limit: int = 10) -> List[Tuple[str, float]]:
+    """Prefix autocomplete for a search column, ranked by similarity"""
+    column = SUGGEST_COLUMNS[kind]
+    prefix = prefix.strip()
+
+    query = db.query(column).filter(
+        column.ilike(f"{escape_like(prefix)}%", escape="\\")
+    )
+    if column.class_ is Stable:
+        query = query.filter(Stable.is_active == True)
+
+    if is_postgres(db):
+        rank = func.similarity(column, prefix)
+        rows = query.add_columns(rank).group_by(column).order_by(rank.desc(), column).limit(limit).all()
+        return [(value, float(score)) for value, score in rows]
+
+    rows = query.group_by(column).order_by(func.length(column), column).limit(limit).all()
+    return [(value, 1.0) for (value,) in rows]
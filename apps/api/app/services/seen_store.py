@@ -0,0 +1,202 @@
+"""Per-user "seen" listings, so the deck doesn't repeat cards.
+
+Liked and skipped listing IDs are kept as sorted uint32 arrays (4 bytes per
+decision) in `seen_listing_sets`, one row per user. The candidate pipeline
+loads the set once and filters in process with binary search instead of a
+`NOT IN (SELECT ... FROM likes)` anti-join that grows with like history.
+
+Likes never expire. Each skip stores its own day (a uint16 day number,
+2 bytes per skip, in `skipped_days` alongside `skipped_ids`), and a skip
+returns to the deck once it is older than `SEEN_SKIP_TTL_DAYS`. A user
+resetting their deck clears all skips.
+"""
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.like import Like
+from app.models.seen_listing_set import SeenListingSet
+
+
+# Day numbers count from here; uint16 lasts until 2199
+DAY_EPOCH = date(2020, 1, 1)
+
+
+def day_number(day: date) -> int:
+    return (day - DAY_EPOCH).days
+
+
+def _pack_days(days: Iterable[int]) -> bytes:
+    packed = array("H", days)
+    # Little-endian like the ID arrays
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_days(data: Optional[bytes]) -> array:
+    days = array("H")
+    if data:
+        days.frombytes(data)
+        if sys.byteorder == "big":
+            days.byteswap()
+    return days
+
+
+class SeenSet:
+    """Sorted, de-duplicated array of listing IDs with O(log n) membership"""
+
+    __slots__ = ("ids",)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self.ids = array("I", sorted(set(ids)))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "SeenSet":
+        seen = cls()
+        if data:
+            seen.ids.frombytes(data)
+            # Stored little-endian regardless of host byte order
+            if sys.byteorder == "big":
+                seen.ids.byteswap()
+        return seen
+
+    def to_bytes(self) -> bytes:
+        if sys.byteorder == "big":
+            swapped = array("I", self.ids)
+            swapped.byteswap()
+            return swapped.tobytes()
+        return self.ids.tobytes()
+
+    def __contains__(self, listing_id: int) -> bool:
+        index = bisect_left(self.ids, listing_id)
+        return index < len(self.ids) and self.ids[index] == listing_id
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def union(self, other: "SeenSet") -> "SeenSet":
+        return SeenSet(list(self.ids) + list(other.ids))
+
+    def add_many(self, listing_ids: Iterable[int]) -> None:
+        new_ids = [listing_id for listing_id in listing_ids if listing_id not in self]
+        if new_ids:
+            self.ids = array("I", sorted(set(self.ids).union(new_ids)))
+
+    def discard(self, listing_id: int) -> None:
+        index = bisect_left(self.ids, listing_id)
+        if index < len(self.ids) and self.ids[index] == listing_id:
+            del self.ids[index]
+
+    def filter_unseen(self, listing_ids: Iterable[int]) -> List[int]:
+        """Keep only the IDs that are not in the set"""
+        return [listing_id for listing_id in listing_ids if listing_id not in self]
+
+
+class SeenStore:
+    """Loads and updates a user's seen set; writes join the caller's transaction"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load(self, user_id: int) -> SeenSet:
+        """Liked plus non-expired skipped listings for the user"""
+        row = self.db.query(SeenListingSet).filter(SeenListingSet.user_id == user_id).first()
+        if row is None:
+            # Not migrated to the seen store yet - likes are the only history
+            return SeenSet(self._liked_from_likes(user_id))
+
+        return SeenSet.from_bytes(row.liked_ids).union(self._live_skips(row))
+
+    def load_many(self, user_ids: Iterable[int]) -> Dict[int, SeenSet]:
+        """`load` for many users with two queries (batch jobs)"""
+        user_ids = list(user_ids)
+        seen = {}
+        for row in self.db.query(SeenListingSet).filter(SeenListingSet.user_id.in_(user_ids)):
+            seen[row.user_id] = SeenSet.from_bytes(row.liked_ids).union(self._live_skips(row))
+
+        missing = [user_id for user_id in user_ids if user_id not in seen]
+        if missing:
+            liked_by_user = {user_id: [] for user_id in missing}
+            for user_id, listing_id in self.db.query(Like.from_user_id, Like.listing_id).filter(Like.from_user_id.in_(missing)):
+                liked_by_user[user_id].append(listing_id)
+            seen.update((user_id, SeenSet(listing_ids)) for user_id, listing_ids in liked_by_user.items())
+        return seen
+
+    def record(self, user_id: int, liked: Iterable[int] = (), skipped: Iterable[int] = ()) -> None:
+        """Add decisions to the user's set (caller commits)"""
+        row = self._lock_row(user_id)
+
+        liked_set = SeenSet.from_bytes(row.liked_ids)
+        liked_set.add_many(liked)
+        row.liked_ids = liked_set.to_bytes()
+
+        skipped = list(skipped)
+        if skipped:
+            # Drop expired skips while rewriting; a repeated skip restarts its age
+            today = day_number(date.today())
+            skips = dict(self._skips(row, today - settings.SEEN_SKIP_TTL_DAYS))
+            skips.update((listing_id, today) for listing_id in skipped)
+            ordered = sorted(skips)
+            row.skipped_ids = SeenSet(ordered).to_bytes()
+            row.skipped_days = _pack_days(skips[listing_id] for listing_id in ordered)
+
+    def forget_like(self, user_id: int, listing_id: int) -> None:
+        """Put an unliked listing back into the deck (caller commits)"""
+        row = self._lock_row(user_id)
+        liked_set = SeenSet.from_bytes(row.liked_ids)
+        liked_set.discard(listing_id)
+        row.liked_ids = liked_set.to_bytes()
+
+    def reset_skips(self, user_id: int) -> None:
+        """Bring all skipped listings back into the deck (caller commits)"""
+        row = self._lock_row(user_id)
+        row.skipped_ids = b""
+        row.skipped_days = b""
+        row.skips_since = datetime.now(timezone.utc)
+
+    def _lock_row(self, user_id: int) -> SeenListingSet:
+        query = self.db.query(SeenListingSet).filter(
+            SeenListingSet.user_id == user_id
+        ).with_for_update().populate_existing()
+
+        row = query.first()
+        if row is None:
+            # First write for this user: create the row seeded from existing likes
+            stmt = dialect_insert(self.db, SeenListingSet).values(
+                user_id=user_id,
+                liked_ids=SeenSet(self._liked_from_likes(user_id)).to_bytes(),
+                skipped_ids=b"",
+                skipped_days=b""
+            ).on_conflict_do_nothing(index_elements=["user_id"])
+            self.db.execute(stmt)
+            row = query.one()
+        return row
+
+    def _liked_from_likes(self, user_id: int) -> List[int]:
+        return [
+            listing_id for (listing_id,) in
+            self.db.query(Like.listing_id).filter(Like.from_user_id == user_id)
+        ]
+
+    def _skips(self, row: SeenListingSet, expired_on_or_before: int) -> Iterator[Tuple[int, int]]:
+        """(listing_id, day) of the row's skips made after the given day number"""
+        ids = SeenSet.from_bytes(row.skipped_ids).ids
+        days = _unpack_days(row.skipped_days)
+        if len(days) != len(ids):
+            # Written before per-skip days: date every skip at the start of the old window
+            since = row.skips_since.date() if row.skips_since else date.today()
+            days = array("H", [day_number(since)] * len(ids))
+        return ((listing_id, day) for listing_id, day in zip(ids, days) if day > expired_on_or_before)
+
+    def _live_skips(self, row: SeenListingSet) -> SeenSet:
+        cutoff = day_number(date.today()) - settings.SEEN_SKIP_TTL_DAYS
+        return SeenSet(listing_id for listing_id, _ in self._skips(row, cutoff))
@@ -0,0 +1,101 @@
+"""Stripe SDK calls off the event loop.
+
+The `stripe` SDK is synchronous. Calls run in a bounded thread pool
+(`STRIPE_MAX_CONCURRENCY` threads), so a checkout spike queues for Stripe
+instead of blocking the event loop or taking every threadpool thread. The
+SDK reuses keep-alive connections (one `requests` session per pool
+thread). It times out after `STRIPE_TIMEOUT_SECONDS` and retries network
+errors, 409s and 5xx responses itself, up to `STRIPE_MAX_NETWORK_RETRIES`
+times. Writes carry idempotency keys, so those retries never double-charge.
+Connection errors and Stripe 5xx responses feed a circuit breaker (see
+app/core/http.py). While it is open, calls fail fast with an
+APIConnectionError.
+
+`STRIPE_API_BASE` points the SDK at another server, e.g. stripe-mock in tests.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+import stripe
+
+from app.core.config import settings
+from app.core.http import CircuitBreaker
+from app.core.metrics import metrics
+
+
+class StripeGateway:
+    def __init__(self):
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.breaker = CircuitBreaker("stripe")
+        self.configure()
+
+    def configure(self) -> None:
+        """Apply settings to the SDK's global client"""
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+        stripe.default_http_client = stripe.http_client.RequestsClient(timeout=settings.STRIPE_TIMEOUT_SECONDS)
+        if settings.STRIPE_API_BASE:
+            stripe.api_base = settings.STRIPE_API_BASE
+
+    async def call(self, name: str, fn: Callable, *args, **kwargs):
+        """Run an SDK call in the pool; StripeError propagates to the caller"""
+        if not self.breaker.allow():
+            metrics.inc("stripe_errors_total", call=name)
+            raise stripe.error.APIConnectionError("Stripe is unavailable, try again shortly")
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self._change_in_flight(1)
+        try:
+            result = await loop.run_in_executor(self._get_pool(), partial(fn, *args, **kwargs))
+        except (stripe.error.APIConnectionError, stripe.error.APIError):
+            metrics.inc("stripe_errors_total", call=name)
+            self.breaker.record_failure()
+            raise
+        except stripe.error.StripeError:
+            # Card declines, bad requests: Stripe itself is healthy
+            metrics.inc("stripe_errors_total", call=name)
+            self.breaker.record_success()
+            raise
+        finally:
+            self._change_in_flight(-1)
+            metrics.observe("stripe_call_seconds", time.perf_counter() - started, call=name)
+        self.breaker.record_success()
+        return result
+
+    async def create_payment_intent(self, idempotency_key: str, **params):
+        return await self.call(
+            "payment_intent.create", stripe.PaymentIntent.create, idempotency_key=idempotency_key, **params
+        )
+
+    async def retrieve_payment_intent(self, payment_intent_id: str):
+        return await self.call("payment_intent.retrieve", stripe.PaymentIntent.retrieve, payment_intent_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=settings.STRIPE_MAX_CONCURRENCY,
+                    thread_name_prefix="stripe"
+                )
+            return self._pool
+
+    def _change_in_flight(self, delta: int) -> None:
+        with self._lock:
+            self._in_flight += delta
+            metrics.set("stripe_calls_in_flight", self._in_flight)
+
+
+# One gateway (and pool) per worker process
+stripe_gateway = StripeGateway()
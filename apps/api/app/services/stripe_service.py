@@ -2,17 +2,19 @@ import stripe
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.metrics import metrics
 from app.models.mutual_match import MutualMatch
+from app.models.stripe_webhook_event import StripeWebhookEvent
 from app.models.user import User
-
-# Initialize Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from app.services.outbox import record_event
+from app.services.stripe_gateway import stripe_gateway
 
 class StripeService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_chat_unlock_payment_intent(
+    async def create_chat_unlock_payment_intent(
         self, 
         user_id: int, 
         match_id: int,
@@ -38,8 +40,9 @@ class StripeService:
             raise ValueError("Chat already unlocked")
 
         try:
-            # Create payment intent
-            payment_intent = stripe.PaymentIntent.create(
+            # Same key for a repeated request, so a retry or double click reuses the intent
+            payment_intent = await stripe_gateway.create_payment_intent(
+                idempotency_key=f"chat-unlock-{match_id}-{user_id}-{amount_cents}",
                 amount=amount_cents,
                 currency='eur',
                 payment_method_types=['card', 'ideal'],
@@ -61,7 +64,7 @@ class StripeService:
         except stripe.error.StripeError as e:
             raise ValueError(f"Stripe error: {str(e)}")
 
-    def confirm_chat_unlock_payment(
+    async def confirm_chat_unlock_payment(
         self, 
         payment_intent_id: str
     ) -> Optional[MutualMatch]:
@@ -69,7 +72,7 @@ class StripeService:
         
         try:
             # Retrieve payment intent from Stripe
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            payment_intent = await stripe_gateway.retrieve_payment_intent(payment_intent_id)
             
             if payment_intent.status != 'succeeded':
                 raise ValueError("Payment not successful")
@@ -78,16 +81,7 @@ class StripeService:
             user_id = int(payment_intent.metadata.get('user_id'))
             match_id = int(payment_intent.metadata.get('match_id'))
             
-            # Update match to unlock chat
-            match = self.db.query(MutualMatch).filter(MutualMatch.id == match_id).first()
-            if not match:
-                raise ValueError("Match not found")
-            
-            match.paid_chat = True
-            self.db.commit()
-            self.db.refresh(match)
-            
-            return match
+            return self.apply_chat_unlock(match_id, user_id, payment_intent_id)
 
         except stripe.error.StripeError as e:
             raise ValueError(f"Stripe error: {str(e)}")
@@ -95,6 +89,24 @@ class StripeService:
             self.db.rollback()
             raise ValueError(f"Error confirming payment: {str(e)}")
 
+    def apply_chat_unlock(self, match_id: int, user_id: int, payment_intent_id: str) -> MutualMatch:
+        """Unlock a match's chat for a payment known to have succeeded (idempotent)"""
+        match = self.db.query(MutualMatch).filter(MutualMatch.id == match_id).with_for_update().first()
+        if not match:
+            raise ValueError("Match not found")
+        
+        if not match.paid_chat:
+            match.paid_chat = True
+            record_event(self.db, "chat.unlocked", {
+                "match_id": match.id,
+                "user_id": user_id,
+                "payment_intent_id": payment_intent_id
+            })
+        self.db.commit()
+        self.db.refresh(match)
+        
+        return match
+
     def create_webhook_endpoint(self) -> str:
         """Create Stripe webhook endpoint (for production setup)"""
         try:
@@ -120,17 +132,31 @@ class StripeService:
         except stripe.error.SignatureVerificationError as e:
             raise ValueError("Invalid signature")
 
+        # Stripe redelivers events; only the first delivery is processed
+        stmt = dialect_insert(self.db, StripeWebhookEvent).values(
+            id=event['id'],
+            event_type=event['type']
+        ).on_conflict_do_nothing(index_elements=["id"]).returning(StripeWebhookEvent.id)
+        if self.db.execute(stmt).scalar() is None:
+            self.db.rollback()
+            metrics.inc("stripe_webhook_duplicates_total", type=event['type'])
+            return {'status': 'duplicate'}
+
         if event['type'] == 'payment_intent.succeeded':
             payment_intent = event['data']['object']
+            metadata = payment_intent.get('metadata') or {}
             
-            # Auto-unlock chat on successful payment
-            if payment_intent.metadata.get('type') == 'chat_unlock':
-                try:
-                    self.confirm_chat_unlock_payment(payment_intent['id'])
-                except Exception as e:
-                    # Log error but don't fail webhook
-                    print(f"Error auto-unlocking chat: {e}")
+            # Auto-unlock chat on successful payment. The signed event is
+            # authoritative, so there's no PaymentIntent.retrieve; the unlock
+            # runs once the outbox relays this event.
+            if metadata.get('type') == 'chat_unlock':
+                record_event(self.db, "payment.chat_unlock_succeeded", {
+                    "payment_intent_id": payment_intent['id'],
+                    "match_id": int(metadata['match_id']),
+                    "user_id": int(metadata['user_id'])
+                })
 
+        self.db.commit()
         return {'status': 'success'}
 
     def get_payment_methods(self, user_id: int) -> Dict[str, Any]:
@@ -0,0 +1,8 @@
+"""Scheduled jobs and outbox subscribers, one module per area (see app/core/jobs.py)"""
+
+JOB_MODULES = [
+    "app.tasks.idempotency",
+    "app.tasks.matching",
+    "app.tasks.outbox",
+    "app.tasks.payments",
+]
@@ -0,0 +1,14 @@
+from app.core.database import SessionLocal
+from app.core.idempotency import purge_expired
+from app.core.jobs import job
+
+
+@job("idempotency.purge", max_retries=1, backoff_seconds=60)
+def purge_idempotency_keys() -> None:
+    """Drop stored responses and abandoned claims past their expiry"""
+    db = SessionLocal()
+    try:
+        deleted = purge_expired(db)
+        print(f"DEBUG: Purged {deleted} expired idempotency keys")
+    finally:
+        db.close()
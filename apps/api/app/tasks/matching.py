@@ -0,0 +1,54 @@
+from typing import List, Optional
+
+from app.core.database import SessionLocal
+from app.core.jobs import job
+from app.services.batch_matching import run_batch_matching as run_batch
+from app.services.match_service import MatchService
+from app.services.outbox import subscribe
+from app.services.percolator import percolate_listing
+
+
+def detect_mutual_matches(rider_user_id: int, listing_ids: List[int]) -> None:
+    """Check new likes for mutual matches (creation is idempotent)"""
+    db = SessionLocal()
+    try:
+        match_service = MatchService(db)
+        for listing_id in listing_ids:
+            match_service.create_mutual_match(rider_user_id, listing_id)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def percolate_new_listing(listing_id: int) -> None:
+    """Find the riders a new or changed listing qualifies for (reads this worker's rider index)"""
+    db = SessionLocal()
+    try:
+        matches = percolate_listing(db, listing_id)
+        print(f"DEBUG: Listing {listing_id} qualifies for {len(matches)} riders")
+    finally:
+        db.close()
+
+
+@job("matching.run_batch", max_retries=1, backoff_seconds=300)
+def run_batch_matching(k: Optional[int] = None, verify_riders: int = 0) -> None:
+    """Nightly top-K suggestions for every rider"""
+    db = SessionLocal()
+    try:
+        run_batch(db, k=k, verify_riders=verify_riders)
+    finally:
+        db.close()
+
+
+@subscribe("like.created")
+@subscribe("owner_like.created")
+def on_like_created(payload: dict) -> None:
+    # Runs in the relay: the event stays pending until matching has succeeded
+    detect_mutual_matches(payload["rider_id"], [payload["listing_id"]])
+
+
+@subscribe("listing.saved")
+def on_listing_saved(payload: dict) -> None:
+    percolate_new_listing(payload["listing_id"])
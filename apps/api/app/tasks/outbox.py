@@ -0,0 +1,15 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.jobs import job
+from app.services.outbox import purge_delivered
+
+
+@job("outbox.purge", max_retries=1, backoff_seconds=60)
+def purge_outbox() -> None:
+    """Drop delivered events past the retention window"""
+    db = SessionLocal()
+    try:
+        deleted = purge_delivered(db, settings.OUTBOX_RETENTION_DAYS)
+        print(f"DEBUG: Purged {deleted} delivered outbox events")
+    finally:
+        db.close()
@@ -0,0 +1,22 @@
+from app.core.database import SessionLocal
+from app.services.outbox import subscribe
+from app.services.stripe_service import StripeService
+
+
+def unlock_chat(payment_intent_id: str, match_id: int, user_id: int) -> None:
+    """Unlock a match's chat for a succeeded payment intent"""
+    db = SessionLocal()
+    try:
+        match = StripeService(db).apply_chat_unlock(match_id, user_id, payment_intent_id)
+        print(f"DEBUG: Unlocked chat for match {match.id}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@subscribe("payment.chat_unlock_succeeded")
+def on_chat_unlock_paid(payload: dict) -> None:
+    # Runs in the relay: the event stays pending until the chat is unlocked
+    unlock_chat(payload["payment_intent_id"], payload["match_id"], payload["user_id"])
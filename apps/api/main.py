@@ -2,13 +2,22 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+import asyncio
 import uvicorn
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import engine, get_db
+from app.core.http import close_clients, open_clients
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.invalidation import listen_invalidations
+from app.core.metrics import metrics
 from app.models import Base
 from app.api.v1.api import api_router
+from app.services.market import poll_market
+from app.services.outbox import poll_outbox
+from app.services.scoring_executor import scoring_executor
+from app.services.stripe_gateway import stripe_gateway
 # from app.core.auth import verify_token
 
 security = HTTPBearer()
@@ -17,9 +26,20 @@ security = HTTPBearer()
 async def lifespan(app: FastAPI):
     # Startup
     Base.metadata.create_all(bind=engine)
+    await open_clients()
+    market_poller = asyncio.create_task(poll_market()) if settings.MARKET_SNAPSHOT_ENABLED else None
+    outbox_relay = asyncio.create_task(poll_outbox()) if settings.OUTBOX_RELAY_ENABLED else None
+    invalidation_listener = asyncio.create_task(listen_invalidations())
     yield
     # Shutdown
-    pass
+    invalidation_listener.cancel()
+    if outbox_relay:
+        outbox_relay.cancel()
+    if market_poller:
+        market_poller.cancel()
+    scoring_executor.shutdown()
+    stripe_gateway.shutdown()
+    await close_clients()
 
 app = FastAPI(
     title="HorseSharing API",
@@ -30,6 +50,9 @@ app = FastAPI(
     redoc_url="/redoc" if settings.ENVIRONMENT == "development" else None,
 )
 
+# Idempotency-Key replay (added first so CORS wraps replayed responses too)
+app.add_middleware(IdempotencyMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +73,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process counters for this worker"""
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
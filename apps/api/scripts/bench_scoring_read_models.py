@@ -0,0 +1,167 @@
+"""Benchmark: scoring candidates from ORM entities vs Core read models.
+
+Seeds an in-memory SQLite database, then loads and scores every active
+listing for one rider both ways and reports wall time per run and peak
+traced memory.
+
+    cd apps/api
+    python scripts/bench_scoring_read_models.py --listings 20000 --runs 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+# Add the parent directory to the path so we can import our app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.horse import Horse, HorseType, HorseSex, EnergyLevel
+from app.models.listing import Listing, ContributionType
+from app.models.owner_profile import OwnerProfile
+from app.models.rider_profile import RiderProfile
+from app.models.user import User, UserRole
+from app.services.read_models import candidate_from_orm, rider_record, select_listing_candidates
+from app.services.scoring import DEFAULT_PLAN
+
+DISCIPLINES = ["dressage", "jumping", "eventing", "western", "outdoor", "natural_horsemanship"]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+TASKS = ["mucking", "grooming", "feeding", "lunging", "turnout"]
+ENERGY_LEVELS = list(EnergyLevel)
+
+
+def seed(engine, listings: int) -> None:
+    """One owner, horse and listing per row, plus the benchmark rider"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "sub": f"bench|{i}", "role": UserRole.OWNER, "email": f"owner{i}@example.com"}
+            for i in range(1, listings + 1)
+        ])
+        conn.execute(insert(OwnerProfile), [
+            {
+                "user_id": i,
+                "first_name": "Owner",
+                "last_name": str(i),
+                "postcode": f"{1000 + i % 9000} AB",
+                "available_days": WEEKDAYS[i % 7:i % 7 + 3],
+                "required_tasks": TASKS[i % 5:i % 5 + 2],
+                "min_experience_years": i % 4,
+                "rider_insurance_required": i % 3 == 0,
+            }
+            for i in range(1, listings + 1)
+        ])
+        conn.execute(insert(Horse), [
+            {
+                "id": i,
+                "owner_id": i,
+                "name": f"Horse {i}",
+                "type": HorseType.HORSE,
+                "age": 4 + i % 20,
+                "sex": HorseSex.MARE,
+                "breed": "KWPN",
+                "energy_level": ENERGY_LEVELS[i % len(ENERGY_LEVELS)],
+                "disciplines": DISCIPLINES[i % 6:i % 6 + 2],
+                "temperament": ["calm"] if i % 2 else ["playful"],
+            }
+            for i in range(1, listings + 1)
+        ])
+        conn.execute(insert(Listing), [
+            {
+                "id": i,
+                "horse_id": i,
+                "location_postcode": f"{1000 + i % 9000} AB",
+                "radius_km": 20,
+                "contribution_min": 50 + i % 200,
+                "contribution_type": ContributionType.MONTH,
+                "start_date": date(2025, 1, 1),
+                "is_active": True,
+            }
+            for i in range(1, listings + 1)
+        ])
+        rider_id = listings + 1
+        conn.execute(insert(User).values(id=rider_id, sub="bench|rider", role=UserRole.RIDER, email="rider@example.com"))
+        conn.execute(insert(RiderProfile).values(
+            user_id=rider_id,
+            postcode="1012 AB",
+            max_travel_distance_km=25,
+            budget_max_euro=200,
+            experience_years=4,
+            insurance_coverage=True,
+            available_days=["monday", "wednesday", "saturday"],
+            discipline_preferences=["dressage", "outdoor"],
+            personality_style=["patient"],
+            willing_tasks=["mucking", "grooming"],
+        ))
+
+
+def orm_path(db: Session, rider_profile: RiderProfile, k: int):
+    """Pre-read-model path: ORM listings, horses and owner profiles"""
+    listings = db.query(Listing).options(joinedload(Listing.horse)).filter(Listing.is_active == True).all()
+    owner_profiles = {profile.user_id: profile for profile in db.query(OwnerProfile)}
+    pairs = (
+        (rider_profile, candidate_from_orm(listing, listing.horse, owner_profiles[listing.horse.owner_id]))
+        for listing in listings
+    )
+    return DEFAULT_PLAN.top_k(pairs, k)
+
+
+def record_path(db: Session, rider_profile: RiderProfile, k: int):
+    """Core select rows straight into NamedTuple records"""
+    rider = rider_record(rider_profile)
+    candidates = select_listing_candidates(db, exclude_owner_id=rider.user_id)
+    return DEFAULT_PLAN.top_k(((rider, candidate) for candidate in candidates), k)
+
+
+def measure(engine, path, rider_id: int, k: int, runs: int):
+    timings = []
+    for _ in range(runs):
+        with Session(engine) as db:
+            rider_profile = db.query(RiderProfile).filter(RiderProfile.user_id == rider_id).one()
+            started = time.perf_counter()
+            top_k = path(db, rider_profile, k)
+            timings.append(time.perf_counter() - started)
+
+    # Memory in a separate run: tracing slows everything down
+    with Session(engine) as db:
+        rider_profile = db.query(RiderProfile).filter(RiderProfile.user_id == rider_id).one()
+        tracemalloc.start()
+        path(db, rider_profile, k)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return min(timings), sum(timings) / len(timings), peak, [candidate.listing_id for _, candidate, _ in top_k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    seed(engine, args.listings)
+    rider_id = args.listings + 1
+
+    results = {}
+    for name, path in (("orm", orm_path), ("records", record_path)):
+        best, mean, peak, top_ids = measure(engine, path, rider_id, args.k, args.runs)
+        results[name] = top_ids
+        print(
+            f"{name:>8}: best {best * 1000:8.1f} ms  mean {mean * 1000:8.1f} ms  "
+            f"{args.listings / best:10.0f} candidates/s  peak {peak / 1024 / 1024:7.1f} MiB"
+        )
+
+    if results["orm"] != results["records"]:
+        print("WARNING: top-K differs between the ORM and record paths")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Run the batch matching job once, outside Celery.
+
+Scores every rider against every active listing and stores each rider's
+top K in `match_suggestions` for the run date (replacing earlier rows for
+that date).
+
+    cd apps/api
+    python scripts/run_batch_matching.py --k 10 --verify 20
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+# Add the parent directory to the path so we can import our app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.batch_matching import run_batch_matching
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=None, help="suggestions per rider (default MATCH_SUGGESTIONS_K)")
+    parser.add_argument("--run-date", type=date.fromisoformat, default=None, help="YYYY-MM-DD, default today")
+    parser.add_argument("--rider-tile", type=int, default=None)
+    parser.add_argument("--listing-tile", type=int, default=None)
+    parser.add_argument("--verify", type=int, default=0, help="riders to re-score through the scoring plan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = run_batch_matching(
+            db,
+            k=args.k,
+            run_date=args.run_date,
+            rider_tile=args.rider_tile,
+            listing_tile=args.listing_tile,
+            verify_riders=args.verify
+        )
+    finally:
+        db.close()
+
+    print(
+        f"{stats.riders} riders x {stats.listings} listings: {stats.suggestions} suggestions "
+        f"in {stats.seconds:.1f}s ({stats.pairs / max(stats.seconds, 1e-9):,.0f} pairs/s)"
+    )
+    if stats.mismatches:
+        print(f"WARNING: {stats.mismatches} verified riders differ from the scoring plan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import pytest
+
+# Settings are read at import time: point everything at local, in-process backends
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("INVALIDATION_BACKEND", "loopback")
+os.environ.setdefault("OUTBOX_RELAY_ENABLED", "false")
+os.environ.setdefault("MARKET_SNAPSHOT_ENABLED", "false")
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401  (registers every table)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+class StubResponse:
+    def __init__(self, status: int = 200, body=None, headers: Optional[dict] = None, delay: float = 0.0):
+        self.status = status
+        self.body = body if body is not None else {}
+        self.headers = headers or {}
+        self.delay = delay
+
+
+class StubServer:
+    """Local HTTP server answering from a script of canned responses.
+
+    Responses are served in order; the last one repeats once the script is
+    used up. Every request is recorded as (method, path, headers, body),
+    with header names lower-cased.
+    """
+
+    def __init__(self):
+        self.script: List[StubResponse] = [StubResponse()]
+        self.requests: List[tuple] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def respond(self, *responses: StubResponse) -> None:
+        with self._lock:
+            self.script = list(responses)
+
+    def _next(self, request: tuple) -> StubResponse:
+        with self._lock:
+            self.requests.append(request)
+            return self.script.pop(0) if len(self.script) > 1 else self.script[0]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                headers = {name.lower(): value for name, value in self.headers.items()}
+                response = stub._next((self.command, self.path, headers, body))
+                if response.delay:
+                    time.sleep(response.delay)
+                payload = json.dumps(response.body).encode()
+                try:
+                    self.send_response(response.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    for name, value in response.headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout tests)
+
+            do_GET = do_POST = do_DELETE = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.start()
+    try:
+        yield server
+    finally:
+        server.stop()
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.core import auth, http
+from app.core.config import settings
+from app.core.http import CircuitBreaker, CircuitOpen, Upstream, UpstreamUnavailable
+from app.core.metrics import metrics
+from conftest import StubResponse
+
+RESET_SECONDS = 0.2
+JWKS = {"keys": [{"kid": "key-1", "kty": "RSA", "alg": "RS256", "use": "sig", "n": "0vx7", "e": "AQAB"}]}
+
+
+@pytest.fixture(autouse=True)
+def fast_breakers(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_SECONDS", RESET_SECONDS)
+
+
+@pytest_asyncio.fixture
+async def clients():
+    """Closes the shared client, which is bound to this test's event loop"""
+    try:
+        yield
+    finally:
+        await http.close_clients()
+
+
+@pytest.fixture
+def upstream(stub_server, clients):
+    return Upstream("stub", lambda: stub_server.url, lambda: 0.5)
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_threshold_and_fails_fast(upstream, stub_server):
+    stub_server.respond(StubResponse(503))
+    for _ in range(3):
+        assert (await upstream.get("/status")).status_code == 503
+
+    with pytest.raises(CircuitOpen):
+        await upstream.get("/status")
+    assert len(stub_server.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_successful_probe_closes_the_circuit(upstream, stub_server):
+    stub_server.respond(StubResponse(503))
+    for _ in range(3):
+        await upstream.get("/status")
+
+    await asyncio.sleep(RESET_SECONDS + 0.05)
+    stub_server.respond(StubResponse(200, {"ok": True}))
+    assert (await upstream.get("/status")).status_code == 200
+    # Closed again: calls flow without waiting for another window
+    assert (await upstream.get("/status")).status_code == 200
+    assert len(stub_server.requests) == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_the_circuit(upstream, stub_server):
+    stub_server.respond(StubResponse(503))
+    for _ in range(3):
+        await upstream.get("/status")
+
+    await asyncio.sleep(RESET_SECONDS + 0.05)
+    assert (await upstream.get("/status")).status_code == 503  # the probe
+    # A single failed probe reopens immediately, no new threshold count
+    with pytest.raises(CircuitOpen):
+        await upstream.get("/status")
+    assert len(stub_server.requests) == 4
+
+
+@pytest.mark.asyncio
+async def test_timeouts_count_as_failures(upstream, stub_server):
+    stub_server.respond(StubResponse(200, delay=1.0))
+    for _ in range(3):
+        with pytest.raises(UpstreamUnavailable):
+            await upstream.get("/slow")
+
+    with pytest.raises(CircuitOpen):
+        await upstream.get("/slow")
+    assert metrics.snapshot()["counters"]['upstream_errors_total{kind="timeout",upstream="stub"}'] >= 3
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker("probe")
+    for _ in range(3):
+        breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(RESET_SECONDS + 0.05)
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()  # everyone else waits for its outcome
+
+    breaker.record_success()
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+@pytest.fixture
+def kinde_stub(stub_server, clients, monkeypatch):
+    """Kinde calls go to the stub server, with an empty JWKS cache and a fresh breaker"""
+    monkeypatch.setattr(settings, "KINDE_BASE_URL", stub_server.url)
+    monkeypatch.setattr(http.kinde, "breaker", CircuitBreaker("kinde"))
+    monkeypatch.setattr(auth, "_jwks", None)
+    monkeypatch.setattr(auth, "_jwks_fetched_at", 0.0)
+    return stub_server
+
+
+@pytest.mark.asyncio
+async def test_jwks_outage_serves_cached_keys(kinde_stub, monkeypatch):
+    kinde_stub.respond(StubResponse(200, JWKS))
+    assert await auth.get_jwks() == JWKS
+
+    # Cache expired while Kinde is down: the last keys keep tokens verifiable
+    monkeypatch.setattr(settings, "KINDE_JWKS_CACHE_SECONDS", 0)
+    kinde_stub.respond(StubResponse(503))
+    assert await auth.get_jwks() == JWKS
+    assert len(kinde_stub.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_jwks_outage_without_cache_is_503(kinde_stub):
+    kinde_stub.respond(StubResponse(503))
+    with pytest.raises(HTTPException) as error:
+        await auth.get_jwks()
+    assert error.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_fresh_jwks_cache_skips_kinde(kinde_stub):
+    kinde_stub.respond(StubResponse(200, JWKS))
+    await auth.get_jwks()
+    await auth.get_jwks()
+    assert len(kinde_stub.requests) == 1
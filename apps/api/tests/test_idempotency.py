@@ -0,0 +1,142 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, status
+from fastapi.responses import JSONResponse
+
+from app.core import idempotency
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+# Two tokens for the same user (before and after a refresh) and one for another user
+TOKENS = {"token-1": "user-1", "token-1-refreshed": "user-1", "token-2": "user-2"}
+
+
+async def fake_verify(token: str) -> dict:
+    if token not in TOKENS:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return {"sub": TOKENS[token]}
+
+
+class Endpoints:
+    """A tiny app behind the middleware that counts how often each handler runs"""
+
+    def __init__(self):
+        self.calls = {"create": 0, "fail": 0, "slow": 0}
+        self.slow_started = asyncio.Event()
+        self.slow_release = asyncio.Event()
+        self.app = FastAPI()
+        self.app.add_middleware(idempotency.IdempotencyMiddleware)
+        self.app.post("/items", status_code=status.HTTP_201_CREATED)(self.create)
+        self.app.post("/fail")(self.fail)
+        self.app.post("/slow")(self.slow)
+
+    async def create(self):
+        self.calls["create"] += 1
+        return {"count": self.calls["create"]}
+
+    async def fail(self):
+        self.calls["fail"] += 1
+        return JSONResponse({"detail": "boom"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    async def slow(self):
+        self.calls["slow"] += 1
+        self.slow_started.set()
+        await self.slow_release.wait()
+        return {"done": True}
+
+
+@pytest.fixture
+def endpoints(db, monkeypatch):
+    monkeypatch.setattr(idempotency, "verify_kinde_token", fake_verify)
+    return Endpoints()
+
+
+def client(endpoints: Endpoints) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=endpoints.app), base_url="http://test")
+
+
+def headers(token: str, key: str = "key-1") -> dict:
+    return {"Authorization": f"Bearer {token}", "Idempotency-Key": key}
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_the_stored_response(endpoints):
+    async with client(endpoints) as http:
+        first = await http.post("/items", json={"name": "a"}, headers=headers("token-1"))
+        retry = await http.post("/items", json={"name": "a"}, headers=headers("token-1"))
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json() == {"count": 1}
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert endpoints.calls["create"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refreshed_token_still_replays(endpoints):
+    async with client(endpoints) as http:
+        await http.post("/items", json={"name": "a"}, headers=headers("token-1"))
+        retry = await http.post("/items", json={"name": "a"}, headers=headers("token-1-refreshed"))
+
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert endpoints.calls["create"] == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_are_scoped_per_user(endpoints):
+    async with client(endpoints) as http:
+        await http.post("/items", json={"name": "a"}, headers=headers("token-1"))
+        other = await http.post("/items", json={"name": "a"}, headers=headers("token-2"))
+
+    assert "idempotent-replayed" not in other.headers
+    assert endpoints.calls["create"] == 2
+
+
+@pytest.mark.asyncio
+async def test_reused_key_for_another_request_is_422(endpoints):
+    async with client(endpoints) as http:
+        await http.post("/items", json={"name": "a"}, headers=headers("token-1"))
+        other = await http.post("/items", json={"name": "b"}, headers=headers("token-1"))
+
+    assert other.status_code == 422
+    assert endpoints.calls["create"] == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_in_flight_gets_409(endpoints, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    async with client(endpoints) as http:
+        first = asyncio.create_task(http.post("/slow", headers=headers("token-1")))
+        await asyncio.wait_for(endpoints.slow_started.wait(), timeout=5)
+
+        duplicate = await http.post("/slow", headers=headers("token-1"))
+        assert duplicate.status_code == 409
+
+        endpoints.slow_release.set()
+        assert (await first).status_code == 200
+    assert endpoints.calls["slow"] == 1
+
+
+@pytest.mark.asyncio
+async def test_server_error_releases_the_key(endpoints, db):
+    async with client(endpoints) as http:
+        first = await http.post("/fail", headers=headers("token-1"))
+        retry = await http.post("/fail", headers=headers("token-1"))
+
+    assert first.status_code == retry.status_code == 503
+    assert "idempotent-replayed" not in retry.headers
+    assert endpoints.calls["fail"] == 2
+    assert db.query(IdempotencyKey).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_claims_nothing(endpoints, db):
+    async with client(endpoints) as http:
+        for _ in range(2):
+            response = await http.post("/items", json={"name": "a"}, headers=headers("forged"))
+            assert "idempotent-replayed" not in response.headers
+
+    # Passed through to the endpoint (whose auth would reject it), never stored
+    assert endpoints.calls["create"] == 2
+    assert db.query(IdempotencyKey).count() == 0
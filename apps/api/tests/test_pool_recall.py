@@ -0,0 +1,104 @@
+from datetime import date
+
+from app.models.horse import Horse, HorseSex, HorseType, EnergyLevel
+from app.models.listing import ContributionType, Listing
+from app.models.owner_profile import OwnerProfile
+from app.models.rider_profile import RiderProfile
+from app.models.user import User, UserRole
+from app.services.market import FEATURE_COLUMNS, build_snapshot
+from app.services.match_service import MatchService
+from app.services.read_models import listing_candidates_query, rider_record
+from app.services.retrieval import apply_listing_features
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DISCIPLINES = ["dressage", "jumping", "outdoor", "eventing"]
+RIDER_BUDGET_CENTS = 300 * 100  # stored the way the web forms save it
+
+
+def seed_market(db, count: int = 40, days=WEEKDAYS, disciplines=DISCIPLINES) -> RiderProfile:
+    """A rider plus `count` listings whose fit gets better the older the listing is"""
+    rider = User(sub="rider", email="rider@example.com", role=UserRole.RIDER)
+    db.add(rider)
+    db.flush()
+    profile = RiderProfile(
+        user_id=rider.id,
+        postcode="1012 AB",
+        budget_max_euro=RIDER_BUDGET_CENTS,
+        available_days=days,
+        discipline_preferences=disciplines,
+        willing_tasks=["mucking", "feeding", "grooming"],
+        experience_years=4,
+    )
+    db.add(profile)
+
+    for i in range(count):
+        owner = User(sub=f"owner-{i}", email=f"owner-{i}@example.com", role=UserRole.OWNER)
+        db.add(owner)
+        db.flush()
+        # Older listings share more days and disciplines with the rider
+        fit = count - i
+        owner_profile = OwnerProfile(
+            user_id=owner.id,
+            postcode="1013 CD",
+            available_days=WEEKDAYS[:1 + fit * 6 // count],
+            required_tasks=["mucking", "feeding"],
+        )
+        horse = Horse(
+            owner_id=owner.id, name=f"Horse {i}", type=HorseType.HORSE, age=10,
+            sex=HorseSex.MARE, breed="KWPN", energy_level=EnergyLevel.MEDIUM,
+            disciplines=DISCIPLINES[:1 + fit * 3 // count],
+        )
+        db.add_all([owner_profile, horse])
+        db.flush()
+        # Every fifth listing asks more than the rider's budget
+        over_budget = i % 5 == 0
+        listing = Listing(
+            horse_id=horse.id, location_postcode="1013 CD", radius_km=10,
+            contribution_min=RIDER_BUDGET_CENTS + 50 * 100 if over_budget else 150 * 100,
+            contribution_type=ContributionType.MONTH, start_date=date(2025, 1, 1),
+        )
+        apply_listing_features(listing, horse, owner_profile)
+        db.add(listing)
+    db.commit()
+    return profile
+
+
+def test_full_pool_matches_exhaustive_ranking(db):
+    rider = seed_market(db)
+    service = MatchService(db)
+
+    exhaustive = service.rank_listings(rider, 10, exhaustive=True)
+    assert exhaustive
+    assert all(listing.contribution_min <= RIDER_BUDGET_CENTS for listing, _, _ in exhaustive)
+
+    assert service.measure_pool_recall(rider, k=10, pool_size=200) == 1.0
+    assert service.measure_pool_recall(rider, k=10) == 1.0
+
+
+def test_small_pool_loses_recall(db):
+    rider = seed_market(db)
+    service = MatchService(db)
+
+    # The pool is newest first, but the best fits are the oldest listings
+    assert service.measure_pool_recall(rider, k=10, pool_size=5) < 0.5
+
+
+def test_budget_prefilter_keeps_affordable_listings(db):
+    rider = seed_market(db)
+
+    ranked = MatchService(db).rank_listings(rider, 50, pool_size=200)
+    assert len(ranked) == 32  # every listing except the over-budget fifth
+
+
+def test_soft_rules_do_not_shrink_the_pool(db):
+    # Monday is the only shared day, and only the over-budget listing offers eventing
+    rider = seed_market(db, days=["monday", "sunday"], disciplines=["eventing"])
+    service = MatchService(db)
+
+    exhaustive = service.rank_listings(rider, 50, exhaustive=True)
+    assert len(exhaustive) == 32
+    assert len(service.rank_listings(rider, 50, pool_size=200)) == 32
+    assert service.measure_pool_recall(rider, k=10, pool_size=200) == 1.0
+
+    snapshot = build_snapshot(db.execute(listing_candidates_query().add_columns(*FEATURE_COLUMNS)).all())
+    assert len(snapshot.pool_indices(rider_record(rider), pool_size=200)) == 32
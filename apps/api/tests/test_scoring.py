@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.read_models import ListingCandidate, RiderRecord
+from app.services.scoring import DEFAULT_PLAN, DEFAULT_RULES, FULL_PLAN
+
+RIDER = RiderRecord(
+    user_id=1, postcode="1012 AB", max_travel_distance_km=20, budget_max_euro=300 * 100,
+    experience_years=3, insurance_coverage=True, date_of_birth=None,
+    available_days=["monday", "wednesday", "saturday"], discipline_preferences=["dressage", "jumping"],
+    personality_style=["patient"], willing_tasks=["mucking", "feeding"], material_preferences={"bitless_ok": True},
+)
+LISTING = ListingCandidate(
+    listing_id=10, owner_id=2, contribution_min=250 * 100,
+    horse_disciplines=["dressage", "outdoor"], horse_temperament=["calm"], horse_energy_level="medium",
+    owner_postcode="1013 CD", owner_visible_radius_km=15, owner_available_days=["monday", "saturday", "sunday"],
+    owner_required_tasks=["mucking", "feeding", "grooming"], owner_min_age=None, owner_max_age=None,
+    owner_min_experience_years=2, owner_rider_insurance_required=True, owner_bit_policy="bitless_ok",
+)
+
+
+def test_soft_rule_weights_add_up_to_100():
+    assert sum(rule.weight for rule in DEFAULT_RULES if not rule.hard) == 100
+
+
+def test_representative_pair_score():
+    result = FULL_PLAN.evaluate(RIDER, LISTING)
+
+    # availability 2/4 * 25 + discipline 1/4 * 20 + character 0.5 * 15 + tasks 2/3 * 15
+    # + distance (1 - 5/20) * 10 + material 10 + energy (intermediate, medium) 5
+    assert result.score == pytest.approx(57.5)
+    assert result.passed
+    assert set(result.fired) == {"availability", "discipline", "character", "tasks", "distance", "material", "energy"}
+    assert DEFAULT_PLAN.evaluate(RIDER, LISTING).score == pytest.approx(57.5)
+
+
+def test_hard_filter_rejects_the_pair():
+    over_budget = LISTING._replace(contribution_min=RIDER.budget_max_euro + 1)
+    result = FULL_PLAN.evaluate(RIDER, over_budget)
+    assert result.failed == "budget"
+    assert result.score == 0.0
+    assert not result.passed
+
+
+def test_pruned_pair_stops_below_the_threshold():
+    # Nothing in common but distance and energy: can't reach 30 points
+    stranger = RIDER._replace(
+        available_days=["tuesday"], discipline_preferences=["eventing"], personality_style=None,
+        willing_tasks=None, material_preferences=None,
+    )
+    result = DEFAULT_PLAN.evaluate(stranger, LISTING)
+    assert not result.passed
+    assert result.pruned_at == "distance"  # 25 points left after four empty rules
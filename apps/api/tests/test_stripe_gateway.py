@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+import stripe
+
+from app.core.config import settings
+from app.services.stripe_gateway import StripeGateway
+from conftest import StubResponse
+
+PAYMENT_INTENT = {
+    "id": "pi_123",
+    "object": "payment_intent",
+    "client_secret": "pi_123_secret_456",
+    "status": "requires_payment_method",
+    "amount": 299,
+    "currency": "eur",
+}
+API_ERROR = {"error": {"type": "api_error", "message": "Something went wrong on Stripe's end"}}
+CARD_ERROR = {"error": {"type": "card_error", "code": "card_declined", "message": "Your card was declined"}}
+
+
+@pytest.fixture
+def gateway(stub_server, monkeypatch):
+    """Gateway talking to the stub server instead of api.stripe.com"""
+    monkeypatch.setattr(settings, "STRIPE_API_BASE", stub_server.url)
+    monkeypatch.setattr(settings, "STRIPE_SECRET_KEY", "sk_test_stub")
+    monkeypatch.setattr(settings, "STRIPE_MAX_NETWORK_RETRIES", 1)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_SECONDS", 0.2)
+    # configure() sets SDK globals; restore them afterwards
+    for name in ("api_base", "api_key", "max_network_retries", "default_http_client"):
+        monkeypatch.setattr(stripe, name, getattr(stripe, name))
+    gateway = StripeGateway()
+    yield gateway
+    gateway.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_intent_sends_idempotency_key(gateway, stub_server):
+    stub_server.respond(StubResponse(body=PAYMENT_INTENT))
+
+    intent = await gateway.create_payment_intent(idempotency_key="chat-unlock-1-2-299", amount=299, currency="eur")
+
+    assert intent.id == "pi_123"
+    method, path, headers, _ = stub_server.requests[0]
+    assert (method, path) == ("POST", "/v1/payment_intents")
+    assert headers["idempotency-key"] == "chat-unlock-1-2-299"
+
+
+@pytest.mark.asyncio
+async def test_retries_reuse_the_idempotency_key(gateway, stub_server):
+    stub_server.respond(
+        StubResponse(500, API_ERROR, headers={"Stripe-Should-Retry": "true"}),
+        StubResponse(body=PAYMENT_INTENT),
+    )
+
+    intent = await gateway.create_payment_intent(idempotency_key="chat-unlock-1-2-299", amount=299, currency="eur")
+
+    assert intent.id == "pi_123"
+    assert [request[2]["idempotency-key"] for request in stub_server.requests] == ["chat-unlock-1-2-299"] * 2
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_on_server_errors_and_closes_after_probe(gateway, stub_server):
+    stub_server.respond(StubResponse(500, API_ERROR, headers={"Stripe-Should-Retry": "false"}))
+    for _ in range(2):
+        with pytest.raises(stripe.error.APIError):
+            await gateway.retrieve_payment_intent("pi_123")
+
+    # Open: refused without reaching Stripe
+    with pytest.raises(stripe.error.APIConnectionError):
+        await gateway.retrieve_payment_intent("pi_123")
+    assert len(stub_server.requests) == 2
+
+    # After the reset window one probe goes out; it succeeds and closes the circuit
+    await asyncio.sleep(0.25)
+    stub_server.respond(StubResponse(body=PAYMENT_INTENT))
+    assert (await gateway.retrieve_payment_intent("pi_123")).id == "pi_123"
+    assert (await gateway.retrieve_payment_intent("pi_123")).id == "pi_123"
+    assert len(stub_server.requests) == 4
+
+
+@pytest.mark.asyncio
+async def test_card_declines_do_not_open_the_circuit(gateway, stub_server):
+    stub_server.respond(StubResponse(402, CARD_ERROR))
+    for _ in range(3):
+        with pytest.raises(stripe.error.CardError):
+            await gateway.create_payment_intent(idempotency_key="chat-unlock-1-2-299", amount=299, currency="eur")
+
+    assert len(stub_server.requests) == 3